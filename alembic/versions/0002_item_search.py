@@ -0,0 +1,42 @@
+"""item full-text and trigram search indexes
+
+Revision ID: 0002_item_search
+Revises: 0001_initial_schema
+Create Date: 2026-10-19 09:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_item_search'
+down_revision = '0001_initial_schema'
+branch_labels = None
+depends_on = None
+
+# Doit rester identique à Item.SEARCH_DOCUMENT pour que le planner utilise l'index
+SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('simple'::regconfig, coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(description, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CREATE INDEX CONCURRENTLY ne peut pas s'exécuter dans une transaction
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_item_search_document "
+            f"ON item USING gin (({SEARCH_DOCUMENT}))"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_item_title_trgm "
+            "ON item USING gin (title gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_item_title_trgm")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_item_search_document")
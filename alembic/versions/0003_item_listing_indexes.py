@@ -0,0 +1,37 @@
+"""composite indexes for filtered and sorted item listings
+
+Revision ID: 0003_item_listing_indexes
+Revises: 0002_item_search
+Create Date: 2026-10-19 09:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_item_listing_indexes'
+down_revision = '0002_item_search'
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    'ix_item_owner_created_at_id': '(owner_id, created_at, id)',
+    'ix_item_owner_updated_at_id': '(owner_id, updated_at, id)',
+    'ix_item_owner_title_c_id': '(owner_id, (title COLLATE "C"), id)',
+    'ix_item_created_at_id': '(created_at, id)',
+    'ix_item_updated_at_id': '(updated_at, id)',
+    'ix_item_title_c_id': '((title COLLATE "C"), id)',
+}
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON item {columns}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
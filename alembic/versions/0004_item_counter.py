@@ -0,0 +1,35 @@
+"""per-owner item counter
+
+Revision ID: 0004_item_counter
+Revises: 0003_item_listing_indexes
+Create Date: 2026-10-19 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_item_counter'
+down_revision = '0003_item_listing_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'itemcounter',
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('count', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['owner_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('owner_id'),
+    )
+    # Initialisation des compteurs à partir des items existants
+    op.execute(
+        "INSERT INTO itemcounter (owner_id, count) "
+        "SELECT owner_id, count(*) FROM item GROUP BY owner_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('itemcounter')
@@ -0,0 +1,38 @@
+"""ON DELETE CASCADE on item.owner_id
+
+Revision ID: 0005_item_owner_cascade
+Revises: 0004_item_counter
+Create Date: 2026-10-19 09:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.online import with_lock_retries
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_item_owner_cascade'
+down_revision = '0004_item_counter'
+branch_labels = None
+depends_on = None
+
+
+def _replace_owner_fk(on_delete: str) -> None:
+    # Deux transactions distinctes : le remplacement NOT VALID ne parcourt pas
+    # la table, et la validation ne prend qu'un verrou SHARE UPDATE EXCLUSIVE.
+    with_lock_retries(
+        "ALTER TABLE item DROP CONSTRAINT item_owner_id_fkey, "
+        "ADD CONSTRAINT item_owner_id_fkey FOREIGN KEY (owner_id) "
+        f"REFERENCES \"user\" (id) {on_delete} NOT VALID"
+    )
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TABLE item VALIDATE CONSTRAINT item_owner_id_fkey")
+
+
+def upgrade() -> None:
+    _replace_owner_fk("ON DELETE CASCADE")
+
+
+def downgrade() -> None:
+    _replace_owner_fk("")
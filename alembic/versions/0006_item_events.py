@@ -0,0 +1,24 @@
+"""sequence for item change feed event ids
+
+Revision ID: 0006_item_events
+Revises: 0005_item_owner_cascade
+Create Date: 2026-10-19 10:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_item_events'
+down_revision = '0005_item_owner_cascade'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence('item_event_seq')))
+
+
+def downgrade() -> None:
+    op.execute(sa.schema.DropSequence(sa.Sequence('item_event_seq')))
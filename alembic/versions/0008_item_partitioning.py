@@ -0,0 +1,146 @@
+"""range-partition item on created_at (monthly)
+
+Revision ID: 0008_item_partitioning
+Revises: 0007_job_table
+Create Date: 2026-10-19 10:50:00.000000
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.online import with_lock_retries
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_item_partitioning'
+down_revision = '0007_job_table'
+branch_labels = None
+depends_on = None
+
+# Mois créés d'avance après le mois courant ; ensuite, voir app/db/partitions.py
+MONTHS_AHEAD = 3
+
+# Doit rester identique à Item.SEARCH_DOCUMENT pour que le planner utilise l'index
+SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('simple'::regconfig, coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(description, '')), 'B')"
+)
+
+# Index de la table existante, recréés à l'identique sur la table partitionnée :
+# à l'attachement, PostgreSQL réutilise ceux de l'ancienne table sans les reconstruire
+INDEXES = {
+    'ix_item_id': '(id)',
+    'ix_item_title': '(title)',
+    'ix_item_search_document': f'USING gin (({SEARCH_DOCUMENT}))',
+    'ix_item_title_trgm': 'USING gin (title gin_trgm_ops)',
+    'ix_item_owner_created_at_id': '(owner_id, created_at, id)',
+    'ix_item_owner_updated_at_id': '(owner_id, updated_at, id)',
+    'ix_item_owner_title_c_id': '(owner_id, (title COLLATE "C"), id)',
+    'ix_item_created_at_id': '(created_at, id)',
+    'ix_item_updated_at_id': '(updated_at, id)',
+    'ix_item_title_c_id': '((title COLLATE "C"), id)',
+}
+
+
+def _month(offset: int) -> datetime:
+    now = datetime.utcnow()
+    index = now.year * 12 + now.month - 1 + offset
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    # La table existante devient la partition historique item_legacy
+    # (MINVALUE → début du mois prochain) sans copie des lignes : les
+    # vérifications qui parcourent la table se font en amont, sous des
+    # verrous qui n'arrêtent pas les écritures.
+    boundary = _month(1)
+    with_lock_retries(
+        "ALTER TABLE item ADD CONSTRAINT item_created_at_not_null "
+        "CHECK (created_at IS NOT NULL) NOT VALID",
+        "ALTER TABLE item ADD CONSTRAINT item_legacy_range "
+        f"CHECK (created_at < '{boundary.isoformat()}') NOT VALID",
+    )
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TABLE item VALIDATE CONSTRAINT item_created_at_not_null")
+        op.execute("ALTER TABLE item VALIDATE CONSTRAINT item_legacy_range")
+        # La clé primaire d'une table partitionnée inclut la clé de partition
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS item_legacy_pkey "
+            "ON item (id, created_at)"
+        )
+
+    # Transaction courte : renommages, table parente vide, attachement
+    # validé par les contraintes CHECK ci-dessus ; rejouée en entier si un
+    # verrou n'est pas obtenu à temps
+    statements = [
+        "ALTER TABLE item ALTER COLUMN created_at SET NOT NULL",
+        "ALTER TABLE item DROP CONSTRAINT item_created_at_not_null",
+        "ALTER TABLE item DROP CONSTRAINT item_pkey, "
+        "ADD CONSTRAINT item_legacy_pkey PRIMARY KEY USING INDEX item_legacy_pkey",
+        "ALTER TABLE item RENAME TO item_legacy",
+        "ALTER TABLE item_legacy RENAME CONSTRAINT item_owner_id_fkey "
+        "TO item_legacy_owner_id_fkey",
+    ]
+    statements += [f"ALTER INDEX {name} RENAME TO {name}_legacy" for name in INDEXES]
+    statements.append(
+        "CREATE TABLE item ("
+        "id integer NOT NULL DEFAULT nextval('item_id_seq'::regclass), "
+        "title varchar NOT NULL, "
+        "description text, "
+        "owner_id integer NOT NULL, "
+        "created_at timestamp without time zone NOT NULL, "
+        "updated_at timestamp without time zone, "
+        "CONSTRAINT item_pkey PRIMARY KEY (id, created_at), "
+        "CONSTRAINT item_owner_id_fkey FOREIGN KEY (owner_id) "
+        "REFERENCES \"user\" (id) ON DELETE CASCADE"
+        ") PARTITION BY RANGE (created_at)"
+    )
+    statements += [f"CREATE INDEX {name} ON item {columns}" for name, columns in INDEXES.items()]
+    statements += [
+        # La séquence ne doit pas disparaître avec la partition historique
+        "ALTER SEQUENCE item_id_seq OWNED BY item.id",
+        "ALTER TABLE item ATTACH PARTITION item_legacy "
+        f"FOR VALUES FROM (MINVALUE) TO ('{boundary.isoformat()}')",
+        "ALTER TABLE item_legacy DROP CONSTRAINT item_legacy_range",
+    ]
+    for offset in range(1, MONTHS_AHEAD + 1):
+        lower, upper = _month(offset), _month(offset + 1)
+        statements.append(
+            f"CREATE TABLE item_p{lower:%Y_%m} PARTITION OF item "
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+    with_lock_retries(*statements)
+
+
+def downgrade() -> None:
+    # Retour à une table simple : copie complète des lignes
+    op.execute("ALTER TABLE item RENAME TO item_partitioned")
+    op.execute("ALTER TABLE item_partitioned RENAME CONSTRAINT item_pkey TO item_partitioned_pkey")
+    op.execute(
+        "ALTER TABLE item_partitioned RENAME CONSTRAINT item_owner_id_fkey "
+        "TO item_partitioned_owner_id_fkey"
+    )
+    for name in INDEXES:
+        op.execute(f"ALTER INDEX {name} RENAME TO {name}_partitioned")
+    op.execute(
+        "CREATE TABLE item ("
+        "id integer NOT NULL DEFAULT nextval('item_id_seq'::regclass), "
+        "title varchar NOT NULL, "
+        "description text, "
+        "owner_id integer NOT NULL, "
+        "created_at timestamp without time zone, "
+        "updated_at timestamp without time zone, "
+        "CONSTRAINT item_pkey PRIMARY KEY (id), "
+        "CONSTRAINT item_owner_id_fkey FOREIGN KEY (owner_id) "
+        "REFERENCES \"user\" (id) ON DELETE CASCADE)"
+    )
+    op.execute(
+        "INSERT INTO item (id, title, description, owner_id, created_at, updated_at) "
+        "SELECT id, title, description, owner_id, created_at, updated_at FROM item_partitioned"
+    )
+    op.execute("ALTER SEQUENCE item_id_seq OWNED BY item.id")
+    op.execute("DROP TABLE item_partitioned")
+    for name, columns in INDEXES.items():
+        op.execute(f"CREATE INDEX {name} ON item {columns}")
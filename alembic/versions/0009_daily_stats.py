@@ -0,0 +1,55 @@
+"""daily stats rollup for admin analytics
+
+Revision ID: 0009_daily_stats
+Revises: 0008_item_partitioning
+Create Date: 2026-10-19 11:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_daily_stats'
+down_revision = '0008_item_partitioning'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'dailystats',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('items_created', sa.BigInteger(), nullable=False),
+        sa.Column('active_users', sa.Integer(), nullable=False),
+        sa.Column('users_created', sa.Integer(), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('day'),
+    )
+    # Calcul initial sur tout l'historique ; ensuite, seuls les derniers
+    # jours sont recalculés (services/stats.py)
+    op.execute(
+        "INSERT INTO dailystats (day, items_created, active_users, users_created, refreshed_at) "
+        "SELECT created_at::date, count(*), count(DISTINCT owner_id), 0, now() at time zone 'utc' "
+        "FROM item GROUP BY created_at::date"
+    )
+    op.execute(
+        "INSERT INTO dailystats (day, items_created, active_users, users_created, refreshed_at) "
+        "SELECT created_at::date, 0, 0, count(*), now() at time zone 'utc' "
+        "FROM \"user\" WHERE created_at IS NOT NULL GROUP BY created_at::date "
+        "ON CONFLICT (day) DO UPDATE SET users_created = excluded.users_created"
+    )
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_created_at ON \"user\" (created_at)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_itemcounter_count ON itemcounter (count)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_itemcounter_count")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_user_created_at")
+    op.drop_table('dailystats')
@@ -0,0 +1,41 @@
+"""archive table for old items
+
+Revision ID: 0010_item_archive
+Revises: 0009_daily_stats
+Create Date: 2026-10-19 11:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010_item_archive'
+down_revision = '0009_daily_stats'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'itemarchive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['owner_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_itemarchive_owner_created_at_id', 'itemarchive', ['owner_id', 'created_at', 'id']
+    )
+    op.create_index('ix_itemarchive_created_at_id', 'itemarchive', ['created_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_itemarchive_created_at_id', table_name='itemarchive')
+    op.drop_index('ix_itemarchive_owner_created_at_id', table_name='itemarchive')
+    op.drop_table('itemarchive')
@@ -0,0 +1,37 @@
+"""version columns for optimistic concurrency on item and user
+
+Revision ID: 0011_row_versions
+Revises: 0010_item_archive
+Create Date: 2026-10-19 11:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.online import with_lock_retries
+
+
+# revision identifiers, used by Alembic.
+revision = '0011_row_versions'
+down_revision = '0010_item_archive'
+branch_labels = None
+depends_on = None
+
+# Valeur par défaut constante : ajout sans réécriture de la table
+TABLES = ['item', 'itemarchive', 'user']
+
+
+def upgrade() -> None:
+    # Un seul essai pour les trois tables : après un abandon, aucun verrou
+    # n'est gardé pendant la pause
+    with_lock_retries(
+        *[
+            f'ALTER TABLE "{table}" ADD COLUMN version INTEGER DEFAULT 1 NOT NULL'
+            for table in TABLES
+        ]
+    )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.drop_column(table, 'version')
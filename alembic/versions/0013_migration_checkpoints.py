@@ -0,0 +1,30 @@
+"""checkpoints of batched online backfills
+
+Revision ID: 0013_migration_checkpoints
+Revises: 0012_idempotency_keys
+Create Date: 2026-10-19 12:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0013_migration_checkpoints'
+down_revision = '0012_idempotency_keys'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'migrationcheckpoint',
+        sa.Column('name', sa.String(length=200), nullable=False),
+        sa.Column('last_id', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('migrationcheckpoint')
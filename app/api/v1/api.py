@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, items, users
+from app.api.v1.endpoints import auth, items, jobs, stats, users
 
 api_router = APIRouter()
 
@@ -11,4 +11,10 @@ api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 
 # Routes pour les items
-api_router.include_router(items.router, prefix="/items", tags=["items"]) 
\ No newline at end of file
+api_router.include_router(items.router, prefix="/items", tags=["items"]) 
+
+# Statistiques d'administration
+api_router.include_router(stats.router, prefix="/stats", tags=["stats"])
+
+# Routes pour le suivi des tâches de fond
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
@@ -1,16 +1,14 @@
-from typing import Generator
+import hmac
+from typing import Dict, Generator
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.core.security import verify_password
-from app.db.session import get_db
+from app.core.tokens import InvalidTokenError, decode_access_token
+from app.db.session import get_db, release
 from app.models.user import User
-from app.schemas.token import TokenPayload
 from app.services import user as user_service
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
@@ -20,16 +18,16 @@ def get_current_user(
     db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
 ) -> User:
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
-    except (JWTError, ValidationError):
+        token_data = decode_access_token(token)
+    except InvalidTokenError:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Impossible de valider les informations d'identification",
         )
     user = user_service.get_by_id(db, user_id=token_data.sub)
+    # L'utilisateur est chargé : inutile de garder la connexion pendant
+    # la suite de la requête (les endpoints en reprennent une au besoin)
+    release(db)
     if not user:
         raise HTTPException(status_code=404, detail="Utilisateur introuvable")
     return user
@@ -50,4 +48,25 @@ def get_current_superuser(
         raise HTTPException(
             status_code=400, detail="L'utilisateur n'a pas les privilèges nécessaires"
         )
-    return current_user 
\ No newline at end of file
+    return current_user
+
+
+def require_metrics_access(
+    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+) -> None:
+    """
+    Accès aux métriques : jeton METRICS_TOKEN d'un collecteur, sinon
+    jeton d'un superutilisateur.
+    """
+    if settings.METRICS_TOKEN and hmac.compare_digest(
+        token.encode(), settings.METRICS_TOKEN.encode()
+    ):
+        return
+    get_current_superuser(get_current_user(db, token))
+
+
+def total_count_headers(total: int, approximate: bool) -> Dict[str, str]:
+    return {
+        "X-Total-Count": str(total),
+        "X-Total-Count-Approximate": "true" if approximate else "false",
+    }
@@ -1,30 +1,54 @@
+import math
 from datetime import timedelta
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.api.v1.deps import get_current_user
+from app.api.v1.negotiation import MsgPackRoute
 from app.core.config import settings
 from app.core.security import create_access_token
+from app.core.throttle import login_throttle
 from app.db.session import get_db
 from app.models.user import User
 from app.schemas.token import Token
 from app.services import user as user_service
 
-router = APIRouter()
+router = APIRouter(route_class=MsgPackRoute)
 
 
 @router.post("/login", response_model=Token)
 async def login_access_token(
-    db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    form_data: OAuth2PasswordRequestForm = Depends(),
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = user_service.authenticate(
-        db, email=form_data.username, password=form_data.password
+    # Limitation par IP et par compte, avant tout calcul bcrypt
+    # Derrière un proxy, l'adresse du client n'est connue que si le proxy est
+    # déclaré de confiance (WEB_FORWARDED_ALLOW_IPS)
+    client_ip = request.client.host if request.client else "unknown"
+    retry_after = login_throttle.check(client_ip, form_data.username)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Trop de tentatives de connexion, réessayez plus tard",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+    # bcrypt hors de la boucle d'événements : un hachage bloquerait toutes
+    # les requêtes du worker pendant sa durée
+    user = await run_in_threadpool(
+        user_service.authenticate,
+        db,
+        email=form_data.username,
+        password=form_data.password,
+        defer=background_tasks.add_task,
     )
     if not user:
         raise HTTPException(
@@ -36,6 +60,7 @@ async def login_access_token(
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Utilisateur inactif"
         )
+    login_throttle.succeeded(client_ip, form_data.username)
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return {
         "access_token": create_access_token(
@@ -1,45 +1,204 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 
-from app.api.v1.deps import get_current_active_user, get_db
+from app.api.v1.deps import get_current_active_user, get_db, total_count_headers
+from app.api.v1.idempotency import idempotent
+from app.api.v1.negotiation import MsgPackRoute
+from app.core.changefeed import event_stream, feed
+from app.db.session import release
+from app.core.config import settings
+from app.core.singleflight import auth_scope, single_flight
 from app.models.user import User
-from app.schemas.item import Item, ItemCreate, ItemUpdate
+from app.schemas.item import Item, ItemCreate, ItemListParams, ItemUpdate
 from app.services import item as item_service
 
-router = APIRouter()
+router = APIRouter(route_class=MsgPackRoute)
+
+item_list_adapter = TypeAdapter(List[Item])
+
+
+def _list_items(
+    db: Session,
+    current_user: User,
+    filters: ItemListParams,
+    skip: int,
+    limit: int,
+    include_archived: bool = False,
+) -> Any:
+    # Si l'utilisateur est admin, retourner tous les items,
+    # sinon uniquement les items de l'utilisateur connecté
+    owner_id = None if current_user.is_superuser else current_user.id
+    return item_service.list_items(
+        db,
+        owner_id=owner_id,
+        params=filters,
+        skip=skip,
+        limit=limit,
+        include_archived=include_archived,
+    )
+
+
+def _get_owned_item(
+    db: Session, item_id: int, current_user: User, include_archived: bool = False
+) -> Any:
+    item = item_service.get_by_id(db, item_id=item_id)
+    if not item and include_archived:
+        item = item_service.get_archived_by_id(db, item_id=item_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Item non trouvé")
+    # Vérifier que l'utilisateur est le propriétaire ou un admin
+    if not current_user.is_superuser and (item.owner_id != current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Accès non autorisé"
+        )
+    return item
 
 
 @router.get("/", response_model=List[Item])
 async def read_items(
+    response: Response,
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    filters: ItemListParams = Depends(),
+    with_total: bool = False,
+    include_archived: bool = False,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Récupérer tous les items.
+    Filtres : created_after/created_before, updated_since ou title_prefix
+    (une seule colonne à la fois) ; tri : created_at, updated_at ou title,
+    préfixé par « - » pour un ordre décroissant.
+    Avec with_total=true, le total est renvoyé dans l'en-tête X-Total-Count.
+    Avec include_archived=true, les items archivés sont inclus (plus lent).
+    """
+    try:
+        item_service.plan_listing(filters)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    headers = {}
+    if with_total:
+        owner_id = None if current_user.is_superuser else current_user.id
+        total, approximate = item_service.count_items(
+            db, owner_id=owner_id, params=filters, include_archived=include_archived
+        )
+        headers = total_count_headers(total, approximate)
+        response.headers.update(headers)
+    if settings.SINGLE_FLIGHT_ENABLED:
+        body = await single_flight.do(
+            (
+                "items.read_items",
+                skip,
+                limit,
+                filters.model_dump_json(),
+                include_archived,
+                auth_scope(current_user),
+            ),
+            lambda: item_list_adapter.dump_json(
+                _list_items(db, current_user, filters, skip, limit, include_archived)
+            ),
+        )
+        release(db)
+        return Response(content=body, media_type="application/json", headers=headers)
+    items = _list_items(db, current_user, filters, skip, limit, include_archived)
+    release(db)
+    return items
+
+
+@router.get("/search", response_model=List[Item])
+async def search_items(
+    response: Response,
+    db: Session = Depends(get_db),
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Rechercher des items par titre et description.
+    Les résultats sont classés par pertinence ; la page suivante s'obtient
+    en repassant l'en-tête X-Next-Cursor dans le paramètre cursor.
+    """
+    try:
+        after = item_service.decode_search_cursor(cursor) if cursor else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    # Même portée que read_items : un admin voit tout
+    owner_id = None if current_user.is_superuser else current_user.id
+    results = item_service.search(
+        db, q=q, owner_id=owner_id, limit=limit, cursor=after
+    )
+    release(db)
+    if len(results) == limit:
+        last_item, last_rank = results[-1]
+        response.headers["X-Next-Cursor"] = item_service.encode_search_cursor(
+            last_rank, last_item.id
+        )
+    return [item for item, _ in results]
+
+
+@router.get("/stream")
+async def stream_items(
+    last_event_id: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
     """
-    # Si l'utilisateur est admin, retourner tous les items
-    if current_user.is_superuser:
-        return item_service.get_items(db, skip=skip, limit=limit)
-    # Sinon, retourner uniquement les items de l'utilisateur connecté
-    return item_service.get_by_owner(db, owner_id=current_user.id, skip=skip, limit=limit)
+    Flux Server-Sent Events des créations, modifications et suppressions
+    d'items visibles par l'utilisateur. Après une coupure, le navigateur
+    renvoie Last-Event-ID et reçoit les événements manqués ; un événement
+    « reset » indique qu'ils ne sont plus disponibles et qu'il faut recharger
+    la liste. Les items archivés arrivent comme des suppressions ; ceux
+    supprimés en masse (avec leur propriétaire, par la rétention des
+    partitions) donnent un « reset » au lieu d'un événement par item.
+    """
+    owner_id = None if current_user.is_superuser else current_user.id
+    subscription, replay = feed.subscribe(last_event_id)
+    return StreamingResponse(
+        event_stream(
+            subscription, replay, owner_id, settings.ITEM_STREAM_HEARTBEAT_SECONDS
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.post("/", response_model=Item)
 async def create_item(
     *,
+    request: Request,
     db: Session = Depends(get_db),
     item_in: ItemCreate,
+    idempotency_key: Optional[str] = Header(None),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Créer un nouvel item.
+    Avec l'en-tête Idempotency-Key, une nouvelle tentative de la même
+    requête ne crée pas de second item et reçoit la réponse initiale.
     """
-    item = item_service.create_item(db, item_in=item_in, owner_id=current_user.id)
-    return item
+
+    async def create() -> Any:
+        if settings.ITEM_WRITE_BATCH_ENABLED:
+            return await item_service.create_item_batched(
+                db, item_in=item_in, owner_id=current_user.id
+            )
+        item = item_service.create_item(db, item_in=item_in, owner_id=current_user.id)
+        release(db)
+        return item
+
+    if idempotency_key is not None:
+
+        async def handler() -> bytes:
+            return Item.model_validate(await create()).model_dump_json().encode()
+
+        return await idempotent(request, db, idempotency_key, f"user:{current_user.id}", handler)
+    return await create()
 
 
 @router.get("/{item_id}", response_model=Item)
@@ -50,16 +209,19 @@ async def read_item(
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
-    Récupérer un item par son ID.
+    Récupérer un item par son ID, y compris s'il a été archivé.
     """
-    item = item_service.get_by_id(db, item_id=item_id)
-    if not item:
-        raise HTTPException(status_code=404, detail="Item non trouvé")
-    # Vérifier que l'utilisateur est le propriétaire ou un admin
-    if not current_user.is_superuser and (item.owner_id != current_user.id):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="Accès non autorisé"
+    if settings.SINGLE_FLIGHT_ENABLED:
+        body = await single_flight.do(
+            ("items.read_item", item_id, auth_scope(current_user)),
+            lambda: Item.model_validate(
+                _get_owned_item(db, item_id, current_user, include_archived=True)
+            ).model_dump_json(),
         )
+        release(db)
+        return Response(content=body, media_type="application/json")
+    item = _get_owned_item(db, item_id, current_user, include_archived=True)
+    release(db)
     return item
 
 
@@ -73,16 +235,18 @@ async def update_item(
 ) -> Any:
     """
     Mettre à jour un item.
+    Avec version, la mise à jour n'est appliquée que si l'item n'a pas
+    changé depuis (409 sinon : relire l'item puis réessayer).
     """
-    item = item_service.get_by_id(db, item_id=item_id)
-    if not item:
-        raise HTTPException(status_code=404, detail="Item non trouvé")
-    # Vérifier que l'utilisateur est le propriétaire ou un admin
-    if not current_user.is_superuser and (item.owner_id != current_user.id):
+    item = _get_owned_item(db, item_id, current_user)
+    try:
+        item = item_service.update_item(db, db_item=item, item_in=item_in)
+    except StaleDataError:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="Accès non autorisé"
+            status_code=status.HTTP_409_CONFLICT,
+            detail="L'item a été modifié entre-temps",
         )
-    item = item_service.update_item(db, db_item=item, item_in=item_in)
+    release(db)
     return item
 
 
@@ -96,13 +260,6 @@ async def delete_item(
     """
     Supprimer un item.
     """
-    item = item_service.get_by_id(db, item_id=item_id)
-    if not item:
-        raise HTTPException(status_code=404, detail="Item non trouvé")
-    # Vérifier que l'utilisateur est le propriétaire ou un admin
-    if not current_user.is_superuser and (item.owner_id != current_user.id):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="Accès non autorisé"
-        )
+    _get_owned_item(db, item_id, current_user)
     result = item_service.delete_item(db, item_id=item_id)
-    return {"success": result} 
\ No newline at end of file
+    return {"success": result}
@@ -0,0 +1,33 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.api.v1.deps import get_current_active_user, get_db
+from app.api.v1.negotiation import MsgPackRoute
+from app.db.session import release
+from app.models.user import User
+from app.schemas.job import Job
+from app.services import job as job_service
+
+router = APIRouter(route_class=MsgPackRoute)
+
+
+@router.get("/{job_id}", response_model=Job)
+async def read_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Suivre une tâche de fond : état, tentatives, avancement et résultat.
+    """
+    job = job_service.get_by_id(db, job_id=job_id)
+    release(db)
+    if not job:
+        raise HTTPException(status_code=404, detail="Tâche introuvable")
+    if not current_user.is_superuser and job.created_by != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Accès non autorisé"
+        )
+    return job
@@ -0,0 +1,52 @@
+from datetime import datetime
+from typing import Any
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.api.v1.deps import get_current_superuser, get_db
+from app.api.v1.negotiation import MsgPackRoute
+from app.core.config import settings
+from app.db.session import release
+from app.models.user import User
+from app.schemas.stats import DailyStatsReport, OwnerStats, OwnerStatsReport
+from app.services import stats as stats_service
+
+router = APIRouter(route_class=MsgPackRoute)
+
+
+@router.get("/daily", response_model=DailyStatsReport)
+async def read_daily_stats(
+    days: int = Query(30, ge=1, le=settings.STATS_MAX_DAYS),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_superuser),
+) -> Any:
+    """
+    Items créés, utilisateurs actifs et inscriptions par jour (UTC), lus dans
+    les agrégats précalculés. refreshed_at indique leur dernier recalcul.
+    """
+    buckets = stats_service.get_daily_stats(db, days=days)
+    refreshed_at = stats_service.last_refresh(db)
+    release(db)
+    return DailyStatsReport(refreshed_at=refreshed_at, buckets=buckets)
+
+
+@router.get("/owners", response_model=OwnerStatsReport)
+async def read_owner_stats(
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_superuser),
+) -> Any:
+    """
+    Utilisateurs ayant le plus d'items.
+    """
+    as_of = datetime.utcnow()
+    owners = stats_service.top_owners(db, limit=limit)
+    release(db)
+    return OwnerStatsReport(
+        as_of=as_of,
+        owners=[
+            OwnerStats(owner_id=owner_id, email=email, items=count)
+            for owner_id, email, count in owners
+        ],
+    )
@@ -1,51 +1,132 @@
-from typing import Any, List
+import time
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
-
-from app.api.v1.deps import get_current_active_user, get_current_superuser, get_db
+from sqlalchemy.orm.exc import StaleDataError
+from starlette.concurrency import run_in_threadpool
+
+from app.api.v1.deps import (
+    get_current_active_user,
+    get_current_superuser,
+    get_db,
+    total_count_headers,
+)
+from app.api.v1.idempotency import idempotent
+from app.api.v1.negotiation import MsgPackRoute
+from app.core.config import settings
+from app.db.session import release
 from app.models.user import User
 from app.schemas.user import User as UserSchema
-from app.schemas.user import UserCreate, UserUpdate
+from app.schemas.user import UserBulkCreate, UserBulkReport, UserCreate, UserUpdate
+from app.services import item as item_service
 from app.services import user as user_service
+from app.services import user_deletion
+
+USER_CONFLICT = HTTPException(
+    status_code=status.HTTP_409_CONFLICT,
+    detail="L'utilisateur a été modifié entre-temps",
+)
 
-router = APIRouter()
+router = APIRouter(route_class=MsgPackRoute)
 
 
 @router.get("/", response_model=List[UserSchema])
 async def read_users(
+    response: Response,
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    with_total: bool = False,
     current_user: User = Depends(get_current_superuser),
 ) -> Any:
     """
     Récupérer tous les utilisateurs.
     Nécessite des privilèges admin.
+    Avec with_total=true, le total (estimé) est renvoyé dans X-Total-Count.
     """
+    if with_total:
+        total, approximate = user_service.count_users(db)
+        response.headers.update(total_count_headers(total, approximate))
     users = user_service.get_users(db, skip=skip, limit=limit)
+    release(db)
     return users
 
 
 @router.post("/", response_model=UserSchema)
 async def create_user(
     *,
+    request: Request,
     db: Session = Depends(get_db),
     user_in: UserCreate,
+    idempotency_key: Optional[str] = Header(None),
     current_user: User = Depends(get_current_superuser),
 ) -> Any:
     """
     Créer un nouvel utilisateur.
     Nécessite des privilèges admin.
+    Avec l'en-tête Idempotency-Key, une nouvelle tentative reçoit la réponse initiale.
+    """
+
+    def create() -> User:
+        user = user_service.get_by_email(db, email=user_in.email)
+        if user:
+            raise HTTPException(
+                status_code=400,
+                detail="Un utilisateur avec cet email existe déjà",
+            )
+        return user_service.create_user(db, user_in=user_in)
+
+    if idempotency_key is not None:
+
+        async def handler() -> bytes:
+            user = await run_in_threadpool(create)
+            return UserSchema.model_validate(user).model_dump_json().encode()
+
+        return await idempotent(request, db, idempotency_key, f"user:{current_user.id}", handler)
+    # Hachage bcrypt hors de la boucle d'événements
+    user = await run_in_threadpool(create)
+    release(db)
+    return user
+
+
+@router.post("/bulk", response_model=UserBulkReport)
+async def create_users_bulk(
+    *,
+    request: Request,
+    db: Session = Depends(get_db),
+    bulk_in: UserBulkCreate,
+    idempotency_key: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_superuser),
+) -> Any:
+    """
+    Créer plusieurs utilisateurs (au plus USER_BULK_MAX_USERS par requête).
+    Nécessite des privilèges admin.
+    Un email déjà pris n'est pas une erreur : le résultat de chaque entrée
+    est renvoyé, avec le débit obtenu.
+    Avec l'en-tête Idempotency-Key, une nouvelle tentative reçoit la réponse initiale.
     """
-    user = user_service.get_by_email(db, email=user_in.email)
-    if user:
+    if len(bulk_in.users) > settings.USER_BULK_MAX_USERS:
         raise HTTPException(
-            status_code=400,
-            detail="Un utilisateur avec cet email existe déjà",
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Au plus {settings.USER_BULK_MAX_USERS} utilisateurs par requête",
         )
-    user = user_service.create_user(db, user_in=user_in)
-    return user
+
+    async def create() -> UserBulkReport:
+        started = time.perf_counter()
+        # Hachage et INSERT hors de la boucle d'événements
+        results = await run_in_threadpool(user_service.create_users, db, bulk_in.users)
+        return user_service.bulk_report(results, time.perf_counter() - started)
+
+    if idempotency_key is not None:
+
+        async def handler() -> bytes:
+            return (await create()).model_dump_json().encode()
+
+        return await idempotent(request, db, idempotency_key, f"user:{current_user.id}", handler)
+    report = await create()
+    release(db)
+    return report
 
 
 @router.get("/me", response_model=UserSchema)
@@ -67,8 +148,15 @@ async def update_user_me(
 ) -> Any:
     """
     Mettre à jour l'utilisateur courant.
+    Avec version, 409 si l'utilisateur a changé depuis.
     """
-    user = user_service.update_user(db, db_user=current_user, user_in=user_in)
+    try:
+        user = await run_in_threadpool(
+            user_service.update_user, db, db_user=current_user, user_in=user_in
+        )
+    except StaleDataError:
+        raise USER_CONFLICT
+    release(db)
     return user
 
 
@@ -82,13 +170,20 @@ async def read_user_by_id(
     Récupérer un utilisateur par son ID.
     """
     user = user_service.get_by_id(db, user_id=user_id)
-    if user == current_user:
+    release(db)
+    # current_user vient d'une autre transaction : comparer les identifiants
+    if user and user.id == current_user.id:
         return user
     if not current_user.is_superuser:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Droits insuffisants",
         )
+    if not user:
+        raise HTTPException(
+            status_code=404,
+            detail="Utilisateur non trouvé",
+        )
     return user
 
 
@@ -103,6 +198,7 @@ async def update_user(
     """
     Mettre à jour un utilisateur.
     Nécessite des privilèges admin.
+    Avec version, 409 si l'utilisateur a changé depuis.
     """
     user = user_service.get_by_id(db, user_id=user_id)
     if not user:
@@ -110,7 +206,11 @@ async def update_user(
             status_code=404,
             detail="Utilisateur non trouvé",
         )
-    user = user_service.update_user(db, db_user=user, user_in=user_in)
+    try:
+        user = await run_in_threadpool(user_service.update_user, db, db_user=user, user_in=user_in)
+    except StaleDataError:
+        raise USER_CONFLICT
+    release(db)
     return user
 
 
@@ -119,11 +219,14 @@ async def delete_user(
     *,
     db: Session = Depends(get_db),
     user_id: int,
+    response: Response,
     current_user: User = Depends(get_current_superuser),
 ) -> Any:
     """
     Supprimer un utilisateur.
     Nécessite des privilèges admin.
+    Les comptes volumineux sont supprimés par lots par une tâche de fond :
+    la réponse est alors 202 et l'avancement se suit via GET /jobs/{job_id}.
     """
     user = user_service.get_by_id(db, user_id=user_id)
     if not user:
@@ -131,5 +234,14 @@ async def delete_user(
             status_code=404,
             detail="Utilisateur non trouvé",
         )
+    item_count = item_service.count_by_owner(db, owner_id=user_id)
+    if item_count > settings.USER_DELETE_ASYNC_THRESHOLD:
+        job = user_deletion.enqueue(
+            db, user, total_items=item_count, created_by=current_user.id
+        )
+        release(db)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return {"success": True, "job_id": job.id}
     result = user_service.delete_user(db, user_id=user_id)
-    return {"success": result} 
\ No newline at end of file
+    return {"success": result}
+
@@ -0,0 +1,62 @@
+from typing import Awaitable, Callable
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import release
+from app.services import idempotency as idempotency_service
+
+
+async def idempotent(
+    request: Request,
+    db: Session,
+    key: str,
+    scope: str,
+    handler: Callable[[], Awaitable[bytes]],
+) -> Response:
+    """
+    Exécute `handler` (qui retourne le corps JSON de la réponse) au plus une
+    fois par (scope, Idempotency-Key) : une nouvelle tentative reçoit la
+    réponse enregistrée, avec l'en-tête Idempotent-Replayed.
+    """
+    if not key or len(key) > settings.IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(status_code=400, detail="En-tête Idempotency-Key invalide")
+    request_fingerprint = idempotency_service.fingerprint(
+        request.method, request.url.path, await request.body()
+    )
+    try:
+        stored = idempotency_service.begin(db, scope, key, request_fingerprint)
+    except idempotency_service.IdempotencyMismatch:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key déjà utilisée pour une autre requête",
+        )
+    except idempotency_service.IdempotencyInProgress:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Requête en cours de traitement avec cette Idempotency-Key",
+            headers={"Retry-After": "1"},
+        )
+    if stored is not None:
+        release(db)
+        return Response(
+            content=stored.response_body,
+            status_code=stored.response_status,
+            media_type="application/json",
+            headers={"Idempotent-Replayed": "true"},
+        )
+    try:
+        body = await handler()
+    except (HTTPException, RequestValidationError, ValidationError):
+        # Requête refusée avant toute écriture : une nouvelle tentative sera exécutée
+        idempotency_service.abandon(db, scope, key)
+        raise
+    # Tout autre échec (annulation à l'échéance, erreur au commit...) laisse un
+    # résultat inconnu : l'écriture a pu être faite (écritures groupées), la clé
+    # reste donc « en cours » jusqu'à IDEMPOTENCY_LOCK_SECONDS
+    idempotency_service.finish(db, scope, key, status.HTTP_200_OK, body)
+    release(db)
+    return Response(content=body, media_type="application/json")
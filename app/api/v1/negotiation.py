@@ -0,0 +1,168 @@
+import json
+from datetime import datetime
+from typing import Any, Callable, Coroutine, List, Optional
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+from pydantic_core import to_jsonable_python
+
+try:
+    # Dépendance optionnelle : pip install msgpack
+    import msgpack
+except ImportError:  # pragma: no cover - JSON seulement
+    msgpack = None
+
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+_EPOCH = datetime(1970, 1, 1)
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """
+    Vrai si l'en-tête Accept préfère MessagePack à JSON (poids q compris) ;
+    */* seul reste servi en JSON.
+    """
+    if not accept or msgpack is None:
+        return False
+    weights = {}
+    for media_range in accept.split(","):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[media_type.lower()] = weight
+    packed = max(weights.get(media_type, 0.0) for media_type in MSGPACK_TYPES)
+    return packed > 0 and packed >= weights.get("application/json", 0.0)
+
+
+def _default(value: Any) -> Any:
+    # Dates naïves de la base (UTC) : Timestamp calculé directement, environ
+    # deux fois moins coûteux que Timestamp.from_datetime
+    if isinstance(value, datetime):
+        delta = value - _EPOCH
+        return msgpack.Timestamp(delta.days * 86400 + delta.seconds, delta.microseconds * 1000)
+    return to_jsonable_python(value)
+
+
+def packb(content: Any) -> memoryview:
+    """
+    Encode `content` et retourne une vue sur le tampon du Packer, sans la
+    copie en bytes que ferait msgpack.packb.
+    """
+    # datetime=True : les dates avec fuseau sont encodées sans passer par _default
+    packer = msgpack.Packer(autoreset=False, datetime=True, default=_default)
+    packer.pack(content)
+    return packer.getbuffer()
+
+
+def unpackb(body: bytes) -> Any:
+    # Timestamp décodés en datetime UTC
+    return msgpack.unpackb(body, timestamp=3)
+
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK
+
+    def render(self, content: Any) -> memoryview:
+        return packb(content)
+
+
+class MsgPackRequest(Request):
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = unpackb(await self.body())
+        return self._json
+
+
+class _NativeField:
+    # Champ de réponse sérialisé en objets Python : datetime reste datetime
+    def __init__(self, field: Any) -> None:
+        self._field = field
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._field, name)
+
+    def serialize(self, value: Any, *, mode: str = "json", **kwargs: Any) -> Any:
+        return self._field.serialize(value, mode="python", **kwargs)
+
+
+class MsgPackRoute(APIRoute):
+    """
+    Route qui négocie MessagePack : corps de requête en Content-Type
+    application/msgpack, réponse en MessagePack si l'en-tête Accept le
+    préfère, JSON sinon. Les erreurs restent en JSON.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        json_handler = super().get_route_handler()
+        response_class, response_field = self.response_class, self.secure_cloned_response_field
+        self.response_class = MsgPackResponse
+        if response_field is not None:
+            self.secure_cloned_response_field = _NativeField(response_field)
+        try:
+            msgpack_handler = super().get_route_handler()
+        finally:
+            self.response_class, self.secure_cloned_response_field = (
+                response_class,
+                response_field,
+            )
+        adapter = TypeAdapter(self.response_model) if self.response_model else None
+
+        async def handler(request: Request) -> Response:
+            content_type = request.headers.get("content-type", "").split(";")[0].strip()
+            if content_type.lower() in MSGPACK_TYPES:
+                if msgpack is None:
+                    raise HTTPException(
+                        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                        detail="MessagePack non disponible sur ce serveur",
+                    )
+                request = MsgPackRequest(_as_json_body(request.scope), request.receive)
+            if not wants_msgpack(request.headers.get("accept")):
+                response = await json_handler(request)
+            else:
+                response = await msgpack_handler(request)
+                if response.media_type == "application/json" and getattr(response, "body", b""):
+                    # Corps JSON déjà prêt (cache single-flight, réponse rejouée)
+                    response = _transcode(response, adapter)
+            _vary_accept(response)
+            return response
+
+        return handler
+
+
+def _as_json_body(scope: dict) -> dict:
+    # FastAPI ne lit le corps via Request.json() que pour un Content-Type JSON
+    headers: List[tuple] = [
+        (name, value) for name, value in scope["headers"] if name != b"content-type"
+    ]
+    headers.append((b"content-type", b"application/json"))
+    return {**scope, "headers": headers}
+
+
+def _transcode(response: Response, adapter: Optional[TypeAdapter]) -> Response:
+    body = bytes(response.body)
+    if adapter is not None and 200 <= response.status_code < 300:
+        # Revalidé pour retrouver les types natifs (datetime) du modèle de réponse
+        content = adapter.dump_python(adapter.validate_json(body))
+    else:
+        content = json.loads(body)
+    headers = {
+        name: value
+        for name, value in response.headers.items()
+        if name not in ("content-length", "content-type")
+    }
+    return MsgPackResponse(content, status_code=response.status_code, headers=headers)
+
+
+def _vary_accept(response: Response) -> None:
+    vary = response.headers.get("vary")
+    if not vary:
+        response.headers["Vary"] = "Accept"
+    elif "accept" not in [value.strip().lower() for value in vary.split(",")]:
+        response.headers["Vary"] = f"{vary}, Accept"
@@ -0,0 +1,75 @@
+import asyncio
+from typing import Any, Callable, Dict, Generic, List, Set, Tuple, TypeVar, Union
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.metrics import metrics
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class GroupCommit(Generic[T, R]):
+    """
+    Regroupe les écritures soumises pendant une courte fenêtre (ou jusqu'à
+    `max_size`) et les confie ensemble à `flush(key, entries)`, exécutée dans
+    le pool de threads. `flush` retourne un résultat par entrée, dans l'ordre :
+    une valeur, ou l'exception destinée à l'appelant correspondant.
+
+    Les lots sont séparés par `key` (par exemple le moteur de la base).
+    Propre à chaque worker et à sa boucle d'événements.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flush: Callable[[Any, List[T]], List[Union[R, BaseException]]],
+        max_delay: float,
+        max_size: int,
+    ) -> None:
+        self.name = name
+        self.flush = flush
+        self.max_delay = max_delay
+        self.max_size = max_size
+        self._pending: Dict[Any, List[Tuple[T, "asyncio.Future[R]"]]] = {}
+        self._timers: Dict[Any, asyncio.TimerHandle] = {}
+        self._flushing: Set["asyncio.Task[None]"] = set()
+
+    async def submit(self, key: Any, entry: T) -> R:
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[R]" = loop.create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((entry, future))
+        if len(batch) >= self.max_size:
+            self._start_flush(key)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(self.max_delay, self._start_flush, key)
+        return await future
+
+    def _start_flush(self, key: Any) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._flush(key, batch))
+        # Garder une référence : la tâche ne doit pas être collectée en cours
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def _flush(self, key: Any, batch: List[Tuple[T, "asyncio.Future[R]"]]) -> None:
+        metrics.inc("group_commit_flushes", self.name)
+        metrics.inc("group_commit_entries", self.name, len(batch))
+        try:
+            results = await run_in_threadpool(self.flush, key, [entry for entry, _ in batch])
+        except Exception as exc:
+            results = [exc] * len(batch)
+        for (_, future), result in zip(batch, results):
+            # Appelant parti (échéance dépassée...) : l'écriture est faite quand même
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
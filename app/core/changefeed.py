@@ -0,0 +1,280 @@
+import asyncio
+import itertools
+import json
+import logging
+import select
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Un événement : {"id": ..., "op": "create" | "update" | "delete", ...} ; "reset"
+# (propriétaire facultatif) quand des items disparaissent en masse
+Event = Dict[str, Any]
+
+# Clé de Session.info où sont gardés les événements à publier localement au commit
+_PENDING = "changefeed_pending"
+
+
+class Subscription:
+    """
+    File d'un abonné, alimentée depuis n'importe quel thread. Si l'abonné ne
+    suit pas (file pleine), il est marqué en retard : le flux se termine et le
+    client reprend depuis son dernier Last-Event-ID.
+    """
+
+    def __init__(self, source: "ChangeFeed", loop: asyncio.AbstractEventLoop, maxsize: int) -> None:
+        self.source = source
+        self.loop = loop
+        self.queue: "asyncio.Queue[Event]" = asyncio.Queue(maxsize)
+        self.lagged = False
+
+    def _push(self, item: Event) -> None:
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.lagged = True
+            metrics.inc("changefeed_lagged")
+
+    def push(self, item: Event) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self._push, item)
+        except RuntimeError:
+            # Boucle déjà fermée : l'abonné est en cours de désinscription
+            pass
+
+    def close(self) -> None:
+        self.source.unsubscribe(self)
+
+
+class ChangeFeed:
+    """
+    Diffusion en mémoire des événements reçus par le worker vers tous ses
+    abonnés, avec un tampon circulaire des derniers événements pour la
+    reprise (Last-Event-ID).
+    """
+
+    def __init__(self, buffer_size: int, queue_size: int) -> None:
+        self.queue_size = queue_size
+        self._buffer: Deque[Event] = deque(maxlen=buffer_size)
+        self._subscribers: Set[Subscription] = set()
+        self._lock = threading.Lock()
+        # Identifiants des événements publiés localement (hors PostgreSQL)
+        self._local_ids = itertools.count(1)
+
+    def next_local_id(self) -> int:
+        return next(self._local_ids)
+
+    def publish(self, item: Event) -> None:
+        with self._lock:
+            self._buffer.append(item)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.push(item)
+        metrics.inc("changefeed_events", item.get("op", ""))
+
+    def subscribe(
+        self, last_event_id: Optional[str] = None
+    ) -> Tuple[Subscription, Optional[List[Event]]]:
+        """
+        Abonne l'appelant (boucle d'événements courante). Retourne
+        l'abonnement et les événements à rejouer après `last_event_id`,
+        ou None si cet identifiant n'est plus dans le tampon : le client
+        doit alors recharger son état.
+        """
+        subscription = Subscription(self, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+            replay: Optional[List[Event]] = []
+            if last_event_id is not None:
+                # Les identifiants viennent d'une séquence mais l'ordre de
+                # livraison est celui des commits : chercher la position.
+                ids = [str(item["id"]) for item in self._buffer]
+                if last_event_id in ids:
+                    replay = list(self._buffer)[ids.index(last_event_id) + 1 :]
+                else:
+                    replay = None
+        metrics.set_gauge("changefeed_subscribers", len(self._subscribers))
+        return subscription, replay
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+        metrics.set_gauge("changefeed_subscribers", len(self._subscribers))
+
+    def reset(self) -> None:
+        """
+        Signale aux abonnés que des événements ont pu être perdus
+        (reconnexion de l'écoute) et vide le tampon.
+        """
+        with self._lock:
+            self._buffer.clear()
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.push({"op": "reset"})
+
+
+feed = ChangeFeed(settings.ITEM_STREAM_BUFFER_SIZE, settings.ITEM_STREAM_QUEUE_SIZE)
+
+
+def emit(db: Session, *items: Event) -> None:
+    """
+    Publie des événements à la validation de la transaction de `db`.
+    Sous PostgreSQL, NOTIFY est transactionnel et l'identifiant vient de la
+    séquence item_event_seq, partagée par tous les workers ; ailleurs,
+    les événements sont publiés dans ce worker après le commit.
+    """
+    if not items:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        # Un seul aller-retour, quel que soit le nombre d'événements
+        db.execute(
+            text(
+                "SELECT pg_notify(:channel, jsonb_set(e, '{id}', "
+                "to_jsonb(nextval('item_event_seq')))::text) "
+                "FROM jsonb_array_elements(CAST(:payload AS jsonb)) AS e"
+            ),
+            {"channel": settings.ITEM_EVENTS_CHANNEL, "payload": json.dumps(items)},
+        )
+        return
+    db.info.setdefault(_PENDING, []).extend(items)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session: Session) -> None:
+    for item in session.info.pop(_PENDING, []):
+        feed.publish({"id": feed.next_local_id(), **item})
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING, None)
+
+
+class Listener:
+    """
+    Une seule connexion LISTEN par worker, hors du pool, lue dans un thread ;
+    chaque notification est diffusée à tous les abonnés du worker.
+    """
+
+    def __init__(self, engine: Engine, channel: str, target: ChangeFeed) -> None:
+        self.engine = engine
+        self.channel = channel
+        self.feed = target
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="changefeed", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _connect(self):
+        raw = self.engine.raw_connection()
+        # La connexion ne retournera jamais au pool
+        raw.detach()
+        connection = raw.driver_connection
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        return connection
+
+    def _run(self) -> None:
+        backoff = 1.0
+        first = True
+        while not self._stop.is_set():
+            try:
+                connection = self._connect()
+            except Exception:
+                logger.exception("Connexion d'écoute impossible")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+                continue
+            if not first:
+                # Des notifications ont pu être émises pendant la coupure
+                self.feed.reset()
+            first, backoff = False, 1.0
+            try:
+                while not self._stop.is_set():
+                    if select.select([connection], [], [], 1.0)[0]:
+                        connection.poll()
+                        while connection.notifies:
+                            notify = connection.notifies.pop(0)
+                            self.feed.publish(json.loads(notify.payload))
+            except Exception:
+                logger.exception("Écoute des événements interrompue")
+                time.sleep(backoff)
+            finally:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+
+
+def reset_event(owner_id: Optional[int] = None) -> Event:
+    """
+    Événement « reset » à publier avec emit() quand des items sont supprimés
+    sans être chargés (suppression d'un utilisateur, rétention) : les
+    abonnés concernés rechargent leur liste.
+    """
+    return {"op": "reset"} if owner_id is None else {"op": "reset", "owner_id": owner_id}
+
+
+def format_sse(item: Event) -> str:
+    if item.get("op") == "reset" and "id" not in item:
+        return "event: reset\ndata: {}\n\n"
+    kind = "reset" if item.get("op") == "reset" else "item"
+    return f"id: {item['id']}\nevent: {kind}\ndata: {json.dumps(item)}\n\n"
+
+
+async def event_stream(
+    subscription: Subscription,
+    replay: Optional[List[Event]],
+    owner_id: Optional[int],
+    heartbeat: float,
+):
+    """
+    Flux SSE d'un abonné : rejeu éventuel, puis événements en direct filtrés
+    sur `owner_id` (None : tous), avec un commentaire périodique pour garder
+    la connexion ouverte à travers les proxys.
+    """
+
+    def visible(item: Event) -> bool:
+        if owner_id is None or item.get("owner_id") == owner_id:
+            return True
+        # Reset sans propriétaire : concerne tous les abonnés
+        return item.get("op") == "reset" and item.get("owner_id") is None
+
+    try:
+        yield f"retry: {settings.ITEM_STREAM_RETRY_MS}\n\n"
+        if replay is None:
+            yield format_sse({"op": "reset"})
+        else:
+            for item in replay:
+                if visible(item):
+                    yield format_sse(item)
+        # Un abonné en retard reçoit ce qui est déjà en file, puis le flux se
+        # termine : il reprendra depuis le dernier identifiant reçu
+        while not (subscription.lagged and subscription.queue.empty()):
+            try:
+                item = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if visible(item):
+                yield format_sse(item)
+    finally:
+        subscription.close()
@@ -47,13 +47,149 @@ class Settings(BaseSettings):
             username=values.data.get("POSTGRES_USER"),
             password=values.data.get("POSTGRES_PASSWORD"),
             host=values.data.get("POSTGRES_SERVER"),
-            port=values.data.get("POSTGRES_PORT"),
+            port=int(values.data.get("POSTGRES_PORT")),
             path=f"{values.data.get('POSTGRES_DB') or ''}",
         )
 
+    # Shards supplémentaires des utilisateurs et de leurs items, séparés par des
+    # virgules ; DATABASE_URI est le shard0, qui garde aussi les tables globales
+    # (vide : une seule base)
+    DATABASE_SHARD_URIS: str = os.getenv("DATABASE_SHARD_URIS", "")
+
+    # Pool de connexions, par worker et par base (app.serve les répartit si DB_MAX_CONNECTIONS est fixé)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    # Budget total de connexions du nœud, partagé entre les workers (0 : non borné)
+    DB_MAX_CONNECTIONS: int = int(os.getenv("DB_MAX_CONNECTIONS", "0"))
+    # Connexions ouvertes au démarrage de chaque worker (bornées par DB_POOL_SIZE)
+    DB_WARMUP_CONNECTIONS: int = int(os.getenv("DB_WARMUP_CONNECTIONS", "5"))
+    # Au-delà de cette latence d'aller-retour, /ready répond 503
+    READY_MAX_DB_LATENCY_MS: float = float(os.getenv("READY_MAX_DB_LATENCY_MS", "250"))
+    # Jeton des collecteurs pour GET /metrics (Authorization: Bearer ...) ;
+    # sans lui, seul un superutilisateur y a accès
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")
+
+    # Serveur (python -m app.serve)
+    WEB_WORKERS: int = int(os.getenv("WEB_WORKERS", "0"))  # 0 : selon les CPU disponibles
+    WEB_KEEPALIVE_SECONDS: int = int(os.getenv("WEB_KEEPALIVE_SECONDS", "5"))
+    WEB_BACKLOG: int = int(os.getenv("WEB_BACKLOG", "2048"))
+    WEB_LIMIT_CONCURRENCY: int = int(os.getenv("WEB_LIMIT_CONCURRENCY", "0"))  # 0 : illimité
+    WEB_MAX_REQUESTS: int = int(os.getenv("WEB_MAX_REQUESTS", "0"))  # 0 : pas de recyclage
+    WEB_GRACEFUL_TIMEOUT: int = int(os.getenv("WEB_GRACEFUL_TIMEOUT", "30"))
+    # Redémarrage progressif : attente maximale du démarrage d'un nouveau worker
+    WEB_WORKER_BOOT_SECONDS: float = float(os.getenv("WEB_WORKER_BOOT_SECONDS", "60"))
+    # Proxys inverses de confiance (IP séparées par des virgules, "*" : tous) :
+    # leurs en-têtes X-Forwarded-For / X-Forwarded-Proto donnent l'adresse du
+    # client, utilisée notamment par la limitation des connexions par IP
+    WEB_FORWARDED_ALLOW_IPS: str = os.getenv("WEB_FORWARDED_ALLOW_IPS", "127.0.0.1")
+
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-should-be-at-least-32-characters")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    # Implémentation JWT : "jose", "pyjwt" (si installé) ou "hmac" (HS* uniquement)
+    JWT_BACKEND: str = os.getenv("JWT_BACKEND", "jose")
+    # Nombre de jetons vérifiés gardés en cache (0 pour désactiver)
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+    # Coût bcrypt : fixé par BCRYPT_ROUNDS, sinon calibré au démarrage pour
+    # approcher BCRYPT_TARGET_MS par hachage sur la machine courante
+    BCRYPT_ROUNDS: Optional[int] = (
+        int(os.getenv("BCRYPT_ROUNDS")) if os.getenv("BCRYPT_ROUNDS") else None
+    )
+    BCRYPT_TARGET_MS: float = float(os.getenv("BCRYPT_TARGET_MS", "250"))
+    BCRYPT_MIN_ROUNDS: int = int(os.getenv("BCRYPT_MIN_ROUNDS", "10"))
+    BCRYPT_MAX_ROUNDS: int = int(os.getenv("BCRYPT_MAX_ROUNDS", "16"))
+    # Un hash plus coûteux que la politique de plus de N rounds est recalculé
+    BCRYPT_REHASH_TOLERANCE: int = int(os.getenv("BCRYPT_REHASH_TOLERANCE", "1"))
+    # Hachage de plusieurs mots de passe (création en masse) : nombre de
+    # processus (0 : un par CPU), utilisés à partir de N mots de passe
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "0"))
+    PASSWORD_HASH_PARALLEL_MIN: int = int(os.getenv("PASSWORD_HASH_PARALLEL_MIN", "8"))
+    # Limitation des tentatives de connexion (seaux à jetons par IP et par compte)
+    LOGIN_THROTTLE_ENABLED: bool = os.getenv("LOGIN_THROTTLE_ENABLED", "true").lower() == "true"
+    LOGIN_THROTTLE_STORE: str = os.getenv("LOGIN_THROTTLE_STORE", "memory")
+    LOGIN_THROTTLE_IP_CAPACITY: float = float(os.getenv("LOGIN_THROTTLE_IP_CAPACITY", "20"))
+    LOGIN_THROTTLE_IP_PER_MINUTE: float = float(os.getenv("LOGIN_THROTTLE_IP_PER_MINUTE", "10"))
+    LOGIN_THROTTLE_ACCOUNT_CAPACITY: float = float(os.getenv("LOGIN_THROTTLE_ACCOUNT_CAPACITY", "5"))
+    LOGIN_THROTTLE_ACCOUNT_PER_MINUTE: float = float(os.getenv("LOGIN_THROTTLE_ACCOUNT_PER_MINUTE", "2"))
+
+    # Performance
+    SINGLE_FLIGHT_ENABLED: bool = os.getenv("SINGLE_FLIGHT_ENABLED", "false").lower() == "true"
+    # Limite adaptative des requêtes en cours, par worker (AIMD sur la latence)
+    LOAD_SHED_ENABLED: bool = os.getenv("LOAD_SHED_ENABLED", "true").lower() == "true"
+    LOAD_SHED_INITIAL_LIMIT: int = int(os.getenv("LOAD_SHED_INITIAL_LIMIT", "50"))
+    LOAD_SHED_MIN_LIMIT: int = int(os.getenv("LOAD_SHED_MIN_LIMIT", "5"))
+    LOAD_SHED_MAX_LIMIT: int = int(os.getenv("LOAD_SHED_MAX_LIMIT", "500"))
+    LOAD_SHED_LATENCY_TARGET_MS: float = float(os.getenv("LOAD_SHED_LATENCY_TARGET_MS", "500"))
+    LOAD_SHED_RETRY_AFTER: int = int(os.getenv("LOAD_SHED_RETRY_AFTER", "1"))
+    # Échéance des requêtes (0 : aucune) ; un client peut la réduire par
+    # l'en-tête X-Request-Timeout, REQUEST_TIMEOUT_ROUTES fixe des délais par
+    # préfixe de route ("/api/v1/items/search=2,/api/v1/users=10")
+    REQUEST_TIMEOUT_SECONDS: float = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "30"))
+    REQUEST_TIMEOUT_MAX_SECONDS: float = float(os.getenv("REQUEST_TIMEOUT_MAX_SECONDS", "60"))
+    # (0 : pas d'échéance, pour les flux longs)
+    REQUEST_TIMEOUT_ROUTES: str = os.getenv("REQUEST_TIMEOUT_ROUTES", "/api/v1/items/stream=0")
+    # Routes jamais rejetées, peu coûteuses ou de longue durée (séparées par des virgules)
+    LOAD_SHED_PRIORITY_PATHS: str = os.getenv(
+        "LOAD_SHED_PRIORITY_PATHS",
+        "/health,/ready,/metrics,/api/v1/auth/test-token,/api/v1/items/stream",
+    )
+    # Flux des modifications d'items (SSE, alimenté par LISTEN/NOTIFY)
+    ITEM_EVENTS_CHANNEL: str = os.getenv("ITEM_EVENTS_CHANNEL", "item_events")
+    # Connexion LISTEN ouverte au démarrage du worker (PostgreSQL uniquement)
+    ITEM_STREAM_LISTEN: bool = os.getenv("ITEM_STREAM_LISTEN", "true").lower() == "true"
+    ITEM_STREAM_BUFFER_SIZE: int = int(os.getenv("ITEM_STREAM_BUFFER_SIZE", "10000"))
+    ITEM_STREAM_QUEUE_SIZE: int = int(os.getenv("ITEM_STREAM_QUEUE_SIZE", "1000"))
+    ITEM_STREAM_HEARTBEAT_SECONDS: float = float(os.getenv("ITEM_STREAM_HEARTBEAT_SECONDS", "15"))
+    ITEM_STREAM_RETRY_MS: int = int(os.getenv("ITEM_STREAM_RETRY_MS", "3000"))
+    # Regroupement des créations d'items concurrentes en un INSERT / un commit
+    ITEM_WRITE_BATCH_ENABLED: bool = os.getenv("ITEM_WRITE_BATCH_ENABLED", "false").lower() == "true"
+    ITEM_WRITE_BATCH_WINDOW_MS: float = float(os.getenv("ITEM_WRITE_BATCH_WINDOW_MS", "5"))
+    ITEM_WRITE_BATCH_MAX_SIZE: int = int(os.getenv("ITEM_WRITE_BATCH_MAX_SIZE", "100"))
+    # Partitions mensuelles de la table item (PostgreSQL) : mois créés
+    # d'avance, et rétention en mois au-delà de laquelle les partitions
+    # sont supprimées (0 : tout conserver)
+    ITEM_PARTITION_MONTHS_AHEAD: int = int(os.getenv("ITEM_PARTITION_MONTHS_AHEAD", "3"))
+    ITEM_RETENTION_MONTHS: int = int(os.getenv("ITEM_RETENTION_MONTHS", "0"))
+    # Archivage des items plus anciens que ITEM_ARCHIVE_AFTER_DAYS (0 : jamais)
+    # par lots, avec une pause entre deux lots (scripts/archive_items.py)
+    ITEM_ARCHIVE_AFTER_DAYS: int = int(os.getenv("ITEM_ARCHIVE_AFTER_DAYS", "365"))
+    ITEM_ARCHIVE_BATCH_SIZE: int = int(os.getenv("ITEM_ARCHIVE_BATCH_SIZE", "1000"))
+    ITEM_ARCHIVE_PAUSE_SECONDS: float = float(os.getenv("ITEM_ARCHIVE_PAUSE_SECONDS", "0.5"))
+    # Clés Idempotency-Key des POST : durée de conservation des réponses, et
+    # délai au-delà duquel une requête restée en cours peut être réexécutée
+    IDEMPOTENCY_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_LOCK_SECONDS: int = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+    IDEMPOTENCY_KEY_MAX_LENGTH: int = int(os.getenv("IDEMPOTENCY_KEY_MAX_LENGTH", "255"))
+    # Création d'utilisateurs en masse (POST /users/bulk, scripts/import_users.py) :
+    # taille maximale d'une requête, et lignes par INSERT (un commit par lot)
+    USER_BULK_MAX_USERS: int = int(os.getenv("USER_BULK_MAX_USERS", "1000"))
+    USER_BULK_BATCH_SIZE: int = int(os.getenv("USER_BULK_BATCH_SIZE", "500"))
+    # Migrations en ligne (app/db/online.py) : attente maximale d'un verrou
+    # avant abandon puis nouvel essai, nombre d'essais, et backfills par lots
+    # espacés d'une pause
+    MIGRATION_LOCK_TIMEOUT_MS: int = int(os.getenv("MIGRATION_LOCK_TIMEOUT_MS", "2000"))
+    MIGRATION_LOCK_ATTEMPTS: int = int(os.getenv("MIGRATION_LOCK_ATTEMPTS", "5"))
+    MIGRATION_LOCK_RETRY_SECONDS: float = float(os.getenv("MIGRATION_LOCK_RETRY_SECONDS", "5"))
+    MIGRATION_BACKFILL_BATCH_SIZE: int = int(os.getenv("MIGRATION_BACKFILL_BATCH_SIZE", "5000"))
+    MIGRATION_BACKFILL_PAUSE_SECONDS: float = float(
+        os.getenv("MIGRATION_BACKFILL_PAUSE_SECONDS", "0.1")
+    )
+    # Statistiques d'administration : jours recalculés à chaque
+    # rafraîchissement (scripts/refresh_stats.py) et période maximale lue
+    STATS_REFRESH_DAYS: int = int(os.getenv("STATS_REFRESH_DAYS", "2"))
+    STATS_MAX_DAYS: int = int(os.getenv("STATS_MAX_DAYS", "366"))
+    # Tâches de fond (table job) : threads d'exécution par processus, bail
+    # d'une tâche en cours, tentatives et délai exponentiel entre elles
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_POLL_SECONDS: float = float(os.getenv("JOB_POLL_SECONDS", "1"))
+    JOB_LEASE_SECONDS: int = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+    JOB_RETRY_BASE_SECONDS: float = float(os.getenv("JOB_RETRY_BASE_SECONDS", "5"))
+    JOB_RETRY_MAX_SECONDS: float = float(os.getenv("JOB_RETRY_MAX_SECONDS", "600"))
+    # Au-delà de ce nombre d'items, un utilisateur est supprimé par lots en arrière-plan
+    USER_DELETE_ASYNC_THRESHOLD: int = int(os.getenv("USER_DELETE_ASYNC_THRESHOLD", "10000"))
+    USER_DELETE_CHUNK_SIZE: int = int(os.getenv("USER_DELETE_CHUNK_SIZE", "5000"))
 
 settings = Settings() 
\ No newline at end of file
@@ -0,0 +1,188 @@
+import asyncio
+import json
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy.exc import DBAPIError
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# Échéance de la requête courante (horloge time.monotonic()), None si aucune
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+# Code SQLSTATE de Postgres pour « canceling statement due to statement timeout »
+QUERY_CANCELED = "57014"
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def set_deadline(seconds: float):
+    """
+    Fixe l'échéance de la requête courante ; retourne le jeton pour la rétablir.
+    """
+    return _deadline.set(time.monotonic() + seconds)
+
+
+def remaining() -> Optional[float]:
+    """
+    Secondes restantes avant l'échéance, None si la requête n'en a pas.
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def statement_timeout_ms() -> Optional[int]:
+    """
+    statement_timeout à appliquer à la prochaine transaction ; lève
+    DeadlineExceeded si l'échéance est déjà passée.
+    """
+    left = remaining()
+    if left is None:
+        return None
+    if left <= 0:
+        raise DeadlineExceeded()
+    return max(1, int(left * 1000))
+
+
+def is_statement_timeout(exc: BaseException) -> bool:
+    return isinstance(exc, DBAPIError) and getattr(exc.orig, "pgcode", None) == QUERY_CANCELED
+
+
+def parse_route_timeouts(spec: str) -> Dict[str, float]:
+    """
+    "/api/v1/items/search=2,/api/v1/users=10" -> {préfixe: secondes}
+    """
+    timeouts = {}
+    for entry in spec.split(","):
+        prefix, _, seconds = entry.partition("=")
+        if prefix.strip() and seconds.strip():
+            timeouts[prefix.strip()] = float(seconds)
+    return timeouts
+
+
+class DeadlineMiddleware:
+    """
+    Middleware ASGI qui fixe l'échéance de chaque requête : en-tête
+    X-Request-Timeout (secondes, borné par REQUEST_TIMEOUT_MAX_SECONDS), sinon
+    le délai de la route (préfixe le plus long), sinon REQUEST_TIMEOUT_SECONDS.
+    La requête est annulée à l'échéance et reçoit un 504 ; une fois la
+    réponse envoyée, le travail restant (tâches de fond) n'a plus d'échéance.
+    """
+
+    header = b"x-request-timeout"
+
+    def __init__(self, app) -> None:
+        self.app = app
+        self.route_timeouts = sorted(
+            parse_route_timeouts(settings.REQUEST_TIMEOUT_ROUTES).items(),
+            key=lambda entry: len(entry[0]),
+            reverse=True,
+        )
+
+    def _timeout(self, scope) -> float:
+        for name, value in scope["headers"]:
+            if name == self.header:
+                try:
+                    requested = float(value)
+                except ValueError:
+                    break
+                if requested > 0:
+                    return min(requested, settings.REQUEST_TIMEOUT_MAX_SECONDS)
+                break
+        for prefix, seconds in self.route_timeouts:
+            if scope["path"].startswith(prefix):
+                return seconds
+        return settings.REQUEST_TIMEOUT_SECONDS
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timeout = self._timeout(scope)
+        if timeout <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        response_started = response_complete = False
+        completed = asyncio.Event()
+
+        async def send_wrapper(message) -> None:
+            nonlocal response_started, response_complete
+            if message["type"] == "http.response.start":
+                response_started = True
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete = True
+                # Les tâches de fond (BackgroundTasks) qui suivent la réponse
+                # ne sont plus soumises à l'échéance, SQL compris
+                _deadline.set(None)
+                completed.set()
+            await send(message)
+
+        token = set_deadline(timeout)
+        try:
+            task = asyncio.ensure_future(self.app(scope, receive, send_wrapper))
+        finally:
+            _deadline.reset(token)
+        try:
+            await self._supervise(task, completed, timeout)
+        except (asyncio.TimeoutError, DeadlineExceeded):
+            await self._expired(scope, send, response_started, response_complete)
+        except DBAPIError as exc:
+            if not is_statement_timeout(exc):
+                raise
+            await self._expired(scope, send, response_started, response_complete)
+
+    @staticmethod
+    async def _supervise(task: asyncio.Task, completed: asyncio.Event, timeout: float) -> None:
+        """
+        Attend la fin de `task` ; l'annule et lève TimeoutError si la réponse
+        n'est pas entièrement envoyée dans le délai.
+        """
+        waiter = asyncio.ensure_future(completed.wait())
+        try:
+            await asyncio.wait(
+                {task, waiter}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            waiter.cancel()
+        if not task.done() and not completed.is_set():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            raise asyncio.TimeoutError()
+        await task
+
+    async def _expired(
+        self, scope, send, response_started: bool, response_complete: bool
+    ) -> None:
+        if response_complete:
+            # Réponse déjà envoyée en entier (tâche de fond en cours) : plus
+            # rien à transmettre au client
+            return
+        route = scope.get("route")
+        metrics.inc("deadline_exceeded", getattr(route, "path", scope["path"]))
+        if response_started:
+            # Réponse en flux déjà commencée (SSE...) : la terminer proprement,
+            # le client se reconnectera
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        body = json.dumps({"detail": "Délai de la requête dépassé"}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 504,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,132 @@
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, configure_mappers
+from starlette.concurrency import run_in_threadpool
+
+from app.core.changefeed import Listener, feed
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.security import create_access_token, dummy_verify, shutdown_hash_pool
+from app.core.tokens import decode_access_token, token_cache
+from app.db.session import SessionLocal, engine, engines
+from app.schemas.item import Item
+from app.schemas.user import User
+from app.services import item_partitions
+from app.services.job import JobRunner
+
+logger = logging.getLogger(__name__)
+
+
+class AppState:
+    """
+    État du worker : `ready` passe à True une fois le préchauffage terminé.
+    """
+
+    def __init__(self) -> None:
+        self.ready = False
+
+
+state = AppState()
+
+
+def warm_pool(db_engine: Engine, connections: int) -> int:
+    """
+    Ouvre `connections` connexions en même temps puis les rend au pool,
+    qui les garde ouvertes. Retourne le nombre de connexions ouvertes.
+    """
+    opened = []
+    try:
+        for _ in range(connections):
+            connection = db_engine.connect()
+            opened.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        for connection in opened:
+            connection.close()
+    return len(opened)
+
+
+def warmup() -> None:
+    """
+    Paye au démarrage les coûts des premières requêtes : connexions au pool,
+    configuration des mappers, validateurs pydantic, JWT et bcrypt. Crée
+    aussi les partitions des items des mois à venir.
+    """
+    started = time.perf_counter()
+    connections = min(settings.DB_WARMUP_CONNECTIONS, settings.DB_POOL_SIZE)
+    reachable = []
+    for shard_id, shard_engine in engines.items():
+        try:
+            warm_pool(shard_engine, connections)
+        except Exception:
+            # Base indisponible : le worker démarre quand même, /ready le signalera
+            logger.exception("Préchauffage du pool de connexions impossible (%s)", shard_id)
+        else:
+            reachable.append(shard_id)
+    configure_mappers()
+    for shard_id, shard_engine in engines.items():
+        # Partitions : PostgreSQL seulement, et base joignable (déjà signalé sinon)
+        if shard_engine.dialect.name != "postgresql" or shard_id not in reachable:
+            continue
+        try:
+            with Session(shard_engine) as db:
+                item_partitions.ensure_partitions(db)
+        except OperationalError as exc:
+            # Connexion impossible (préchauffage désactivé) : pas de trace d'appel
+            logger.warning("Partitions à venir non vérifiées (%s) : %s", shard_id, exc.orig)
+        except Exception:
+            logger.exception("Création des partitions à venir impossible (%s)", shard_id)
+    now = datetime.utcnow()
+    Item.model_validate(
+        {
+            "id": 0,
+            "title": "",
+            "owner_id": 0,
+            "created_at": now,
+            "updated_at": now,
+            "version": 1,
+        }
+    ).model_dump_json()
+    User.model_validate(
+        {
+            "id": 0,
+            "email": "warmup@example.com",
+            "created_at": now,
+            "updated_at": now,
+            "version": 1,
+        }
+    ).model_dump_json()
+    decode_access_token(create_access_token(0, expires_delta=timedelta(seconds=30)))
+    token_cache.clear()
+    # Calibre le coût bcrypt et prépare le hash factice utilisé au login
+    dummy_verify("warmup")
+    metrics.set_gauge("warmup_seconds", time.perf_counter() - started)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(warmup)
+    listener = None
+    if settings.ITEM_STREAM_LISTEN and engine.dialect.name == "postgresql":
+        listener = Listener(engine, settings.ITEM_EVENTS_CHANNEL, feed)
+        listener.start()
+    runner = JobRunner(SessionLocal, settings.JOB_WORKERS, settings.JOB_POLL_SECONDS)
+    runner.start()
+    state.ready = True
+    try:
+        yield
+    finally:
+        state.ready = False
+        await run_in_threadpool(runner.stop)
+        if listener is not None:
+            await run_in_threadpool(listener.stop)
+        await run_in_threadpool(shutdown_hash_pool)
+        for shard_engine in engines.values():
+            shard_engine.dispose()
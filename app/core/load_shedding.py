@@ -0,0 +1,121 @@
+import json
+import math
+import time
+from typing import Iterable
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+class AdaptiveLimiter:
+    """
+    Limite adaptative du nombre de requêtes en cours (AIMD).
+
+    Chaque réponse rapide augmente la limite d'environ une requête par
+    « fenêtre » (+1/limite par réponse) ; une réponse lente ou en erreur 5xx la
+    multiplie par `backoff`, au plus une fois par `cooldown` secondes pour
+    qu'une rafale de réponses lentes ne l'effondre pas d'un coup.
+
+    Utilisée depuis la boucle d'événements uniquement : pas de verrou.
+    """
+
+    def __init__(
+        self,
+        initial: float,
+        min_limit: float,
+        max_limit: float,
+        latency_target: float,
+        backoff: float = 0.9,
+        cooldown: float = 1.0,
+    ) -> None:
+        self.limit = float(initial)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.cooldown = cooldown
+        self.inflight = 0
+        self._last_decrease = 0.0
+
+    def try_acquire(self) -> bool:
+        if self.inflight >= math.floor(self.limit):
+            return False
+        self.inflight += 1
+        return True
+
+    def release(self, latency: float, ok: bool = True) -> None:
+        self.inflight -= 1
+        if ok and latency <= self.latency_target:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            return
+        now = time.monotonic()
+        if now - self._last_decrease >= self.cooldown:
+            self._last_decrease = now
+            self.limit = max(self.min_limit, self.limit * self.backoff)
+
+
+class LoadSheddingMiddleware:
+    """
+    Middleware ASGI qui rejette immédiatement (503 + Retry-After) les requêtes
+    au-delà de la limite adaptative, au lieu de les laisser attendre une
+    connexion du pool. Les routes prioritaires ne sont jamais limitées.
+    """
+
+    def __init__(self, app, limiter: AdaptiveLimiter, priority_paths: Iterable[str]) -> None:
+        self.app = app
+        self.limiter = limiter
+        self.priority_paths = frozenset(priority_paths)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if (
+            scope["type"] != "http"
+            or not settings.LOAD_SHED_ENABLED
+            or scope["path"] in self.priority_paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiter
+        if not limiter.try_acquire():
+            metrics.inc("load_shed_rejected")
+            await self._reject(send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            limiter.release(time.perf_counter() - started, ok=status_code < 500)
+            metrics.set_gauge("load_shed_limit", round(limiter.limit, 2))
+            metrics.set_gauge("load_shed_inflight", limiter.inflight)
+
+    async def _reject(self, send) -> None:
+        body = json.dumps({"detail": "Serveur surchargé, réessayez plus tard"}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(settings.LOAD_SHED_RETRY_AFTER).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+limiter = AdaptiveLimiter(
+    initial=settings.LOAD_SHED_INITIAL_LIMIT,
+    min_limit=settings.LOAD_SHED_MIN_LIMIT,
+    max_limit=settings.LOAD_SHED_MAX_LIMIT,
+    latency_target=settings.LOAD_SHED_LATENCY_TARGET_MS / 1000,
+)
@@ -0,0 +1,43 @@
+import threading
+from collections import defaultdict
+from typing import Dict, Tuple
+
+
+class Metrics:
+    """
+    Registre de compteurs en mémoire, propre à chaque worker.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._gauges: Dict[Tuple[str, str], float] = {}
+
+    def inc(self, name: str, label: str = "", value: int = 1) -> None:
+        with self._lock:
+            self._counters[(name, label)] += value
+
+    def set_gauge(self, name: str, value: float, label: str = "") -> None:
+        with self._lock:
+            self._gauges[(name, label)] = value
+
+    def get(self, name: str, label: str = "") -> int:
+        with self._lock:
+            return self._counters.get((name, label), 0)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        result: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            for (name, label), value in list(self._counters.items()) + list(
+                self._gauges.items()
+            ):
+                result.setdefault(name, {})[label or "total"] = value
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+
+
+metrics = Metrics()
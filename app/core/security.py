@@ -1,12 +1,24 @@
+import calendar
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
+from itertools import repeat
+from typing import Any, List, Optional, Union
 
-from jose import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.tokens import jwt_backend
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+_bcrypt_rounds: Optional[int] = None
+_dummy_hash: Optional[str] = None
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_hash_pool_lock = threading.Lock()
 
 
 def create_access_token(
@@ -18,14 +30,125 @@ def create_access_token(
         expire = datetime.utcnow() + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    to_encode = {"exp": calendar.timegm(expire.utctimetuple()), "sub": str(subject)}
+    encoded_jwt = jwt_backend.encode(
+        to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
+    )
     return encoded_jwt
 
 
+def calibrate_bcrypt_rounds(
+    target_ms: float, min_rounds: int = 4, max_rounds: int = 16
+) -> int:
+    """
+    Plus grand coût bcrypt dont le hachage tient dans target_ms sur cette
+    machine. Chaque round supplémentaire double le temps : on mesure au
+    coût minimal puis on extrapole.
+    """
+    elapsed = min(_time_hash(min_rounds) for _ in range(3))
+    extra = math.floor(math.log2(max(target_ms / 1000 / elapsed, 1)))
+    return max(min_rounds, min(max_rounds, min_rounds + extra))
+
+
+def _time_hash(rounds: int) -> float:
+    start = time.perf_counter()
+    pwd_context.handler("bcrypt").using(rounds=rounds).hash("calibration")
+    return time.perf_counter() - start
+
+
+def configure_password_policy(rounds: int, tolerance: Optional[int] = None) -> None:
+    """
+    Fixe le coût des nouveaux hashs. Les hashs moins coûteux, ou plus coûteux
+    de plus de `tolerance` rounds, sont signalés par password_needs_rehash.
+    """
+    global _bcrypt_rounds, _dummy_hash
+    if tolerance is None:
+        tolerance = settings.BCRYPT_REHASH_TOLERANCE
+    pwd_context.update(
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds + tolerance,
+    )
+    _bcrypt_rounds = rounds
+    _dummy_hash = None
+
+
+def bcrypt_rounds() -> int:
+    if _bcrypt_rounds is None:
+        configure_password_policy(
+            settings.BCRYPT_ROUNDS
+            or calibrate_bcrypt_rounds(
+                settings.BCRYPT_TARGET_MS,
+                min_rounds=settings.BCRYPT_MIN_ROUNDS,
+                max_rounds=settings.BCRYPT_MAX_ROUNDS,
+            )
+        )
+    return _bcrypt_rounds
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
+    bcrypt_rounds()
     return pwd_context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password) 
\ No newline at end of file
+    bcrypt_rounds()
+    return pwd_context.hash(password)
+
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """
+    Hache plusieurs mots de passe au coût courant, en parallèle dans un pool
+    de processus à partir de PASSWORD_HASH_PARALLEL_MIN mots de passe.
+    """
+    rounds = bcrypt_rounds()
+    if len(passwords) < max(settings.PASSWORD_HASH_PARALLEL_MIN, 2):
+        return [pwd_context.hash(password) for password in passwords]
+    pool = _get_hash_pool()
+    # Quelques lots par processus : moins d'allers-retours qu'un par mot de passe
+    chunksize = max(1, len(passwords) // (_hash_workers() * 4))
+    # Le coût est transmis : les processus ne refont ni la calibration ni la politique
+    return list(pool.map(_hash_with_rounds, passwords, repeat(rounds), chunksize=chunksize))
+
+
+def _hash_with_rounds(password: str, rounds: int) -> str:
+    return pwd_context.handler("bcrypt").using(rounds=rounds).hash(password)
+
+
+def _hash_workers() -> int:
+    return settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            # spawn : un fork copierait les verrous tenus par les threads du serveur
+            _hash_pool = ProcessPoolExecutor(
+                max_workers=_hash_workers(), mp_context=multiprocessing.get_context("spawn")
+            )
+        return _hash_pool
+
+
+def shutdown_hash_pool() -> None:
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is not None:
+            _hash_pool.shutdown()
+            _hash_pool = None
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    bcrypt_rounds()
+    return pwd_context.needs_update(hashed_password)
+
+
+def dummy_verify(password: str) -> None:
+    """
+    Vérification factice au coût de la politique courante, pour qu'un email
+    inconnu prenne autant de temps qu'un mauvais mot de passe.
+    """
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = get_password_hash("dummy-password")
+    pwd_context.verify(password, _dummy_hash)
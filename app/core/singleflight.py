@@ -0,0 +1,47 @@
+import asyncio
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.metrics import metrics
+
+
+class SingleFlight:
+    """
+    Regroupe les appels concurrents identiques au sein d'un worker.
+
+    Le premier appelant pour une clé exécute la fonction dans le threadpool ;
+    les appelants arrivant pendant l'exécution attendent le même résultat
+    au lieu de relancer la requête. Rien n'est conservé une fois le calcul
+    terminé : il ne s'agit pas d'un cache.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Tuple[Any, ...], fn: Callable[[], Any]) -> Any:
+        route = str(key[0])
+        task = self._inflight.get(key)
+        if task is None:
+            metrics.inc("singleflight_leaders", route)
+            task = asyncio.ensure_future(run_in_threadpool(fn))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            metrics.inc("singleflight_coalesced", route)
+        # shield : l'annulation d'un client ne doit pas annuler les autres
+        return await asyncio.shield(task)
+
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+
+single_flight = SingleFlight()
+
+
+def auth_scope(user: Any) -> str:
+    """
+    Portée d'autorisation utilisée dans les clés : un admin voit tout,
+    un utilisateur normal uniquement ses propres données.
+    """
+    return "superuser" if user.is_superuser else f"user:{user.id}"
@@ -0,0 +1,235 @@
+import importlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+class ThrottleStore(ABC):
+    """
+    Stockage des seaux à jetons (token buckets).
+
+    consume() retire `cost` jetons du seau `key` s'ils sont disponibles et
+    retourne 0 ; sinon ne retire rien et retourne le délai en secondes avant
+    qu'ils le soient. Un coût négatif rend des jetons, sans dépasser `capacity`.
+    """
+
+    @abstractmethod
+    def consume(
+        self, key: str, capacity: float, refill_per_second: float, cost: float = 1.0
+    ) -> float:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def refund(
+        self, key: str, capacity: float, refill_per_second: float, amount: float = 1.0
+    ) -> None:
+        self.consume(key, capacity, refill_per_second, cost=-amount)
+
+
+def _refill(
+    state: Optional[Tuple[float, float]], capacity: float, rate: float, now: float
+) -> float:
+    if state is None:
+        return capacity
+    tokens, updated = state
+    return min(capacity, tokens + (now - updated) * rate)
+
+
+class MemoryThrottleStore(ThrottleStore):
+    """
+    Seaux en mémoire, propres au worker. Le nombre de clés est borné :
+    les seaux les moins récemment utilisés sont oubliés (donc remis à plein).
+    """
+
+    def __init__(self, max_keys: int = 100_000) -> None:
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(
+        self, key: str, capacity: float, refill_per_second: float, cost: float = 1.0
+    ) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens = _refill(self._buckets.get(key), capacity, refill_per_second, now)
+            if tokens >= cost:
+                tokens = min(capacity, tokens - cost)
+                wait = 0.0
+            else:
+                wait = (cost - tokens) / refill_per_second
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class KeyValueClient(ABC):
+    """
+    Interface minimale d'un stockage partagé entre workers et nœuds
+    (Redis, memcached...) : lecture et compare-and-set avec expiration.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def compare_and_set(
+        self, key: str, expected: Optional[bytes], value: bytes, ttl: float
+    ) -> bool:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+
+class LocalKeyValueClient(KeyValueClient):
+    """
+    Implémentation locale de KeyValueClient, pour les tests et le développement.
+    """
+
+    def __init__(self) -> None:
+        self._data: Dict[str, Tuple[bytes, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= time.time():
+                return None
+            return entry[0]
+
+    def compare_and_set(
+        self, key: str, expected: Optional[bytes], value: bytes, ttl: float
+    ) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            current = entry[0] if entry and entry[1] > time.time() else None
+            if current != expected:
+                return False
+            self._data[key] = (value, time.time() + ttl)
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class SharedThrottleStore(ThrottleStore):
+    """
+    Seaux stockés dans un KeyValueClient partagé, mis à jour par
+    compare-and-set optimiste. Les horloges des nœuds doivent être synchronisées.
+    """
+
+    def __init__(self, client: KeyValueClient, prefix: str = "throttle:", retries: int = 5):
+        self.client = client
+        self.prefix = prefix
+        self.retries = retries
+
+    def consume(
+        self, key: str, capacity: float, refill_per_second: float, cost: float = 1.0
+    ) -> float:
+        key = self.prefix + key
+        # Au-delà de ce délai sans requête, le seau est plein : inutile de le garder
+        ttl = capacity / refill_per_second
+        for _ in range(self.retries):
+            now = time.time()
+            raw = self.client.get(key)
+            state = None
+            if raw is not None:
+                tokens, updated = raw.decode().split(":")
+                state = (float(tokens), float(updated))
+            tokens = _refill(state, capacity, refill_per_second, now)
+            if tokens < cost:
+                return (cost - tokens) / refill_per_second
+            value = f"{min(capacity, tokens - cost)}:{now}".encode()
+            if self.client.compare_and_set(key, raw, value, ttl):
+                return 0.0
+        # Forte contention sur la même clé : refuser plutôt que hacher
+        return 1.0 / refill_per_second
+
+    def clear(self) -> None:
+        self.client.clear()
+
+
+def build_store(spec: str) -> ThrottleStore:
+    """
+    "memory" pour le stockage en mémoire, ou "module:fabrique" pour une
+    fonction sans argument retournant un ThrottleStore.
+    """
+    if spec == "memory":
+        return MemoryThrottleStore()
+    module_name, _, factory = spec.partition(":")
+    return getattr(importlib.import_module(module_name), factory)()
+
+
+class LoginThrottle:
+    def __init__(self, store: ThrottleStore) -> None:
+        self.store = store
+
+    def _buckets(self, ip: str, account: str) -> List[Tuple[str, str, float, float]]:
+        # (étiquette, clé, capacité, jetons par seconde)
+        return [
+            (
+                "ip",
+                f"login:ip:{ip}",
+                settings.LOGIN_THROTTLE_IP_CAPACITY,
+                settings.LOGIN_THROTTLE_IP_PER_MINUTE / 60,
+            ),
+            (
+                "account",
+                f"login:account:{account.strip().lower()}",
+                settings.LOGIN_THROTTLE_ACCOUNT_CAPACITY,
+                settings.LOGIN_THROTTLE_ACCOUNT_PER_MINUTE / 60,
+            ),
+        ]
+
+    def check(self, ip: str, account: str) -> float:
+        """
+        Consomme un jeton par IP puis par compte ; retourne 0 si la tentative
+        est autorisée, sinon le délai à indiquer dans Retry-After. Une
+        tentative refusée ne coûte rien : les jetons déjà pris sont rendus.
+        """
+        if not settings.LOGIN_THROTTLE_ENABLED:
+            return 0.0
+        consumed = []
+        for label, key, capacity, rate in self._buckets(ip, account):
+            wait = self.store.consume(key, capacity, rate)
+            if wait:
+                for key, capacity, rate in consumed:
+                    self.store.refund(key, capacity, rate)
+                metrics.inc("login_throttled", label)
+                return wait
+            consumed.append((key, capacity, rate))
+        return 0.0
+
+    def succeeded(self, ip: str, account: str) -> None:
+        """
+        Rend les jetons d'une connexion réussie : seuls les échecs sont
+        limités, et les utilisateurs derrière une même IP (NAT) ne se
+        bloquent pas par leurs connexions valides.
+        """
+        if not settings.LOGIN_THROTTLE_ENABLED:
+            return
+        for _, key, capacity, rate in self._buckets(ip, account):
+            self.store.refund(key, capacity, rate)
+
+    def reset(self) -> None:
+        self.store.clear()
+
+
+login_throttle = LoginThrottle(build_store(settings.LOGIN_THROTTLE_STORE))
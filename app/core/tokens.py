@@ -0,0 +1,204 @@
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.schemas.token import TokenPayload
+
+
+class InvalidTokenError(Exception):
+    pass
+
+
+class JoseBackend:
+    name = "jose"
+
+    def __init__(self) -> None:
+        from jose import JWTError, jwt
+
+        self._jwt = jwt
+        self._error = JWTError
+
+    def encode(self, claims: Dict[str, Any], key: str, algorithm: str) -> str:
+        return self._jwt.encode(claims, key, algorithm=algorithm)
+
+    def decode(self, token: str, key: str, algorithm: str) -> Dict[str, Any]:
+        try:
+            return self._jwt.decode(token, key, algorithms=[algorithm])
+        except self._error as exc:
+            raise InvalidTokenError(str(exc))
+
+
+class PyJWTBackend:
+    name = "pyjwt"
+
+    def __init__(self) -> None:
+        # Dépendance optionnelle : pip install pyjwt
+        import jwt
+
+        self._jwt = jwt
+
+    def encode(self, claims: Dict[str, Any], key: str, algorithm: str) -> str:
+        return self._jwt.encode(claims, key, algorithm=algorithm)
+
+    def decode(self, token: str, key: str, algorithm: str) -> Dict[str, Any]:
+        try:
+            # "sub" est un entier sérialisé en chaîne : pas de validation stricte
+            return self._jwt.decode(
+                token, key, algorithms=[algorithm], options={"verify_sub": False}
+            )
+        except self._jwt.PyJWTError as exc:
+            raise InvalidTokenError(str(exc))
+
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+class HMACBackend:
+    """
+    Vérification HS256/HS384/HS512 avec la bibliothèque standard uniquement,
+    sans la couche générique (JWK, algorithmes asymétriques) de jose.
+    """
+
+    name = "hmac"
+    _digests = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+
+    def _digest(self, algorithm: str):
+        try:
+            return self._digests[algorithm]
+        except KeyError:
+            raise InvalidTokenError(f"Algorithme non supporté : {algorithm}")
+
+    def encode(self, claims: Dict[str, Any], key: str, algorithm: str) -> str:
+        digest = self._digest(algorithm)
+        header = _b64encode(
+            json.dumps({"alg": algorithm, "typ": "JWT"}, separators=(",", ":")).encode()
+        )
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+        signing_input = f"{header}.{payload}".encode()
+        signature = hmac.new(key.encode(), signing_input, digest).digest()
+        return f"{header}.{payload}.{_b64encode(signature)}"
+
+    def decode(self, token: str, key: str, algorithm: str) -> Dict[str, Any]:
+        digest = self._digest(algorithm)
+        try:
+            header_b64, payload_b64, signature_b64 = token.split(".")
+            header = json.loads(_b64decode(header_b64))
+            signature = _b64decode(signature_b64)
+        except (ValueError, TypeError):
+            raise InvalidTokenError("Jeton mal formé")
+        if not isinstance(header, dict) or header.get("alg") != algorithm:
+            raise InvalidTokenError("Algorithme inattendu")
+        expected = hmac.new(
+            key.encode(), f"{header_b64}.{payload_b64}".encode(), digest
+        ).digest()
+        if not hmac.compare_digest(signature, expected):
+            raise InvalidTokenError("Signature invalide")
+        try:
+            claims = json.loads(_b64decode(payload_b64))
+        except ValueError:
+            raise InvalidTokenError("Charge utile invalide")
+        if not isinstance(claims, dict):
+            raise InvalidTokenError("Charge utile invalide")
+        exp = claims.get("exp")
+        if exp is not None:
+            if not isinstance(exp, (int, float)):
+                raise InvalidTokenError("Claim exp invalide")
+            if exp <= time.time():
+                raise InvalidTokenError("Jeton expiré")
+        return claims
+
+
+JWT_BACKENDS = {
+    JoseBackend.name: JoseBackend,
+    PyJWTBackend.name: PyJWTBackend,
+    HMACBackend.name: HMACBackend,
+}
+
+
+def get_jwt_backend(name: str):
+    try:
+        return JWT_BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"JWT_BACKEND inconnu : {name}")
+
+
+class TokenCache:
+    """
+    Cache LRU borné des jetons déjà vérifiés, indexé par une empreinte du jeton.
+    Chaque entrée expire à l'« exp » du jeton.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, Tuple[TokenPayload, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=20).digest()
+
+    def get(self, token: str) -> Optional[TokenPayload]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            payload, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def set(self, token: str, payload: TokenPayload, expires_at: float) -> None:
+        if self.maxsize <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (payload, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+jwt_backend = get_jwt_backend(settings.JWT_BACKEND)
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE)
+
+
+def decode_access_token(token: str) -> TokenPayload:
+    """
+    Vérifie un jeton d'accès ; lève InvalidTokenError si invalide ou expiré.
+    """
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
+    claims = jwt_backend.decode(token, settings.SECRET_KEY, settings.ALGORITHM)
+    try:
+        payload = TokenPayload(**claims)
+    except ValidationError as exc:
+        raise InvalidTokenError(str(exc))
+    # Sans exp, le jeton n'est pas mis en cache : il serait valide indéfiniment
+    exp = claims.get("exp")
+    if isinstance(exp, (int, float)):
+        token_cache.set(token, payload, float(exp))
+    return payload
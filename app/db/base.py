@@ -1,4 +1,10 @@
 # Import all models here for Alembic to detect
 from app.db.base_class import Base
 from app.models.user import User
-from app.models.item import Item 
\ No newline at end of file
+from app.models.item import Item
+from app.models.item_counter import ItemCounter
+from app.models.item_archive import ItemArchive
+from app.models.job import Job
+from app.models.daily_stats import DailyStats
+from app.models.idempotency_key import IdempotencyKey
+from app.models.migration_checkpoint import MigrationCheckpoint
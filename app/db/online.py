@@ -0,0 +1,423 @@
+"""
+Outils des migrations Alembic sur les grosses tables (item, user) : index
+créés sans bloquer les écritures, verrous bornés par lock_timeout et
+réessayés, NOT NULL posé via une contrainte CHECK validée, backfills par
+lots espacés et reprenables ; et classement des verrous pris par chaque
+instruction (scripts/migration_locks.py, en mode --sql sans base).
+
+Les fonctions d'exécution s'appellent depuis upgrade()/downgrade() d'une
+révision ; en mode hors ligne (--sql), elles émettent le SQL équivalent
+sans interroger la base.
+"""
+import logging
+import re
+import time
+from collections import namedtuple
+from typing import List, Optional
+
+from alembic import op
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Code SQLSTATE de lock_not_available (lock_timeout dépassé)
+LOCK_NOT_AVAILABLE = "55P03"
+
+# Ce que chaque mode de verrou de table empêche pendant qu'il est tenu
+BLOCKS = {
+    "ACCESS EXCLUSIVE": "lectures et écritures",
+    "EXCLUSIVE": "écritures",
+    "SHARE ROW EXCLUSIVE": "écritures",
+    "SHARE": "écritures",
+    "SHARE UPDATE EXCLUSIVE": "DDL et VACUUM seulement",
+    "ROW EXCLUSIVE": "lignes modifiées seulement",
+}
+BLOCKS_WRITES = {"ACCESS EXCLUSIVE", "EXCLUSIVE", "SHARE ROW EXCLUSIVE", "SHARE"}
+
+# Verrou d'une instruction : `lock` vaut None si elle ne verrouille aucune
+# table existante ; `duration` : "bref" (catalogue seulement), "parcours"
+# (lecture de toute la table sous le verrou) ou "réécriture"
+LockReport = namedtuple("LockReport", ["statement", "table", "lock", "duration", "advice"])
+
+_IDENT = r'"?([\w.]+)"?'
+_ALTER = rf"^ALTER TABLE (?:IF EXISTS )?(?:ONLY )?{_IDENT} "
+_CONSTRAINT = r"ADD (?:CONSTRAINT \S+ )?"
+# (motif, verrou, durée, conseil) ; le premier motif reconnu l'emporte
+_RULES = [
+    (
+        rf"^CREATE (?:UNIQUE )?INDEX CONCURRENTLY .*? ON (?:ONLY )?{_IDENT}",
+        "SHARE UPDATE EXCLUSIVE",
+        "parcours",
+        None,
+    ),
+    (
+        rf"^CREATE (?:UNIQUE )?INDEX .*? ON (?:ONLY )?{_IDENT}",
+        "SHARE",
+        "parcours",
+        "create_index_concurrently()",
+    ),
+    (r"^DROP INDEX CONCURRENTLY", "SHARE UPDATE EXCLUSIVE", "bref", None),
+    (r"^DROP INDEX", "ACCESS EXCLUSIVE", "bref", "drop_index_concurrently()"),
+    (r"^REINDEX .*CONCURRENTLY", "SHARE UPDATE EXCLUSIVE", "parcours", None),
+    (rf"^REINDEX \w+ {_IDENT}", "ACCESS EXCLUSIVE", "réécriture", "REINDEX ... CONCURRENTLY"),
+    (rf"^CREATE TABLE {_IDENT} PARTITION OF {_IDENT}", "ACCESS EXCLUSIVE", "bref", None),
+    (rf"^CREATE (?:OR REPLACE )?TRIGGER .*? ON {_IDENT}", "SHARE ROW EXCLUSIVE", "bref", None),
+    # Nouvel objet (table, séquence, extension...) : rien d'existant à verrouiller
+    (r"^CREATE ", None, "bref", None),
+    (rf"^DROP TABLE (?:IF EXISTS )?{_IDENT}", "ACCESS EXCLUSIVE", "bref", None),
+    (_ALTER + r".*DETACH PARTITION .* CONCURRENTLY", "SHARE UPDATE EXCLUSIVE", "bref", None),
+    (
+        _ALTER + r".*DETACH PARTITION",
+        "ACCESS EXCLUSIVE",
+        "bref",
+        "DETACH PARTITION ... CONCURRENTLY",
+    ),
+    (
+        _ALTER + r".*ATTACH PARTITION",
+        "SHARE UPDATE EXCLUSIVE",
+        "parcours",
+        "CHECK validée sur la partition avant l'attachement (pas de parcours)",
+    ),
+    (_ALTER + r"VALIDATE CONSTRAINT", "SHARE UPDATE EXCLUSIVE", "parcours", None),
+    (_ALTER + _CONSTRAINT + r"FOREIGN KEY.* NOT VALID", "SHARE ROW EXCLUSIVE", "bref", None),
+    (
+        _ALTER + _CONSTRAINT + r"FOREIGN KEY",
+        "SHARE ROW EXCLUSIVE",
+        "parcours",
+        "ajouter NOT VALID puis VALIDATE CONSTRAINT",
+    ),
+    (_ALTER + _CONSTRAINT + r"CHECK .* NOT VALID", "ACCESS EXCLUSIVE", "bref", None),
+    (
+        _ALTER + _CONSTRAINT + r"CHECK",
+        "ACCESS EXCLUSIVE",
+        "parcours",
+        "ajouter NOT VALID puis VALIDATE CONSTRAINT",
+    ),
+    (
+        _ALTER + _CONSTRAINT + r"(?:UNIQUE|PRIMARY KEY) USING INDEX",
+        "ACCESS EXCLUSIVE",
+        "bref",
+        None,
+    ),
+    (
+        _ALTER + _CONSTRAINT + r"(?:UNIQUE|PRIMARY KEY)",
+        "ACCESS EXCLUSIVE",
+        "parcours",
+        "create_index_concurrently(unique=True) puis ADD CONSTRAINT ... USING INDEX",
+    ),
+    (
+        _ALTER + r".*ALTER (?:COLUMN )?\S+ SET NOT NULL",
+        "ACCESS EXCLUSIVE",
+        "parcours",
+        "add_not_null() (CHECK validée au préalable : pas de parcours)",
+    ),
+    (
+        _ALTER + r".*ALTER (?:COLUMN )?\S+ (?:SET DATA )?TYPE",
+        "ACCESS EXCLUSIVE",
+        "réécriture",
+        "nouvelle colonne, backfill() puis bascule",
+    ),
+    (
+        _ALTER
+        + r".*ADD (?:COLUMN )?.*DEFAULT .*(?:NOW|RANDOM|NEXTVAL|CLOCK_TIMESTAMP|GEN_RANDOM_UUID)\(",
+        "ACCESS EXCLUSIVE",
+        "réécriture",
+        "colonne sans défaut volatil, puis backfill()",
+    ),
+    (_ALTER, "ACCESS EXCLUSIVE", "bref", None),
+    (r"^ALTER (?:SEQUENCE|INDEX|EXTENSION|TYPE) ", None, "bref", None),
+    # Lot de backfill() : borné par LIMIT
+    (rf"^WITH .*?\bUPDATE (?:ONLY )?{_IDENT} .* LIMIT\b", "ROW EXCLUSIVE", "bref", None),
+    (
+        rf"^(?:UPDATE|DELETE FROM) (?:ONLY )?{_IDENT}",
+        "ROW EXCLUSIVE",
+        "parcours",
+        "backfill() par lots",
+    ),
+    (rf"^INSERT INTO {_IDENT}", "ROW EXCLUSIVE", "bref", None),
+    (
+        rf"^(?:VACUUM|ANALYZE)\b(?: \(.*?\))?(?: {_IDENT})?",
+        "SHARE UPDATE EXCLUSIVE",
+        "parcours",
+        None,
+    ),
+]
+_COMPILED = [
+    (re.compile(pattern, re.IGNORECASE | re.DOTALL), lock, duration, advice)
+    for pattern, lock, duration, advice in _RULES
+]
+# Instructions sans verrou de table (transaction, paramètres, lectures)
+_IGNORED = re.compile(
+    r"^(?:BEGIN|COMMIT|ROLLBACK|SET|RESET|SELECT|SAVEPOINT|RELEASE)\b", re.IGNORECASE
+)
+
+
+def split_statements(sql: str) -> List[str]:
+    """
+    Instructions d'un script produit par `alembic upgrade --sql`
+    (terminées par « ; » en fin de ligne), sans les commentaires.
+    """
+    lines = [line for line in sql.splitlines() if not line.lstrip().startswith("--")]
+    statements = re.split(r";\s*(?:\n|$)", "\n".join(lines))
+    return [" ".join(statement.split()) for statement in statements if statement.strip()]
+
+
+def classify(statement: str) -> Optional[LockReport]:
+    """
+    Verrou de table pris par une instruction PostgreSQL ; None pour une
+    instruction qui n'en prend pas (BEGIN, SET, SELECT...).
+    """
+    statement = " ".join(statement.split())
+    if _IGNORED.match(statement):
+        return None
+    for pattern, lock, duration, advice in _COMPILED:
+        match = pattern.match(statement)
+        if match is None:
+            continue
+        table = next((group for group in reversed(match.groups()) if group), None)
+        return LockReport(statement, table, lock, duration if lock else "bref", advice)
+    return LockReport(statement, None, None, "bref", "instruction non reconnue : vérifier")
+
+
+def blocks_writes(report: LockReport) -> bool:
+    return report.lock in BLOCKS_WRITES
+
+
+# Instruction d'une révision et son risque pour le trafic en cours
+Finding = namedtuple("Finding", ["report", "risky", "reason"])
+
+_LOCK_TIMEOUT = re.compile(r"^SET (LOCAL )?lock_timeout\b", re.IGNORECASE)
+_CREATED = re.compile(rf"^CREATE TABLE (?:IF NOT EXISTS )?{_IDENT}", re.IGNORECASE)
+_NOT_NULL_CHECK = re.compile(
+    _ALTER + r"ADD CONSTRAINT (\S+) CHECK \(\s*\(?\s*(\w+) IS NOT NULL\s*\)?\s*\)", re.IGNORECASE
+)
+_VALIDATE = re.compile(_ALTER + r"VALIDATE CONSTRAINT (\S+)", re.IGNORECASE)
+_SET_NOT_NULL = re.compile(_ALTER + r"ALTER (?:COLUMN )?(\w+) SET NOT NULL", re.IGNORECASE)
+
+
+def analyze(sql: str) -> List[Finding]:
+    """
+    Verrous pris par le script SQL d'une révision (`alembic upgrade --sql`).
+    Une instruction est risquée si elle bloque les écritures pendant un
+    parcours ou une réécriture, si elle attend un tel verrou sans
+    lock_timeout, ou si elle s'exécute dans une transaction qui tient déjà
+    un verrou bloquant (tenu jusqu'au COMMIT). Les tables créées par la
+    révision elle-même ne comptent pas, ni le parcours de SET NOT NULL
+    précédé d'une contrainte CHECK (colonne IS NOT NULL) validée.
+    """
+    findings: List[Finding] = []
+    created = set()
+    checks, validated = {}, set()
+    session_timeout = local_timeout = in_transaction = False
+    held: Optional[LockReport] = None
+    for statement in split_statements(sql):
+        keyword = statement.split(" ", 1)[0].upper()
+        if keyword in ("BEGIN", "COMMIT", "ROLLBACK"):
+            in_transaction, local_timeout, held = keyword == "BEGIN", False, None
+            continue
+        timeout = _LOCK_TIMEOUT.match(statement)
+        if timeout:
+            if timeout.group(1):
+                local_timeout = True
+            else:
+                session_timeout = True
+            continue
+        if "alembic_version" in statement:
+            continue
+        report = classify(statement)
+        if report is None:
+            continue
+        check = _NOT_NULL_CHECK.match(statement)
+        if check:
+            checks[check.group(2)] = (check.group(1), check.group(3))
+        validate = _VALIDATE.match(statement)
+        if validate and validate.group(2) in checks:
+            validated.add(checks[validate.group(2)])
+        set_not_null = _SET_NOT_NULL.match(statement)
+        if set_not_null and set_not_null.groups() in validated:
+            report = report._replace(duration="bref", advice=None)
+        new_table = _CREATED.match(statement)
+        if new_table:
+            created.add(new_table.group(1))
+        if report.table in created:
+            findings.append(Finding(report, False, "table créée par la révision"))
+            continue
+        reason = None
+        if blocks_writes(report) and report.duration != "bref":
+            reason = f"bloque les {BLOCKS[report.lock]} pendant : {report.duration}"
+        elif held is not None and report.duration != "bref":
+            reason = f"sous le verrou {held.lock} sur {held.table}, tenu jusqu'au COMMIT"
+        elif blocks_writes(report) and not (session_timeout or local_timeout):
+            reason = "attente du verrou sans lock_timeout"
+        elif report.lock == "ROW EXCLUSIVE" and report.duration != "bref":
+            reason = "lignes modifiées verrouillées jusqu'au COMMIT"
+        elif report.lock is None and report.advice:
+            reason = report.advice
+        findings.append(Finding(report, reason is not None, reason))
+        # Hors transaction (autocommit_block()), le verrou est rendu aussitôt
+        if in_transaction and blocks_writes(report):
+            held = report
+    return findings
+
+
+def _offline() -> bool:
+    return op.get_context().as_sql
+
+
+def lock_timeout_sql(timeout_ms: int) -> str:
+    return f"SET LOCAL lock_timeout = '{int(timeout_ms)}ms'"
+
+
+def with_lock_retries(
+    *statements: str,
+    timeout_ms: Optional[int] = None,
+    attempts: Optional[int] = None,
+    pause: Optional[float] = None,
+) -> None:
+    """
+    Exécute `statements` dans un SAVEPOINT, chacun attendant ses verrous au
+    plus MIGRATION_LOCK_TIMEOUT_MS : une migration en file derrière une
+    longue transaction bloquerait sinon toutes les requêtes arrivées après
+    elle. En cas d'abandon, nouvel essai après une pause, jusqu'à
+    MIGRATION_LOCK_ATTEMPTS fois. Le verrou obtenu reste tenu jusqu'à la fin
+    de la transaction de la migration : les instructions longues viennent
+    après un COMMIT (autocommit_block()).
+    """
+    timeout_ms = timeout_ms or settings.MIGRATION_LOCK_TIMEOUT_MS
+    attempts = attempts or settings.MIGRATION_LOCK_ATTEMPTS
+    pause = settings.MIGRATION_LOCK_RETRY_SECONDS if pause is None else pause
+    if _offline():
+        op.execute(lock_timeout_sql(timeout_ms))
+        for statement in statements:
+            op.execute(statement)
+        return
+    connection = op.get_bind()
+    for attempt in range(1, attempts + 1):
+        try:
+            with connection.begin_nested():
+                connection.execute(text(lock_timeout_sql(timeout_ms)))
+                for statement in statements:
+                    connection.execute(text(statement))
+            return
+        except OperationalError as exc:
+            if getattr(exc.orig, "pgcode", None) != LOCK_NOT_AVAILABLE or attempt == attempts:
+                raise
+            logger.warning("Verrou non obtenu (essai %d/%d), nouvel essai", attempt, attempts)
+            time.sleep(pause)
+
+
+def create_index_concurrently(
+    name: str, table: str, columns: str, unique: bool = False, where: Optional[str] = None
+) -> None:
+    """
+    CREATE INDEX CONCURRENTLY hors transaction : la table reste lisible et
+    modifiable pendant la construction. `columns` est la liste SQL entre
+    parenthèses ("(owner_id, created_at)") ou une méthode ("USING gin (...)").
+    Un index invalide laissé par une construction interrompue est supprimé
+    puis reconstruit (IF NOT EXISTS le garderait tel quel).
+    """
+    unique_sql = "UNIQUE " if unique else ""
+    where_sql = f" WHERE {where}" if where else ""
+    with op.get_context().autocommit_block():
+        if not _offline():
+            invalid = op.get_bind().execute(
+                text(
+                    "SELECT NOT i.indisvalid FROM pg_index i "
+                    "WHERE i.indexrelid = to_regclass(:name)"
+                ),
+                {"name": name},
+            ).scalar()
+            if invalid:
+                logger.warning("Index %s invalide : reconstruction", name)
+                op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        op.execute(
+            f"CREATE {unique_sql}INDEX CONCURRENTLY IF NOT EXISTS {name} "
+            f"ON {table} {columns}{where_sql}"
+        )
+
+
+def drop_index_concurrently(name: str) -> None:
+    with op.get_context().autocommit_block():
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def add_not_null(table: str, column: str) -> None:
+    """
+    SET NOT NULL sans parcourir la table sous ACCESS EXCLUSIVE : une
+    contrainte CHECK NOT VALID (verrou bref) est validée sous SHARE UPDATE
+    EXCLUSIVE, qui laisse passer les écritures ; SET NOT NULL s'appuie
+    ensuite sur elle au lieu de relire la table.
+    """
+    name = table.strip('"')
+    constraint = f"{name}_{column}_not_null"
+    with_lock_retries(
+        f"ALTER TABLE {table} ADD CONSTRAINT {constraint} "
+        f"CHECK ({column} IS NOT NULL) NOT VALID"
+    )
+    with op.get_context().autocommit_block():
+        op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {constraint}")
+    with_lock_retries(
+        f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL",
+        f"ALTER TABLE {table} DROP CONSTRAINT {constraint}",
+    )
+
+
+def backfill_sql(table: str, assignments: str, where: str) -> str:
+    """
+    Un lot de backfill : met à jour les `:size` lignes suivantes (par id
+    croissant après `:last_id`) et enregistre le dernier id traité dans le
+    même UPDATE, de sorte qu'une reprise ne refait ni ne saute aucun lot.
+    """
+    return (
+        f"WITH batch AS (UPDATE {table} SET {assignments} WHERE id IN ("
+        f"SELECT id FROM {table} WHERE id > :last_id AND ({where}) ORDER BY id LIMIT :size"
+        ") RETURNING id) "
+        "INSERT INTO migrationcheckpoint (name, last_id, updated_at) "
+        "SELECT :name, max(id), now() FROM batch HAVING count(*) > 0 "
+        "ON CONFLICT (name) DO UPDATE SET last_id = excluded.last_id, "
+        "updated_at = excluded.updated_at "
+        "RETURNING last_id"
+    )
+
+
+def backfill(
+    name: str,
+    table: str,
+    assignments: str,
+    where: str = "true",
+    batch_size: Optional[int] = None,
+    pause: Optional[float] = None,
+) -> int:
+    """
+    UPDATE {table} SET {assignments} WHERE {where}, par lots de
+    MIGRATION_BACKFILL_BATCH_SIZE lignes validés un à un (hors transaction
+    de la migration), avec une pause de MIGRATION_BACKFILL_PAUSE_SECONDS
+    entre deux lots. `name` identifie le point de reprise dans
+    migrationcheckpoint : une migration interrompue reprend après le
+    dernier lot validé. Retourne le nombre de lots exécutés.
+    """
+    batch_size = batch_size or settings.MIGRATION_BACKFILL_BATCH_SIZE
+    pause = settings.MIGRATION_BACKFILL_PAUSE_SECONDS if pause is None else pause
+    statement = backfill_sql(table, assignments, where)
+    with op.get_context().autocommit_block():
+        if _offline():
+            # Premier lot seulement : les suivants sont identiques
+            op.execute(text(statement).bindparams(last_id=0, size=batch_size, name=name))
+            return 0
+        connection = op.get_bind()
+        last_id = connection.execute(
+            text("SELECT last_id FROM migrationcheckpoint WHERE name = :name"), {"name": name}
+        ).scalar() or 0
+        batches = 0
+        while True:
+            last_id = connection.execute(
+                text(statement), {"last_id": last_id, "size": batch_size, "name": name}
+            ).scalar()
+            if last_id is None:
+                return batches
+            batches += 1
+            logger.info("Backfill %s : lot %d, jusqu'à l'id %d", name, batches, last_id)
+            time.sleep(pause)
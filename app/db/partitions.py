@@ -0,0 +1,187 @@
+import logging
+import re
+from collections import namedtuple
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Partition d'une table partitionnée par intervalle ; `lower` vaut None pour
+# MINVALUE (partition historique créée par la migration)
+Partition = namedtuple("Partition", ["name", "lower", "upper"])
+
+_BOUND = re.compile(r"FROM \((MINVALUE|'[^']+')\) TO \('([^']+)'\)")
+
+
+def month_start(moment: datetime, offset: int = 0) -> datetime:
+    """
+    Premier instant du mois de `moment`, décalé de `offset` mois.
+    """
+    index = moment.year * 12 + moment.month - 1 + offset
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def parse_bound(expression: str) -> Optional[tuple]:
+    """
+    (borne inférieure, borne supérieure) d'après pg_get_expr(relpartbound) ;
+    None pour la partition par défaut.
+    """
+    match = _BOUND.search(expression)
+    if match is None:
+        return None
+    lower = None if match.group(1) == "MINVALUE" else datetime.fromisoformat(match.group(1)[1:-1])
+    return lower, datetime.fromisoformat(match.group(2))
+
+
+def is_partitioned(db: Session, table: str) -> bool:
+    return bool(
+        db.execute(
+            text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": table},
+        ).scalar()
+    )
+
+
+def list_partitions(db: Session, table: str) -> List[Partition]:
+    rows = db.execute(
+        text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:table)"
+        ),
+        {"table": table},
+    ).all()
+    partitions = []
+    for name, expression in rows:
+        bound = parse_bound(expression)
+        if bound is not None:
+            partitions.append(Partition(name, *bound))
+    return sorted(partitions, key=lambda p: p.upper)
+
+
+def missing_partitions(
+    table: str, existing: List[Partition], now: datetime, months_ahead: int
+) -> List[Partition]:
+    """
+    Partitions mensuelles à créer pour couvrir le mois courant et les
+    `months_ahead` suivants, à partir de la fin de la dernière existante.
+    """
+    start = max([p.upper for p in existing], default=month_start(now))
+    end = month_start(now, months_ahead + 1)
+    missing = []
+    while start < end:
+        upper = month_start(start, 1)
+        missing.append(Partition(partition_name(table, start), start, upper))
+        start = upper
+    return missing
+
+
+def expired_partitions(
+    existing: List[Partition], now: datetime, retention_months: int
+) -> List[Partition]:
+    """
+    Partitions entièrement antérieures à la période de rétention
+    (0 : tout conserver).
+    """
+    if retention_months <= 0:
+        return []
+    cutoff = month_start(now, -retention_months)
+    return [p for p in existing if p.upper <= cutoff]
+
+
+def create_partitions(db: Session, table: str, now: datetime, months_ahead: int) -> List[str]:
+    """
+    Crée les partitions à venir de `table` (PostgreSQL) ; retourne leurs noms.
+    """
+    # Un seul worker à la fois : les autres trouvent les partitions déjà créées
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:table))"), {"table": table})
+    created = []
+    for partition in missing_partitions(table, list_partitions(db, table), now, months_ahead):
+        db.execute(
+            text(
+                f'CREATE TABLE IF NOT EXISTS "{partition.name}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{partition.lower.isoformat()}') "
+                f"TO ('{partition.upper.isoformat()}')"
+            )
+        )
+        created.append(partition.name)
+    db.commit()
+    metrics.inc("partitions_created", table, len(created))
+    return created
+
+
+def _retention_mark(table: str) -> str:
+    return f"rétention de {table}, à supprimer"
+
+
+def marked_partitions(db: Session, table: str) -> List[tuple]:
+    """
+    Tables marquées pour suppression par la rétention de `table` :
+    (nom, état du rattachement) où l'état vaut None une fois la table
+    détachée, True si un DETACH CONCURRENTLY est resté en attente.
+    """
+    return db.execute(
+        text(
+            "SELECT c.relname, i.inhdetachpending FROM pg_class c "
+            "LEFT JOIN pg_inherits i ON i.inhrelid = c.oid "
+            "AND i.inhparent = to_regclass(:table) "
+            "WHERE c.relkind = 'r' "
+            "AND c.relnamespace = (SELECT relnamespace FROM pg_class "
+            "WHERE oid = to_regclass(:table)) "
+            "AND obj_description(c.oid, 'pg_class') = :mark "
+            "ORDER BY c.relname"
+        ),
+        {"table": table, "mark": _retention_mark(table)},
+    ).all()
+
+
+def drop_expired_partitions(
+    engine: Engine, table: str, now: datetime, retention_months: int, before_drop=None
+) -> List[str]:
+    """
+    Détache puis supprime les partitions expirées de `table`.
+
+    DETACH ... CONCURRENTLY ne bloque ni les lectures ni les écritures sur la
+    table parente mais ne peut pas s'exécuter dans une transaction : chaque
+    partition est détachée en autocommit, puis `before_drop(db, name)` (mise
+    à jour des compteurs...) et DROP TABLE s'exécutent dans une même
+    transaction.
+
+    Les partitions expirées sont d'abord marquées (COMMENT ON TABLE) : après
+    un arrêt entre le détachement et la suppression, l'exécution suivante
+    retrouve les tables marquées, termine un détachement resté en attente
+    (FINALIZE) puis les supprime comme les autres.
+    """
+    mark = _retention_mark(table).replace("'", "''")
+    with Session(engine) as db:
+        for partition in expired_partitions(list_partitions(db, table), now, retention_months):
+            db.execute(text(f'COMMENT ON TABLE "{partition.name}" IS \'{mark}\''))
+        db.commit()
+        marked = marked_partitions(db, table)
+    dropped = []
+    for name, detach_pending in marked:
+        if detach_pending is not None:
+            mode = "FINALIZE" if detach_pending else "CONCURRENTLY"
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+                connection.execute(
+                    text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}" {mode}')
+                )
+        with Session(engine) as db:
+            if before_drop is not None:
+                before_drop(db, name)
+            db.execute(text(f'DROP TABLE "{name}"'))
+            db.commit()
+        logger.info("Partition %s supprimée (rétention)", name)
+        dropped.append(name)
+    metrics.inc("partitions_dropped", table, len(dropped))
+    return dropped
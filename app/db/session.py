@@ -1,15 +1,79 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from typing import Dict
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
+from app.core.deadline import statement_timeout_ms
+from app.db.sharding import DEFAULT_SHARD, ShardRouter, ShardSession, shard_name
+
+
+def _create_engine(uri: str) -> Engine:
+    return create_engine(
+        uri,
+        pool_pre_ping=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+
+
+# Moteur de DATABASE_URI : base unique, ou shard0 en mode réparti
+engine = _create_engine(str(settings.DATABASE_URI))
+engines: Dict[str, Engine] = {DEFAULT_SHARD: engine}
+for index, uri in enumerate(
+    (uri.strip() for uri in settings.DATABASE_SHARD_URIS.split(",") if uri.strip()), start=1
+):
+    engines[shard_name(index)] = _create_engine(uri)
+
+if len(engines) > 1:
+    router = ShardRouter(engines)
+    SessionLocal = sessionmaker(class_=ShardSession, router=router, autocommit=False, autoflush=False)
+else:
+    router = None
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-engine = create_engine(str(settings.DATABASE_URI), pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def apply_deadline(session: Session, transaction, connection) -> None:
+    """
+    Borne chaque transaction de la requête par le temps restant avant son
+    échéance : Postgres annule la requête SQL plutôt que de la terminer
+    pour un client qui n'attend plus.
+    """
+    timeout_ms = statement_timeout_ms()
+    if timeout_ms is not None and connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout_ms}")
+
+
+def release(db: Session) -> None:
+    """
+    Rend la connexion au pool dès la dernière lecture ou le dernier commit,
+    avant la sérialisation de la réponse. Les objets déjà chargés restent
+    lisibles (détachés) ; la session reste utilisable et reprendra une
+    connexion au prochain accès.
+    """
+    db.close()
 
 
 def get_db():
+    """
+    Session de la requête. Aucune connexion n'est prise au pool avant la
+    première requête SQL ; release() la rend avant la fin de la requête.
+    """
     db = SessionLocal()
+    event.listen(db, "after_begin", apply_deadline)
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+
+def fork_session(db: Session) -> Session:
+    """
+    Nouvelle session sur le même moteur (ou les mêmes shards) que `db`, pour
+    le travail exécuté après la réponse (tâches d'arrière-plan).
+    """
+    if isinstance(db, ShardSession):
+        return db.fork()
+    return SessionLocal(bind=db.get_bind())
@@ -0,0 +1,312 @@
+import heapq
+import itertools
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+from sqlalchemy import Table, event, func, inspect, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.horizontal_shard import ShardedSession, set_shard_id
+from sqlalchemy.orm import ORMExecuteState, Query, Session
+from sqlalchemy.sql import operators, visitors
+from sqlalchemy.sql.elements import (
+    BinaryExpression,
+    BindParameter,
+    BooleanClauseList,
+    ColumnClause,
+)
+
+from app.models.item import Item
+from app.models.item_archive import ItemArchive
+from app.models.item_counter import ItemCounter
+from app.models.user import User
+
+# Tables réparties par utilisateur : un utilisateur, ses items, son compteur
+# et ses archives sont sur le même shard. Les autres tables (tâches,
+# statistiques, clés d'idempotence...) sont sur le shard par défaut.
+SHARDED_TABLES = {
+    table.name
+    for table in (User.__table__, Item.__table__, ItemCounter.__table__, ItemArchive.__table__)
+}
+
+# Colonnes dont la valeur désigne le shard : identifiants d'utilisateur et
+# identifiants d'items (alloués par shard, voir ShardRouter.shard_for)
+ROUTING_COLUMNS = {
+    ("user", "id"),
+    ("item", "id"),
+    ("item", "owner_id"),
+    ("itemcounter", "owner_id"),
+    ("itemarchive", "id"),
+    ("itemarchive", "owner_id"),
+}
+
+DEFAULT_SHARD = "shard0"
+
+
+def shard_name(index: int) -> str:
+    return f"shard{index}"
+
+
+class ShardRouter:
+    """
+    Placement des lignes sur N bases. Un nouvel utilisateur est placé à tour
+    de rôle sur un shard, dont la séquence n'alloue que des identifiants
+    de reste (id - 1) % N (INCREMENT BY N, scripts/init_shards.py) ; ses
+    items aussi : un identifiant d'utilisateur ou d'item suffit ensuite à
+    retrouver le shard.
+    """
+
+    def __init__(self, engines: Dict[str, Engine]) -> None:
+        self.engines = engines
+        self.shard_ids = list(engines)
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+    def shard_for(self, entity_id: int) -> str:
+        return self.shard_ids[(int(entity_id) - 1) % len(self.shard_ids)]
+
+    def next_shard(self) -> str:
+        # Nouveaux utilisateurs répartis à tour de rôle
+        with self._lock:
+            index = next(self._next)
+        return self.shard_ids[index % len(self.shard_ids)]
+
+    def choose(self, mapper, instance, clause=None, **kw) -> str:
+        """
+        Shard d'une nouvelle ligne (ShardedSession.shard_chooser).
+        """
+        if instance is not None:
+            if isinstance(instance, User):
+                return self.next_shard() if instance.id is None else self.shard_for(instance.id)
+            owner_id = getattr(instance, "owner_id", None)
+            if owner_id is not None:
+                return self.shard_for(owner_id)
+        return DEFAULT_SHARD
+
+    def identify(self, mapper, primary_key, **kw) -> List[str]:
+        """
+        Shard d'une ligne d'après sa clé primaire (ShardedSession.identity_chooser).
+        """
+        if mapper.local_table.name in SHARDED_TABLES:
+            return [self.shard_for(primary_key[0])]
+        return [DEFAULT_SHARD]
+
+    def route(self, orm_context: ORMExecuteState) -> Iterable[str]:
+        """
+        Shards où exécuter une requête (ShardedSession.execute_chooser) :
+        ceux désignés par les valeurs d'un INSERT, ou par une égalité ou un
+        IN du WHERE sur une colonne de routage ; sinon tous pour les tables
+        réparties (requête diffusée, résultats concaténés), sinon le shard
+        par défaut.
+        """
+        statement = orm_context.statement
+        if not _touches_sharded_table(statement):
+            return [DEFAULT_SHARD]
+        if orm_context.is_insert and getattr(statement, "select", None) is None:
+            shards = {
+                self.shard_for(value)
+                for value in _insert_values(statement, orm_context.parameters)
+            }
+            # Diffusé, un INSERT écrirait ses lignes sur chaque shard
+            if len(shards) != 1:
+                raise ValueError(
+                    f"INSERT sur {statement.table.name} : les lignes doivent "
+                    "appartenir à un seul shard"
+                )
+            return list(shards)
+        targets = _where_values(getattr(statement, "whereclause", None))
+        if targets:
+            return sorted({self.shard_for(value) for value in targets})
+        return self.shard_ids
+
+    def session(self, **kwargs: Any) -> "ShardSession":
+        return ShardSession(self, **kwargs)
+
+
+def _touches_sharded_table(statement) -> bool:
+    for element in visitors.iterate(statement):
+        if isinstance(element, Table) and element.name in SHARDED_TABLES:
+            return True
+    return False
+
+
+def _where_values(clause) -> Set[int]:
+    """
+    Valeurs des colonnes de routage comparées par = ou IN dans les termes
+    de premier niveau d'un WHERE (conjonction) : sous un OR ou un NOT, une
+    comparaison ne restreint pas les shards.
+    """
+    values: Set[int] = set()
+    if isinstance(clause, BooleanClauseList) and clause.operator is operators.and_:
+        for term in clause.clauses:
+            values.update(_where_values(term))
+    elif isinstance(clause, BinaryExpression):
+        values.update(_routing_values(clause))
+    return values
+
+
+def _routing_values(expression: BinaryExpression) -> List[int]:
+    left, right = expression.left, expression.right
+    if not isinstance(right, BindParameter) or not isinstance(left, ColumnClause):
+        return []
+    table = getattr(left, "table", None)
+    if (getattr(table, "name", None), left.name) not in ROUTING_COLUMNS:
+        return []
+    value = right.effective_value
+    if expression.operator is operators.eq and value is not None:
+        return [value]
+    if expression.operator is operators.in_op and value:
+        return list(value)
+    return []
+
+
+def _insert_values(statement, parameters) -> Iterator[int]:
+    # Valeurs de .values() (une ou plusieurs lignes) et paramètres
+    # d'exécution (INSERT ORM en masse)
+    table = statement.table.name
+    rows: List[Any] = []
+    if statement._values:
+        rows.append(statement._values)
+    for multi in statement._multi_values:
+        rows.extend(multi)
+    if isinstance(parameters, dict):
+        rows.append(parameters)
+    elif parameters:
+        rows.extend(parameters)
+    for row in rows:
+        for key, value in row.items():
+            if (table, getattr(key, "key", key)) not in ROUTING_COLUMNS:
+                continue
+            if isinstance(value, BindParameter):
+                value = value.effective_value
+            if value is not None:
+                yield value
+
+
+class ShardSession(ShardedSession):
+    """
+    Session répartie sur les shards du routeur. Les requêtes SQL brutes
+    (text(), sans entité) vont au shard par défaut, sauf
+    bind_arguments={"shard_id": ...}.
+    """
+
+    def __init__(self, router: ShardRouter, **kwargs: Any) -> None:
+        super().__init__(
+            shard_chooser=router.choose,
+            identity_chooser=router.identify,
+            execute_chooser=router.route,
+            shards=router.engines,
+            **kwargs,
+        )
+        self.router = router
+
+    def get_bind(self, mapper=None, *, shard_id=None, instance=None, clause=None, **kw):
+        if shard_id is None and mapper is None and instance is None:
+            shard_id = DEFAULT_SHARD
+        return super().get_bind(mapper, shard_id=shard_id, instance=instance, clause=clause, **kw)
+
+    def fork(self, **kwargs: Any) -> "ShardSession":
+        return ShardSession(self.router, **kwargs)
+
+
+def is_sharded(db: Session) -> bool:
+    return isinstance(db, ShardSession)
+
+
+def shard_ids(db: Session) -> List[Optional[str]]:
+    """
+    Shards de la session, ou [None] hors mode réparti : à passer à on_shard()
+    pour exécuter une requête SQL brute sur chacun.
+    """
+    if isinstance(db, ShardSession):
+        return list(db.router.shard_ids)
+    return [None]
+
+
+def on_shard(shard_id: Optional[str]) -> Dict[str, Any]:
+    """
+    bind_arguments d'une requête à exécuter sur `shard_id` (None : base unique).
+    """
+    return {"shard_id": shard_id} if shard_id is not None else {}
+
+
+def shard_of(db: Session, user_id: int) -> Optional[str]:
+    """
+    Shard d'un utilisateur et de ses données (None hors mode réparti).
+    """
+    if isinstance(db, ShardSession):
+        return db.router.shard_for(user_id)
+    return None
+
+
+def new_user_shard(db: Session) -> Optional[str]:
+    """
+    Shard d'un nouvel utilisateur inséré sans l'ORM (None hors mode réparti).
+    """
+    if isinstance(db, ShardSession):
+        return db.router.next_shard()
+    return None
+
+
+def per_shard(db: Session, query: Query) -> List[Query]:
+    """
+    La requête restreinte à chacun des shards, ou telle quelle hors mode
+    réparti.
+    """
+    if not isinstance(db, ShardSession):
+        return [query]
+    return [query.options(set_shard_id(shard_id)) for shard_id in db.router.shard_ids]
+
+
+def paginate(
+    queries: List[Query], key: Callable[[Any], Any], skip: int, limit: int, reverse: bool = False
+) -> list:
+    """
+    Page [skip, skip + limit) de l'union de requêtes triées dans le même
+    ordre (`key`, décroissant si `reverse`). Chaque source est lue jusqu'à
+    skip + limit lignes puis fusionnée : le coût croît avec skip et le
+    nombre de sources.
+    """
+    if len(queries) == 1:
+        return queries[0].offset(skip).limit(limit).all()
+    sources = [query.limit(skip + limit).all() for query in queries]
+    merged = heapq.merge(*sources, key=key, reverse=reverse)
+    return list(itertools.islice(merged, skip, skip + limit))
+
+
+def reserve_ids(
+    db: Session, table: Table, shard_id: Optional[str], count: int
+) -> Optional[List[int]]:
+    """
+    Identifiants à donner explicitement à `count` nouvelles lignes de `table`
+    sur `shard_id`, hors PostgreSQL (développement, tests) : sans séquence à
+    pas de N, ils sont choisis après le plus grand identifiant du shard, dans
+    son reste. Non sûr en écriture concurrente. None si la base les alloue
+    elle-même (base unique, ou séquences préparées par scripts/init_shards.py).
+    """
+    if not isinstance(db, ShardSession) or shard_id is None:
+        return None
+    connection = db.connection(bind_arguments={"shard_id": shard_id})
+    return _strided_ids(connection, table, db.router, shard_id, count)
+
+
+def _strided_ids(connection, table: Table, router: ShardRouter, shard_id: str, count: int):
+    if connection.dialect.name == "postgresql":
+        return None
+    index, step = router.shard_ids.index(shard_id), len(router.shard_ids)
+    last = connection.execute(select(func.max(table.c.id))).scalar() or 0
+    # Plus petit identifiant > last tel que (id - 1) % step == index
+    first = last + 1 + (index - last) % step
+    return [first + offset * step for offset in range(count)]
+
+
+@event.listens_for(User, "before_insert")
+@event.listens_for(Item, "before_insert")
+def _allocate_id(mapper, connection, target) -> None:
+    db = Session.object_session(target)
+    if not isinstance(db, ShardSession) or target.id is not None:
+        return
+    # Shard déjà choisi pour la ligne (ShardRouter.choose)
+    shard_id = inspect(target).identity_token
+    ids = _strided_ids(connection, mapper.local_table, db.router, shard_id, 1)
+    if ids is not None:
+        target.id = ids[0]
@@ -0,0 +1,88 @@
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.db.sharding import SHARDED_TABLES, on_shard, shard_ids
+
+
+def dialect_name(db: Session) -> str:
+    return db.get_bind().dialect.name
+
+
+def dialect_insert(db: Session, table: Any):
+    """
+    INSERT du dialecte courant, qui expose on_conflict_do_update /
+    on_conflict_do_nothing sous PostgreSQL et SQLite.
+    """
+    name = dialect_name(db)
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+        return pg_insert(table)
+    if name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        return sqlite_insert(table)
+    return insert(table)
+
+
+def estimate_count(db: Session, table: Any) -> Tuple[int, bool]:
+    """
+    Nombre de lignes d'une table en O(1) depuis les statistiques du planner.
+    Retourne (total, approximatif) ; compte exactement si aucune
+    statistique n'est disponible (table jamais analysée, autre dialecte).
+    Une table partitionnée n'a pas de statistiques propres : on additionne
+    celles de ses partitions (une partition jamais analysée compte pour 0).
+    En mode réparti, les totaux des shards sont additionnés.
+    """
+    shards = shard_ids(db) if table.name in SHARDED_TABLES else [None]
+    total, approximate = 0, False
+    for shard_id in shards:
+        count, estimated = _estimate_shard_count(db, table, on_shard(shard_id))
+        total += count
+        approximate = approximate or estimated
+    return total, approximate
+
+
+def _estimate_shard_count(db: Session, table: Any, bind_arguments: dict) -> Tuple[int, bool]:
+    if dialect_name(db) == "postgresql":
+        estimate = db.execute(
+            text(
+                "SELECT CASE WHEN t.relkind = 'p' THEN ("
+                "SELECT sum(greatest(c.reltuples, 0))::bigint FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = t.oid"
+                ") ELSE t.reltuples::bigint END "
+                "FROM pg_class t WHERE t.oid = to_regclass(:name)"
+            ),
+            {"name": f'"{table.name}"'},
+            bind_arguments=bind_arguments,
+        ).scalar()
+        if estimate is not None and estimate >= 0:
+            return int(estimate), True
+    count = db.execute(
+        select(func.count()).select_from(table), bind_arguments=bind_arguments
+    ).scalar_one()
+    return count, False
+
+
+def count_rows(query: Query) -> int:
+    """
+    Nombre de lignes d'une requête ORM filtrée. Une requête diffusée sur
+    plusieurs shards retourne un COUNT par shard : ils sont additionnés
+    (Query.count() ne lirait que le premier).
+    """
+    return sum(count for count, in query.order_by(None).with_entities(func.count()))
+
+
+def check_version(obj: Any, expected: Optional[int]) -> None:
+    """
+    Compare la version attendue par le client à celle de la ligne lue ;
+    la comparaison avec la ligne en base est faite par l'UPDATE lui-même
+    (version_id_col), sans verrou.
+    """
+    if expected is not None and expected != obj.version:
+        raise StaleDataError(
+            f"{type(obj).__name__} {obj.id} : version {obj.version}, attendue {expected}"
+        )
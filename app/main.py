@@ -1,14 +1,36 @@
-from fastapi import FastAPI
+import time
+
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.orm import Session
 
 from app.api.v1.api import api_router
+from app.api.v1.deps import require_metrics_access
 from app.core.config import settings
+from app.core.deadline import DeadlineMiddleware
+from app.core.lifespan import lifespan, state
+from app.core.load_shedding import LoadSheddingMiddleware, limiter
+from app.core.metrics import metrics
+from app.db.session import get_db
 
 app = FastAPI(
     title=settings.APP_NAME,
     openapi_url=f"/openapi.json",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
+)
+
+# Échéance par requête, annulation et 504 au-delà
+app.add_middleware(DeadlineMiddleware)
+
+# Rejet des requêtes en excès (déclaré avant CORS pour que les 503 portent les en-têtes CORS)
+app.add_middleware(
+    LoadSheddingMiddleware,
+    limiter=limiter,
+    priority_paths=[p for p in settings.LOAD_SHED_PRIORITY_PATHS.split(",") if p],
 )
 
 # Configuration CORS
@@ -18,6 +40,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Total-Count-Approximate"],
 )
 
 # API routes
@@ -29,4 +52,35 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "ok"} 
\ No newline at end of file
+    return {"status": "ok"}
+
+@app.get("/ready")
+def readiness_check(db: Session = Depends(get_db)):
+    """
+    Prêt à recevoir du trafic : préchauffage terminé et base joignable
+    avec une latence acceptable.
+    """
+    if not state.ready:
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    started = time.perf_counter()
+    try:
+        db.execute(text("SELECT 1"))
+    except Exception:
+        return JSONResponse(status_code=503, content={"status": "database_unavailable"})
+    finally:
+        db.rollback()
+    latency_ms = round((time.perf_counter() - started) * 1000, 2)
+    metrics.set_gauge("ready_db_latency_ms", latency_ms)
+    if latency_ms > settings.READY_MAX_DB_LATENCY_MS:
+        return JSONResponse(
+            status_code=503, content={"status": "database_slow", "db_latency_ms": latency_ms}
+        )
+    return {"status": "ready", "db_latency_ms": latency_ms}
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_access)])
+async def read_metrics():
+    """
+    Compteurs internes : réservé aux collecteurs (METRICS_TOKEN) et aux
+    superutilisateurs.
+    """
+    return metrics.snapshot()
@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, Date, DateTime, Integer
+
+from app.db.base_class import Base
+
+
+class DailyStats(Base):
+    # Agrégats par jour (UTC) pour les statistiques d'administration,
+    # recalculés par services/stats.py sur les derniers jours uniquement
+    day = Column(Date, primary_key=True)
+    # Items créés ce jour-là et encore présents au dernier recalcul
+    items_created = Column(BigInteger, nullable=False, default=0)
+    # Utilisateurs distincts ayant créé au moins un item ce jour-là
+    active_users = Column(Integer, nullable=False, default=0)
+    users_created = Column(Integer, nullable=False, default=0)
+    refreshed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Index, Integer, LargeBinary, String
+
+from app.db.base_class import Base
+
+
+class IdempotencyKey(Base):
+    # Clé Idempotency-Key d'une requête POST, par appelant (`scope`), avec
+    # l'empreinte de la requête et la réponse à rejouer (services/idempotency.py)
+    scope = Column(String(100), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    # in_progress, puis done
+    status = Column(String(20), nullable=False, default="in_progress")
+    response_status = Column(Integer, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    # Au-delà, une requête restée en cours (worker arrêté) peut être reprise
+    locked_until = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+# Purge des clés expirées
+Index("ix_idempotencykey_expires_at", IdempotencyKey.expires_at)
@@ -1,18 +1,52 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, Sequence, String, Text
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
 
+# Document de recherche plein texte (PostgreSQL). L'index GIN
+# ix_item_search_document est construit sur exactement cette expression.
+SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('simple'::regconfig, coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(description, '')), 'B')"
+)
+
 
 class Item(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True, nullable=False)
     description = Column(Text, nullable=True)
-    owner_id = Column(Integer, ForeignKey("user.id"), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    owner_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    # Clé de partition (mensuelle) de la table sous PostgreSQL
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Incrémentée à chaque modification par l'ORM (verrouillage optimiste)
+    version = Column(Integer, nullable=False, default=1)
     
     # Relations
-    owner = relationship("User", back_populates="items") 
\ No newline at end of file
+    owner = relationship("User", back_populates="items")
+
+    # La clé primaire de la table partitionnée est (id, created_at) : les
+    # UPDATE / DELETE et rechargements de l'ORM ciblent ainsi une seule partition.
+    # Ils portent aussi sur la version lue : une modification concurrente
+    # fait échouer l'écriture (StaleDataError) au lieu d'être écrasée.
+    __mapper_args__ = {"primary_key": [id, created_at], "version_id_col": version}
+
+
+# Index composites servant les listes filtrées/triées (voir services/item.py).
+# Le tri par titre utilise la collation "C" pour que les préfixes se
+# traduisent en intervalles d'index ; elle n'existe que sous PostgreSQL.
+Index("ix_item_owner_created_at_id", Item.owner_id, Item.created_at, Item.id)
+Index("ix_item_owner_updated_at_id", Item.owner_id, Item.updated_at, Item.id)
+Index("ix_item_created_at_id", Item.created_at, Item.id)
+Index("ix_item_updated_at_id", Item.updated_at, Item.id)
+Index(
+    "ix_item_owner_title_c_id", Item.owner_id, Item.title.collate("C"), Item.id
+).ddl_if(dialect="postgresql")
+Index("ix_item_title_c_id", Item.title.collate("C"), Item.id).ddl_if(
+    dialect="postgresql"
+)
+
+# Identifiants des événements du flux des items (NOTIFY), communs à tous les workers
+ITEM_EVENT_SEQ = Sequence("item_event_seq", metadata=Base.metadata)
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
+
+from app.db.base_class import Base
+
+
+class ItemArchive(Base):
+    # Items anciens déplacés hors de la table item (services/item_archive.py) ;
+    # mêmes colonnes et mêmes identifiants, en lecture seule
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String, nullable=False)
+    description = Column(Text, nullable=True)
+    owner_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime)
+    version = Column(Integer, nullable=False, default=1)
+    archived_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+# Listes par date de création (avec ou sans propriétaire) incluant les archives
+Index("ix_itemarchive_owner_created_at_id", ItemArchive.owner_id, ItemArchive.created_at, ItemArchive.id)
+Index("ix_itemarchive_created_at_id", ItemArchive.created_at, ItemArchive.id)
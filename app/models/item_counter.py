@@ -0,0 +1,16 @@
+from sqlalchemy import BigInteger, Column, ForeignKey, Index, Integer
+
+from app.db.base_class import Base
+
+
+class ItemCounter(Base):
+    # Nombre d'items par propriétaire, maintenu dans la même transaction
+    # que les créations/suppressions (services/item.py)
+    owner_id = Column(
+        Integer, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    count = Column(BigInteger, nullable=False, default=0)
+
+
+# Classement des propriétaires par nombre d'items (statistiques)
+Index("ix_itemcounter_count", ItemCounter.count)
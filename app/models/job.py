@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, BigInteger, Column, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.db.base_class import Base
+
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+
+class Job(Base):
+    # Tâche de fond persistée, réclamée par les workers avec
+    # SELECT ... FOR UPDATE SKIP LOCKED (voir services/job.py)
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(100), nullable=False)
+    payload = Column(JSONType, nullable=False, default=dict)
+    # queued, running, done ou failed
+    status = Column(String(20), nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    # Prochaine exécution possible (délai avant une nouvelle tentative)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Bail du worker qui exécute la tâche : au-delà, elle peut être reprise
+    locked_by = Column(String(100), nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    progress_done = Column(BigInteger, nullable=False, default=0)
+    progress_total = Column(BigInteger, nullable=True)
+    result = Column(JSONType, nullable=True)
+    error = Column(Text, nullable=True)
+    created_by = Column(Integer, ForeignKey("user.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+
+# Réclamation : tâches prêtes par ordre d'échéance
+Index("ix_job_status_run_at", Job.status, Job.run_at)
@@ -0,0 +1,13 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, String
+
+from app.db.base_class import Base
+
+
+class MigrationCheckpoint(Base):
+    # Avancement d'un backfill par lots (app/db/online.py) : dernier
+    # identifiant traité, pour reprendre après une interruption
+    name = Column(String(200), primary_key=True)
+    last_id = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import List
 
-from sqlalchemy import Boolean, Column, DateTime, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
@@ -16,6 +16,17 @@ class User(Base):
     is_superuser = Column(Boolean(), default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Incrémentée à chaque modification par l'ORM (verrouillage optimiste)
+    version = Column(Integer, nullable=False, default=1)
     
     # Relations
-    items = relationship("Item", back_populates="owner", cascade="all, delete-orphan") 
\ No newline at end of file
+    # La suppression des items est faite par la base (ON DELETE CASCADE)
+    items = relationship(
+        "Item", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True
+    )
+
+    __mapper_args__ = {"version_id_col": version} 
+
+
+# Inscriptions récentes (recalcul des statistiques par jour)
+Index("ix_user_created_at", User.created_at)
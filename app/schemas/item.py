@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -17,7 +17,8 @@ class ItemCreate(ItemBase):
 
 # Properties to receive on item update
 class ItemUpdate(ItemBase):
-    pass
+    # Version lue par le client : la mise à jour échoue (409) si l'item a changé depuis
+    version: Optional[int] = None
 
 
 # Properties shared by models stored in DB
@@ -27,6 +28,7 @@ class ItemInDBBase(ItemBase):
     owner_id: int
     created_at: datetime
     updated_at: datetime
+    version: int
     
     class Config:
         from_attributes = True
@@ -34,9 +36,21 @@ class ItemInDBBase(ItemBase):
 
 # Properties to return to client
 class Item(ItemInDBBase):
-    pass
+    # Renseigné pour un item archivé (lecture seule)
+    archived_at: Optional[datetime] = None
 
 
 # Properties stored in DB
 class ItemInDB(ItemInDBBase):
-    pass 
\ No newline at end of file
+    pass
+
+
+# Filtres et tri acceptés par la liste des items
+class ItemListParams(BaseModel):
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    updated_since: Optional[datetime] = None
+    title_prefix: Optional[str] = Field(None, min_length=1, max_length=200)
+    sort: Optional[
+        Literal["created_at", "-created_at", "updated_at", "-updated_at", "title", "-title"]
+    ] = None
@@ -0,0 +1,32 @@
+from datetime import date, datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class DailyStatsBucket(BaseModel):
+    day: date
+    items_created: int
+    active_users: int
+    users_created: int
+
+    class Config:
+        from_attributes = True
+
+
+class DailyStatsReport(BaseModel):
+    # Dernier recalcul des agrégats (None : jamais calculés)
+    refreshed_at: Optional[datetime] = None
+    buckets: List[DailyStatsBucket]
+
+
+class OwnerStats(BaseModel):
+    owner_id: int
+    email: str
+    items: int
+
+
+class OwnerStatsReport(BaseModel):
+    # Compteurs maintenus à chaque écriture : à jour à cet instant
+    as_of: datetime
+    owners: List[OwnerStats]
@@ -21,6 +21,8 @@ class UserCreate(UserBase):
 # Properties to receive via API on update
 class UserUpdate(UserBase):
     password: Optional[str] = None
+    # Version lue par le client : la mise à jour échoue (409) si l'utilisateur a changé depuis
+    version: Optional[int] = None
 
 
 # Properties shared by models stored in DB
@@ -28,6 +30,7 @@ class UserInDBBase(UserBase):
     id: int
     created_at: datetime
     updated_at: datetime
+    version: int
     
     class Config:
         from_attributes = True
@@ -40,4 +43,27 @@ class User(UserInDBBase):
 
 # Additional properties stored in DB
 class UserInDB(UserInDBBase):
-    hashed_password: str 
\ No newline at end of file
+    hashed_password: str
+
+
+
+# Création en masse (POST /users/bulk)
+class UserBulkCreate(BaseModel):
+    users: List[UserCreate] = Field(..., min_length=1)
+
+
+class UserBulkResult(BaseModel):
+    index: int
+    email: str
+    # "created", "exists" (email déjà pris) ou "duplicate" (répété dans la requête)
+    status: str
+    id: Optional[int] = None
+
+
+class UserBulkReport(BaseModel):
+    created: int
+    existing: int
+    duplicates: int
+    seconds: float
+    users_per_second: float
+    results: List[UserBulkResult]
@@ -0,0 +1,239 @@
+"""
+Lanceur de production.
+Usage: python -m app.serve
+
+Démarre un superviseur qui lance les workers uvicorn sur un socket partagé,
+les remplace s'ils s'arrêtent (recyclage WEB_MAX_REQUESTS compris) et les
+redémarre un par un sur SIGHUP.
+"""
+import importlib.util
+import logging
+import math
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import uvicorn
+
+from app.core.config import settings
+
+logger = logging.getLogger("uvicorn.error")
+
+# Les sockets partagés sont transmis aux workers lancés en "spawn"
+multiprocessing.allow_connection_pickling()
+spawn = multiprocessing.get_context("spawn")
+
+
+def cpu_limit(cgroup_root: str = "/sys/fs/cgroup") -> float:
+    """
+    Nombre de CPU réellement utilisables : affinité du processus, bornée par
+    le quota cgroup (v2 puis v1) quand le conteneur en définit un.
+    """
+    try:
+        available = float(len(os.sched_getaffinity(0)))
+    except AttributeError:
+        available = float(os.cpu_count() or 1)
+    quota = _cgroup_quota(cgroup_root)
+    if quota is not None:
+        available = min(available, quota)
+    return available
+
+
+def _cgroup_quota(root: str) -> Optional[float]:
+    try:
+        with open(os.path.join(root, "cpu.max")) as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open(os.path.join(root, "cpu", "cpu.cfs_quota_us")) as f:
+            quota = int(f.read())
+        with open(os.path.join(root, "cpu", "cpu.cfs_period_us")) as f:
+            period = int(f.read())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def worker_count(cpus: Optional[float] = None) -> int:
+    if settings.WEB_WORKERS > 0:
+        return settings.WEB_WORKERS
+    # Workers asynchrones : un par CPU suffit à occuper la machine
+    return max(1, math.ceil(cpu_limit() if cpus is None else cpus))
+
+
+def pool_sizes(workers: int) -> Tuple[int, int]:
+    """
+    (pool_size, max_overflow) par worker. Avec DB_MAX_CONNECTIONS, le budget
+    du nœud est réparti pour que la somme des pools ne le dépasse jamais.
+    """
+    pool_size, max_overflow = settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+    if settings.DB_MAX_CONNECTIONS > 0:
+        per_worker = max(1, settings.DB_MAX_CONNECTIONS // workers)
+        pool_size = min(pool_size, per_worker)
+        max_overflow = max(0, min(max_overflow, per_worker - pool_size))
+    return pool_size, max_overflow
+
+
+def _best_available(preferred: str, fallback: str) -> str:
+    return preferred if importlib.util.find_spec(preferred) else fallback
+
+
+def build_config(workers: int) -> uvicorn.Config:
+    return uvicorn.Config(
+        "app.main:app",
+        host=settings.APP_HOST,
+        port=settings.APP_PORT,
+        workers=workers,
+        loop=_best_available("uvloop", "asyncio"),
+        http=_best_available("httptools", "h11"),
+        backlog=settings.WEB_BACKLOG,
+        timeout_keep_alive=settings.WEB_KEEPALIVE_SECONDS,
+        limit_concurrency=settings.WEB_LIMIT_CONCURRENCY or None,
+        limit_max_requests=settings.WEB_MAX_REQUESTS or None,
+        timeout_graceful_shutdown=settings.WEB_GRACEFUL_TIMEOUT,
+        proxy_headers=True,
+        forwarded_allow_ips=settings.WEB_FORWARDED_ALLOW_IPS,
+        lifespan="on",
+    )
+
+
+class Worker(uvicorn.Server):
+    """
+    Serveur d'un worker : signale `ready` une fois le démarrage terminé,
+    lifespan (préchauffage) compris, avant d'accepter des connexions.
+    """
+
+    def __init__(self, config: uvicorn.Config, ready) -> None:
+        super().__init__(config)
+        self.ready = ready
+
+    async def startup(self, sockets=None) -> None:
+        await super().startup(sockets=sockets)
+        if self.started:
+            self.ready.set()
+
+
+def run_worker(config: uvicorn.Config, sockets: List, ready) -> None:
+    # Point d'entrée du processus worker (équivalent de celui d'uvicorn, dont
+    # le module uvicorn._subprocess est privé)
+    config.configure_logging()
+    Worker(config, ready).run(sockets=sockets)
+
+
+class Supervisor:
+    def __init__(self, config: uvicorn.Config) -> None:
+        self.config = config
+        self.sockets = [config.bind_socket()]
+        self.processes: List = []
+        self.should_exit = threading.Event()
+        self.should_reload = threading.Event()
+
+    def _spawn(self, ready=None):
+        process = spawn.Process(
+            target=run_worker,
+            kwargs={
+                "config": self.config,
+                "sockets": self.sockets,
+                "ready": ready if ready is not None else spawn.Event(),
+            },
+        )
+        process.start()
+        return process
+
+    def _stop(self, process) -> None:
+        # SIGTERM : uvicorn termine les requêtes en cours avant de sortir
+        process.terminate()
+        process.join(settings.WEB_GRACEFUL_TIMEOUT + 5)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+    def _wait_ready(self, process, ready) -> bool:
+        """
+        Attend que `process` ait démarré, au plus WEB_WORKER_BOOT_SECONDS ;
+        faux s'il s'est arrêté entre-temps ou n'est toujours pas prêt.
+        """
+        deadline = time.monotonic() + settings.WEB_WORKER_BOOT_SECONDS
+        while not ready.wait(0.1):
+            if not process.is_alive() or self.should_exit.is_set() or time.monotonic() >= deadline:
+                return False
+        return True
+
+    def rolling_restart(self) -> None:
+        """
+        Remplace les workers un par un : l'ancien ne s'arrête qu'une fois le
+        nouveau prêt sur le même socket, la capacité ne baisse jamais. Un
+        worker qui ne démarre pas interrompt le redémarrage et les anciens
+        restent en place.
+        """
+        logger.info("Redémarrage progressif de %d workers", len(self.processes))
+        for index, old in enumerate(list(self.processes)):
+            if self.should_exit.is_set():
+                return
+            ready = spawn.Event()
+            new = self._spawn(ready)
+            if not self._wait_ready(new, ready):
+                if not self.should_exit.is_set():
+                    logger.error(
+                        "Nouveau worker non démarré : redémarrage progressif interrompu"
+                    )
+                self._stop(new)
+                return
+            self.processes[index] = new
+            self._stop(old)
+
+    def run(self) -> None:
+        signal.signal(signal.SIGINT, lambda *_: self.should_exit.set())
+        signal.signal(signal.SIGTERM, lambda *_: self.should_exit.set())
+        signal.signal(signal.SIGHUP, lambda *_: self.should_reload.set())
+
+        logger.info("Démarrage de %d workers (pid %d)", self.config.workers, os.getpid())
+        self.processes = [self._spawn() for _ in range(self.config.workers)]
+        while not self.should_exit.wait(0.5):
+            if self.should_reload.is_set():
+                self.should_reload.clear()
+                self.rolling_restart()
+            # Remplacer les workers arrêtés (plantage ou limit_max_requests)
+            for index, process in enumerate(self.processes):
+                if not process.is_alive() and not self.should_exit.is_set():
+                    process.join()
+                    self.processes[index] = self._spawn()
+
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            self._stop(process)
+        for sock in self.sockets:
+            sock.close()
+
+
+def main() -> None:
+    workers = worker_count()
+    pool_size, max_overflow = pool_sizes(workers)
+    # Les workers (spawn) relisent la configuration depuis l'environnement
+    os.environ["DB_POOL_SIZE"] = str(pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+    config = build_config(workers)
+    config.configure_logging()
+    logger.info(
+        "loop=%s http=%s workers=%d pool=%d+%d par worker",
+        config.loop,
+        config.http,
+        workers,
+        pool_size,
+        max_overflow,
+    )
+    Supervisor(config).run()
+
+
+if __name__ == "__main__":
+    main()
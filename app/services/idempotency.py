@@ -0,0 +1,146 @@
+import hashlib
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, or_, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db.utils import dialect_insert
+from app.models.idempotency_key import IdempotencyKey
+
+
+class IdempotencyMismatch(Exception):
+    """
+    Clé déjà utilisée pour une requête différente.
+    """
+
+
+class IdempotencyInProgress(Exception):
+    """
+    Une requête portant la même clé est en cours de traitement.
+    """
+
+
+def fingerprint(method: str, path: str, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (method.encode(), path.encode(), body):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def begin(
+    db: Session, scope: str, key: str, request_fingerprint: str, now: Optional[datetime] = None
+) -> Optional[IdempotencyKey]:
+    """
+    Réserve la clé pour l'appelant. Retourne None si la requête doit être
+    exécutée (clé nouvelle, expirée ou abandonnée par un worker arrêté),
+    ou la clé terminée dont la réponse est à rejouer.
+
+    L'INSERT ... ON CONFLICT DO NOTHING est atomique : de deux requêtes
+    simultanées, une seule obtient la clé, l'autre reçoit
+    IdempotencyInProgress. La réservation est validée immédiatement.
+    """
+    now = now or datetime.utcnow()
+    values = {
+        "fingerprint": request_fingerprint,
+        "status": "in_progress",
+        "response_status": None,
+        "response_body": None,
+        "locked_until": now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+        "expires_at": now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+        "created_at": now,
+    }
+    inserted = db.execute(
+        dialect_insert(db, IdempotencyKey)
+        .values(scope=scope, key=key, **values)
+        .on_conflict_do_nothing(index_elements=[IdempotencyKey.scope, IdempotencyKey.key])
+    ).rowcount
+    if not inserted:
+        # Reprise d'une clé expirée, ou restée en cours au-delà de son délai
+        inserted = db.execute(
+            update(IdempotencyKey)
+            .where(
+                IdempotencyKey.scope == scope,
+                IdempotencyKey.key == key,
+                or_(
+                    IdempotencyKey.expires_at <= now,
+                    (IdempotencyKey.status == "in_progress")
+                    & (IdempotencyKey.locked_until <= now)
+                    & (IdempotencyKey.fingerprint == request_fingerprint),
+                ),
+            )
+            .values(**values),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+    db.commit()
+    if inserted:
+        return None
+    stored = db.scalars(
+        select(IdempotencyKey).where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+    ).first()
+    db.commit()
+    if stored is None:
+        # Supprimée entre-temps (requête abandonnée) : le client peut réessayer
+        raise IdempotencyInProgress()
+    if stored.fingerprint != request_fingerprint:
+        metrics.inc("idempotency", "mismatch")
+        raise IdempotencyMismatch()
+    if stored.status != "done":
+        metrics.inc("idempotency", "in_progress")
+        raise IdempotencyInProgress()
+    metrics.inc("idempotency", "replayed")
+    return stored
+
+
+def finish(db: Session, scope: str, key: str, status_code: int, body: bytes) -> None:
+    db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+        .values(status="done", response_status=status_code, response_body=body),
+        execution_options={"synchronize_session": False},
+    )
+    db.commit()
+
+
+def abandon(db: Session, scope: str, key: str) -> None:
+    """
+    Libère la clé après un échec : une nouvelle tentative sera exécutée.
+    """
+    db.rollback()
+    db.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key,
+            IdempotencyKey.status == "in_progress",
+        ),
+        execution_options={"synchronize_session": False},
+    )
+    db.commit()
+
+
+def purge_expired(db: Session, batch_size: int = 1000, now: Optional[datetime] = None) -> int:
+    """
+    Supprime les clés expirées par lots (transactions courtes) ; retourne
+    leur nombre.
+    """
+    now = now or datetime.utcnow()
+    total = 0
+    while True:
+        expired = (
+            select(IdempotencyKey.scope, IdempotencyKey.key)
+            .where(IdempotencyKey.expires_at <= now)
+            .limit(batch_size)
+        )
+        deleted = db.execute(
+            delete(IdempotencyKey).where(
+                tuple_(IdempotencyKey.scope, IdempotencyKey.key).in_(expired)
+            ),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        db.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total
@@ -1,21 +1,204 @@
-from typing import List, Optional
+import base64
+from collections import Counter, defaultdict
+from typing import List, Optional, Tuple, Union
 
+from sqlalchemy import Float, and_, case, cast, func, insert, literal_column, or_, select
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 
-from app.models.item import Item
-from app.schemas.item import ItemCreate, ItemUpdate
+from app.core.batcher import GroupCommit
+from app.core.changefeed import emit
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db.session import SessionLocal
+from app.db.sharding import (
+    ShardRouter,
+    is_sharded,
+    on_shard,
+    paginate,
+    per_shard,
+    reserve_ids,
+    shard_of,
+)
+from app.db.utils import check_version, count_rows, dialect_insert, dialect_name, estimate_count
+from app.models.item import SEARCH_DOCUMENT, Item
+from app.models.item_archive import ItemArchive
+from app.models.item_counter import ItemCounter
+from app.schemas.item import ItemCreate, ItemListParams, ItemUpdate
+
+# Colonne d'intervalle de chaque filtre : un seul intervalle par requête,
+# et il doit porter sur la colonne de tri pour rester dans l'index composite
+# (owner_id, <colonne>, id) ou (<colonne>, id).
+FILTER_COLUMNS = {
+    "created_after": "created_at",
+    "created_before": "created_at",
+    "updated_since": "updated_at",
+    "title_prefix": "title",
+}
+DEFAULT_SORT = "created_at"
 
 
 def get_by_id(db: Session, item_id: int) -> Optional[Item]:
     return db.query(Item).filter(Item.id == item_id).first()
 
 
+def get_archived_by_id(db: Session, item_id: int) -> Optional[ItemArchive]:
+    return db.query(ItemArchive).filter(ItemArchive.id == item_id).first()
+
+
 def get_by_owner(db: Session, owner_id: int, skip: int = 0, limit: int = 100) -> List[Item]:
-    return db.query(Item).filter(Item.owner_id == owner_id).offset(skip).limit(limit).all()
+    return list_items(db, owner_id=owner_id, skip=skip, limit=limit)
 
 
 def get_items(db: Session, skip: int = 0, limit: int = 100) -> List[Item]:
-    return db.query(Item).offset(skip).limit(limit).all()
+    return list_items(db, skip=skip, limit=limit)
+
+
+def plan_listing(params: ItemListParams) -> Tuple[str, bool]:
+    """
+    Valide la combinaison filtres/tri et retourne (colonne de tri, décroissant).
+    Lève ValueError pour une combinaison qu'aucun index ne peut servir.
+    """
+    filtered = {
+        FILTER_COLUMNS[name]
+        for name, value in params.model_dump(exclude={"sort"}).items()
+        if value is not None
+    }
+    if len(filtered) > 1:
+        raise ValueError(
+            "Les filtres doivent porter sur une seule colonne parmi "
+            "created_at, updated_at et title"
+        )
+    sort = params.sort or (next(iter(filtered)) if filtered else DEFAULT_SORT)
+    column, descending = sort.lstrip("-"), sort.startswith("-")
+    if filtered and column not in filtered:
+        raise ValueError(f"Le tri doit porter sur la colonne filtrée ({next(iter(filtered))})")
+    return column, descending
+
+
+def _title_key(db: Session, model=Item):
+    # Ordre binaire : les préfixes deviennent des intervalles d'index
+    if dialect_name(db) == "postgresql":
+        return model.title.collate("C")
+    return model.title
+
+
+def _prefix_upper_bound(prefix: str) -> Optional[str]:
+    while prefix:
+        last = ord(prefix[-1])
+        if last < 0x10FFFF:
+            following = last + 1
+            # Les surrogates (U+D800-U+DFFF) ne sont pas encodables
+            if 0xD800 <= following <= 0xDFFF:
+                following = 0xE000
+            return prefix[:-1] + chr(following)
+        prefix = prefix[:-1]
+    return None
+
+
+def _filtered_query(
+    db: Session, owner_id: Optional[int], params: ItemListParams, model=Item
+):
+    # `model` : Item, ou ItemArchive qui a les mêmes colonnes
+    column, descending = plan_listing(params)
+    sort_key = _title_key(db, model) if column == "title" else getattr(model, column)
+    query = db.query(model)
+    if owner_id is not None:
+        query = query.filter(model.owner_id == owner_id)
+    if params.created_after is not None:
+        query = query.filter(model.created_at >= params.created_after)
+    if params.created_before is not None:
+        query = query.filter(model.created_at < params.created_before)
+    if params.updated_since is not None:
+        query = query.filter(model.updated_at >= params.updated_since)
+    if params.title_prefix:
+        query = query.filter(sort_key >= params.title_prefix)
+        upper = _prefix_upper_bound(params.title_prefix)
+        if upper is not None:
+            query = query.filter(sort_key < upper)
+    return query, sort_key, descending
+
+
+def list_items(
+    db: Session,
+    owner_id: Optional[int] = None,
+    params: Optional[ItemListParams] = None,
+    skip: int = 0,
+    limit: int = 100,
+    include_archived: bool = False,
+) -> List[Union[Item, ItemArchive]]:
+    params = params or ItemListParams()
+    column, descending = plan_listing(params)
+    models = (Item, ItemArchive) if include_archived else (Item,)
+    queries = []
+    for model in models:
+        query = _sorted_query(db, owner_id, params, model)
+        # Sans propriétaire, la liste couvre tous les shards
+        queries.extend(per_shard(db, query) if owner_id is None else [query])
+    # Toutes les sources (table, shard) sont lues dans le même ordre puis fusionnées
+    return paginate(
+        queries,
+        key=lambda item: (getattr(item, column), item.id),
+        skip=skip,
+        limit=limit,
+        reverse=descending,
+    )
+
+
+def _sorted_query(db: Session, owner_id: Optional[int], params: ItemListParams, model):
+    query, sort_key, descending = _filtered_query(db, owner_id, params, model)
+    if descending:
+        return query.order_by(sort_key.desc(), model.id.desc())
+    return query.order_by(sort_key.asc(), model.id.asc())
+
+
+def count_by_owner(db: Session, owner_id: int) -> int:
+    count = db.query(ItemCounter.count).filter(ItemCounter.owner_id == owner_id).scalar()
+    return count or 0
+
+
+def count_items(
+    db: Session,
+    owner_id: Optional[int] = None,
+    params: Optional[ItemListParams] = None,
+    include_archived: bool = False,
+) -> Tuple[int, bool]:
+    """
+    Total pour une liste d'items, retourné sous la forme (total, approximatif).
+    Sans filtre : compteur par propriétaire, ou statistiques du planner pour
+    l'ensemble de la table. Avec filtres : comptage exact sur l'intervalle
+    d'index retenu par plan_listing.
+    """
+    params = params or ItemListParams()
+    if include_archived:
+        total, approximate = count_items(db, owner_id, params)
+        if params.model_dump(exclude={"sort"}, exclude_none=True) or owner_id is not None:
+            query, _, _ = _filtered_query(db, owner_id, params, ItemArchive)
+            return total + count_rows(query), approximate
+        archived, archived_approximate = estimate_count(db, ItemArchive.__table__)
+        return total + archived, approximate or archived_approximate
+    if params.model_dump(exclude={"sort"}, exclude_none=True):
+        query, _, _ = _filtered_query(db, owner_id, params)
+        return count_rows(query), False
+    if owner_id is not None:
+        return count_by_owner(db, owner_id), False
+    return estimate_count(db, Item.__table__)
+
+
+def _bump_counter(db: Session, owner_id: int, delta: int) -> None:
+    stmt = dialect_insert(db, ItemCounter).values(owner_id=owner_id, count=delta)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ItemCounter.owner_id],
+        set_={"count": ItemCounter.count + delta},
+    )
+    db.execute(stmt)
+
+
+def _event(op: str, item: Item) -> dict:
+    # Charge utile minimale (limite de 8000 octets de NOTIFY) : les clients
+    # relisent l'item via GET /items/{id} si besoin
+    return {"op": op, "item_id": item.id, "owner_id": item.owner_id}
 
 
 def create_item(db: Session, item_in: ItemCreate, owner_id: int) -> Item:
@@ -25,18 +208,123 @@ def create_item(db: Session, item_in: ItemCreate, owner_id: int) -> Item:
         owner_id=owner_id,
     )
     db.add(db_item)
+    _bump_counter(db, owner_id, 1)
+    db.flush()
+    emit(db, _event("create", db_item))
     db.commit()
     db.refresh(db_item)
     return db_item
 
 
+def create_items(db: Session, entries: List[Tuple[ItemCreate, int]]) -> List[Item]:
+    """
+    Crée plusieurs items (item_in, owner_id) en un seul INSERT multi-lignes
+    par shard et un seul commit ; retourne les items dans l'ordre de `entries`.
+    """
+    positions = defaultdict(list)
+    for position, (_, owner_id) in enumerate(entries):
+        positions[shard_of(db, owner_id)].append(position)
+    items: List[Optional[Item]] = [None] * len(entries)
+    for shard_id, shard_positions in positions.items():
+        rows = [
+            {
+                "title": entries[position][0].title,
+                "description": entries[position][0].description,
+                "owner_id": entries[position][1],
+            }
+            for position in shard_positions
+        ]
+        ids = reserve_ids(db, Item.__table__, shard_id, len(rows))
+        if ids is not None:
+            for row, item_id in zip(rows, ids):
+                row["id"] = item_id
+        # INSERT Core chargé en entités : l'INSERT ORM en masse ne sait pas
+        # cibler un shard
+        created = db.scalars(
+            select(Item).from_statement(
+                insert(Item.__table__).returning(
+                    *Item.__table__.c, sort_by_parameter_order=True
+                )
+            ),
+            rows,
+            bind_arguments=on_shard(shard_id),
+        ).all()
+        for position, item in zip(shard_positions, created):
+            items[position] = item
+    # Ordre fixe des propriétaires : pas d'interblocage entre lots concurrents
+    for owner_id, delta in sorted(Counter(owner_id for _, owner_id in entries).items()):
+        _bump_counter(db, owner_id, delta)
+    emit(db, *(_event("create", item) for item in items))
+    db.commit()
+    return items
+
+
+def _flush_item_batch(
+    bind, entries: List[Tuple[ItemCreate, int]]
+) -> List[Union[Item, Exception]]:
+    # Les colonnes viennent de RETURNING : inutile de les recharger après le commit
+    if isinstance(bind, ShardRouter):
+        db = bind.session(expire_on_commit=False)
+    else:
+        db = SessionLocal(bind=bind, expire_on_commit=False)
+    try:
+        try:
+            return create_items(db, entries)
+        except SQLAlchemyError:
+            db.rollback()
+            metrics.inc("group_commit_fallbacks", "items")
+        # Une ligne invalide fait échouer tout le lot : reprise ligne par ligne
+        # pour que chaque appelant reçoive son propre item ou sa propre erreur
+        results: List[Union[Item, Exception]] = []
+        for entry in entries:
+            try:
+                results.extend(create_items(db, [entry]))
+                # Détacher : un rollback ultérieur expirerait les items déjà créés
+                db.expunge_all()
+            except SQLAlchemyError as exc:
+                db.rollback()
+                results.append(exc)
+        return results
+    finally:
+        db.close()
+
+
+item_writes = GroupCommit(
+    "items",
+    _flush_item_batch,
+    max_delay=settings.ITEM_WRITE_BATCH_WINDOW_MS / 1000,
+    max_size=settings.ITEM_WRITE_BATCH_MAX_SIZE,
+)
+
+
+async def create_item_batched(db: Session, item_in: ItemCreate, owner_id: int) -> Item:
+    """
+    Comme create_item, mais regroupé avec les créations concurrentes du
+    worker dans un même INSERT et un même commit.
+    """
+    # Un lot par base, ou par ensemble de shards (réparti dans create_items)
+    key = db.router if is_sharded(db) else db.get_bind()
+    return await item_writes.submit(key, (item_in, owner_id))
+
+
 def update_item(db: Session, db_item: Item, item_in: ItemUpdate) -> Item:
+    """
+    Lève StaleDataError si l'item a été modifié depuis la version fournie
+    par le client, ou depuis sa lecture ici.
+    """
     update_data = item_in.model_dump(exclude_unset=True)
+    check_version(db_item, update_data.pop("version", None))
     
     for field, value in update_data.items():
         setattr(db_item, field, value)
         
     db.add(db_item)
+    try:
+        db.flush()
+    except StaleDataError:
+        db.rollback()
+        raise
+    emit(db, _event("update", db_item))
     db.commit()
     db.refresh(db_item)
     return db_item
@@ -47,5 +335,89 @@ def delete_item(db: Session, item_id: int) -> bool:
     if not item:
         return False
     db.delete(item)
+    _bump_counter(db, item.owner_id, -1)
+    emit(db, _event("delete", item))
     db.commit()
-    return True 
\ No newline at end of file
+    return True
+
+
+def encode_search_cursor(rank: float, item_id: int) -> str:
+    # float.hex : le rang est restitué au bit près, sans égalités perdues
+    raw = f"{rank.hex()}:{item_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, item_id = base64.urlsafe_b64decode(padded).decode().split(":")
+        return float.fromhex(rank), int(item_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Curseur invalide")
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _search_clauses(db: Session, q: str):
+    """
+    Retourne (condition, rang) selon le dialecte : index GIN plein texte et
+    trigrammes sous PostgreSQL, simple LIKE ailleurs (tests SQLite).
+    """
+    if dialect_name(db) == "postgresql":
+        document = literal_column(f"({SEARCH_DOCUMENT})")
+        query = func.websearch_to_tsquery(literal_column("'simple'::regconfig"), q)
+        condition = or_(
+            document.op("@@")(query),
+            Item.title.op("%")(q),
+            Item.title.ilike(f"{_escape_like(q)}%", escape="\\"),
+        )
+        # ts_rank_cd et similarity sont en real : double precision pour que le
+        # rang du curseur et celui de la clause keyset soient la même valeur
+        rank = cast(
+            func.ts_rank_cd(document, query) + func.similarity(Item.title, q),
+            Float(precision=53),
+        )
+        return condition, rank
+    pattern = f"%{_escape_like(q)}%"
+    condition = or_(
+        Item.title.ilike(pattern, escape="\\"),
+        Item.description.ilike(pattern, escape="\\"),
+    )
+    rank = case(
+        (Item.title.ilike(f"{_escape_like(q)}%", escape="\\"), 2.0),
+        (Item.title.ilike(pattern, escape="\\"), 1.5),
+        else_=1.0,
+    )
+    return condition, rank
+
+
+def search(
+    db: Session,
+    q: str,
+    owner_id: Optional[int] = None,
+    limit: int = 20,
+    cursor: Optional[Tuple[float, int]] = None,
+) -> List[Tuple[Item, float]]:
+    """
+    Recherche classée par pertinence, paginée par clé (rang, id).
+    """
+    condition, rank = _search_clauses(db, q)
+    query = db.query(Item, rank.label("rank")).filter(condition)
+    if owner_id is not None:
+        query = query.filter(Item.owner_id == owner_id)
+    if cursor is not None:
+        last_rank, last_id = cursor
+        query = query.filter(
+            or_(rank < last_rank, and_(rank == last_rank, Item.id < last_id))
+        )
+    query = query.order_by(rank.desc(), Item.id.desc())
+    rows = paginate(
+        per_shard(db, query) if owner_id is None else [query],
+        key=lambda row: (row[1], row[0].id),
+        skip=0,
+        limit=limit,
+        reverse=True,
+    )
+    return [(item, float(item_rank)) for item, item_rank in rows]
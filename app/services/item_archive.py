@@ -0,0 +1,87 @@
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import delete, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.core.changefeed import emit
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db.utils import dialect_name
+from app.models.item import Item
+from app.models.item_archive import ItemArchive
+from app.models.item_counter import ItemCounter
+
+COLUMNS = ["id", "title", "description", "owner_id", "created_at", "updated_at", "version"]
+
+
+def archive_batch(db: Session, cutoff: datetime, batch_size: int, now: datetime) -> int:
+    """
+    Déplace vers l'archive au plus `batch_size` items créés avant `cutoff`,
+    les plus anciens d'abord, en une transaction. Retourne leur nombre.
+    """
+    query = (
+        select(Item.id, Item.owner_id)
+        .where(Item.created_at < cutoff)
+        .order_by(Item.created_at, Item.id)
+        .limit(batch_size)
+    )
+    if dialect_name(db) == "postgresql":
+        # Lignes en cours de modification : reprises au prochain passage
+        query = query.with_for_update(skip_locked=True)
+    rows = db.execute(query).all()
+    if not rows:
+        db.rollback()
+        return 0
+    ids = [item_id for item_id, _ in rows]
+    # Le filtre sur created_at limite la lecture aux anciennes partitions
+    moved = select(*(getattr(Item, name) for name in COLUMNS), literal(now)).where(
+        Item.id.in_(ids), Item.created_at < cutoff
+    )
+    db.execute(insert(ItemArchive).from_select(COLUMNS + ["archived_at"], moved))
+    db.execute(
+        delete(Item).where(Item.id.in_(ids), Item.created_at < cutoff),
+        execution_options={"synchronize_session": False},
+    )
+    # Les compteurs par propriétaire ne comptent que les items courants
+    for owner_id, count in sorted(Counter(owner_id for _, owner_id in rows).items()):
+        db.query(ItemCounter).filter(ItemCounter.owner_id == owner_id).update(
+            {ItemCounter.count: ItemCounter.count - count}, synchronize_session=False
+        )
+    # Pour le flux, un item archivé quitte la liste courante
+    emit(db, *({"op": "delete", "item_id": id_, "owner_id": owner} for id_, owner in rows))
+    db.commit()
+    metrics.inc("items_archived", value=len(rows))
+    return len(rows)
+
+
+def archive_old_items(
+    session_factory: Callable[[], Session],
+    now: Optional[datetime] = None,
+    max_batches: Optional[int] = None,
+) -> int:
+    """
+    Archive les items plus anciens que ITEM_ARCHIVE_AFTER_DAYS (0 : jamais)
+    par lots de ITEM_ARCHIVE_BATCH_SIZE, avec une pause de
+    ITEM_ARCHIVE_PAUSE_SECONDS entre deux lots pour ne pas concurrencer le
+    trafic (verrous, WAL, réplication). Retourne le nombre d'items archivés.
+    """
+    if settings.ITEM_ARCHIVE_AFTER_DAYS <= 0:
+        return 0
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=settings.ITEM_ARCHIVE_AFTER_DAYS)
+    total = batches = 0
+    while max_batches is None or batches < max_batches:
+        db = session_factory()
+        try:
+            moved = archive_batch(db, cutoff, settings.ITEM_ARCHIVE_BATCH_SIZE, now)
+        finally:
+            db.close()
+        total += moved
+        batches += 1
+        if moved < settings.ITEM_ARCHIVE_BATCH_SIZE:
+            break
+        time.sleep(settings.ITEM_ARCHIVE_PAUSE_SECONDS)
+    return total
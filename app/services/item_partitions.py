@@ -0,0 +1,55 @@
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.changefeed import emit, reset_event
+from app.core.config import settings
+from app.db import partitions
+from app.db.utils import dialect_name
+
+TABLE = "item"
+
+
+def ensure_partitions(db: Session, now: Optional[datetime] = None) -> List[str]:
+    """
+    Crée les partitions mensuelles des prochains mois
+    (ITEM_PARTITION_MONTHS_AHEAD). Sans effet hors PostgreSQL.
+    """
+    # Base non migrée (table encore simple) : rien à faire
+    if dialect_name(db) != "postgresql" or not partitions.is_partitioned(db, TABLE):
+        return []
+    return partitions.create_partitions(
+        db, TABLE, now or datetime.utcnow(), settings.ITEM_PARTITION_MONTHS_AHEAD
+    )
+
+
+def _before_drop(db: Session, partition: str) -> None:
+    # Les items supprimés avec la partition sortent des compteurs par
+    # propriétaire, et les abonnés du flux rechargent leur liste
+    db.execute(
+        text(
+            "UPDATE itemcounter AS c SET count = c.count - p.n "
+            f'FROM (SELECT owner_id, count(*) AS n FROM "{partition}" GROUP BY owner_id) AS p '
+            "WHERE c.owner_id = p.owner_id"
+        )
+    )
+    emit(db, reset_event())
+
+
+def apply_retention(engine: Engine, now: Optional[datetime] = None) -> List[str]:
+    """
+    Supprime les partitions plus anciennes que ITEM_RETENTION_MONTHS
+    (0 : tout conserver). Sans effet hors PostgreSQL.
+    """
+    if engine.dialect.name != "postgresql":
+        return []
+    return partitions.drop_expired_partitions(
+        engine,
+        TABLE,
+        now or datetime.utcnow(),
+        settings.ITEM_RETENTION_MONTHS,
+        before_drop=_before_drop,
+    )
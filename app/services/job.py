@@ -0,0 +1,250 @@
+import logging
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+# Fonctions d'exécution par type de tâche, enregistrées avec @handler(...)
+# par les modules de services qui mettent ces tâches en file
+HANDLERS: Dict[str, Callable[["JobContext", Dict[str, Any]], Any]] = {}
+
+
+def handler(kind: str):
+    def decorator(fn):
+        HANDLERS[kind] = fn
+        return fn
+
+    return decorator
+
+
+class JobContext:
+    """
+    Passé aux fonctions d'exécution : session dédiée et suivi de l'avancement.
+    """
+
+    def __init__(self, db: Session, job: Job, worker_id: str) -> None:
+        self.db = db
+        self.job_id = job.id
+        self.attempt = job.attempts
+        # Avancement atteint par les tentatives précédentes
+        self.progress_done = job.progress_done
+        self.worker_id = worker_id
+
+    def progress(self, done: int, total: Optional[int] = None) -> None:
+        report_progress(self.db, self.job_id, self.worker_id, done, total)
+        self.progress_done = done
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: Dict[str, Any],
+    created_by: Optional[int] = None,
+    total: Optional[int] = None,
+    max_attempts: Optional[int] = None,
+) -> Job:
+    """
+    Met une tâche en file. Elle est validée dans la même transaction que
+    les modifications en attente de l'appelant : les deux ou aucune.
+    """
+    job = Job(
+        kind=kind,
+        payload=payload,
+        created_by=created_by,
+        progress_total=total,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    metrics.inc("jobs_enqueued", kind)
+    return job
+
+
+def get_by_id(db: Session, job_id: int) -> Optional[Job]:
+    return db.query(Job).filter(Job.id == job_id).first()
+
+
+def _lease_until(now: datetime) -> datetime:
+    return now + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+
+
+def claim(db: Session, worker_id: str) -> Optional[Job]:
+    """
+    Réclame la prochaine tâche prête, ou dont le bail a expiré (worker
+    arrêté en cours d'exécution). SKIP LOCKED : les workers concurrents,
+    sur ce nœud ou d'autres, ne s'attendent pas et ne prennent jamais
+    la même tâche. Une tâche dont le bail a expiré à sa dernière tentative
+    (fail() n'a pas été appelé : worker tué) est marquée « failed ».
+    """
+    now = datetime.utcnow()
+    expired = and_(Job.status == "running", Job.locked_until < now)
+    db.execute(
+        update(Job)
+        .where(expired, Job.attempts >= Job.max_attempts)
+        .values(
+            status="failed",
+            error="Bail expiré à la dernière tentative",
+            locked_until=None,
+            finished_at=now,
+        )
+    )
+    job = db.scalars(
+        select(Job)
+        .where(
+            or_(
+                and_(Job.status == "queued", Job.run_at <= now),
+                and_(expired, Job.attempts < Job.max_attempts),
+            )
+        )
+        .order_by(Job.run_at, Job.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    ).first()
+    if job is None:
+        db.commit()
+        return None
+    job.status = "running"
+    job.attempts += 1
+    job.locked_by = worker_id
+    job.locked_until = _lease_until(now)
+    db.commit()
+    return job
+
+
+def _owned(job_id: int, worker_id: str):
+    # Un worker dont le bail a été repris ne doit plus modifier la tâche
+    return update(Job).where(Job.id == job_id, Job.locked_by == worker_id)
+
+
+def report_progress(
+    db: Session, job_id: int, worker_id: str, done: int, total: Optional[int] = None
+) -> None:
+    """
+    Enregistre l'avancement et prolonge le bail.
+    """
+    values: Dict[str, Any] = {
+        "progress_done": done,
+        "locked_until": _lease_until(datetime.utcnow()),
+    }
+    if total is not None:
+        values["progress_total"] = total
+    db.execute(_owned(job_id, worker_id).values(**values))
+    db.commit()
+
+
+def retry_delay(attempts: int) -> float:
+    """
+    Délai exponentiel avant la tentative suivante, borné.
+    """
+    return min(
+        settings.JOB_RETRY_MAX_SECONDS,
+        settings.JOB_RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1),
+    )
+
+
+def complete(db: Session, job_id: int, worker_id: str, result: Any) -> None:
+    now = datetime.utcnow()
+    db.execute(
+        _owned(job_id, worker_id).values(
+            status="done", result=result, error=None, locked_until=None, finished_at=now
+        )
+    )
+    db.commit()
+
+
+def fail(db: Session, job: Job, worker_id: str, error: str) -> bool:
+    """
+    Replanifie la tâche après un échec, ou la marque « failed » une fois
+    ses tentatives épuisées. Retourne True si elle sera retentée.
+    """
+    now = datetime.utcnow()
+    retry = job.attempts < job.max_attempts
+    values: Dict[str, Any] = {"error": error, "locked_until": None}
+    if retry:
+        values.update(status="queued", run_at=now + timedelta(seconds=retry_delay(job.attempts)))
+    else:
+        values.update(status="failed", finished_at=now)
+    db.execute(_owned(job.id, worker_id).values(**values))
+    db.commit()
+    return retry
+
+
+def run_next(session_factory: Callable[[], Session], worker_id: str) -> bool:
+    """
+    Réclame et exécute une tâche ; retourne False si aucune n'est prête.
+    """
+    db = session_factory()
+    try:
+        job = claim(db, worker_id)
+        if job is None:
+            return False
+        kind, payload = job.kind, dict(job.payload or {})
+        try:
+            fn = HANDLERS.get(kind)
+            if fn is None:
+                raise LookupError(f"Type de tâche inconnu : {kind}")
+            result = fn(JobContext(db, job, worker_id), payload)
+        except Exception as exc:
+            db.rollback()
+            logger.exception("Échec de la tâche %s (%s)", job.id, kind)
+            retried = fail(db, job, worker_id, str(exc))
+            metrics.inc("jobs_retried" if retried else "jobs_failed", kind)
+        else:
+            complete(db, job.id, worker_id, result)
+            metrics.inc("jobs_done", kind)
+        return True
+    finally:
+        db.close()
+
+
+class JobRunner:
+    """
+    Pool de threads d'exécution des tâches, un par processus. Chaque thread
+    enchaîne les tâches prêtes et attend `poll_interval` quand il n'y en a pas.
+    """
+
+    def __init__(
+        self, session_factory: Callable[[], Session], workers: int, poll_interval: float
+    ) -> None:
+        self.session_factory = session_factory
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._run, args=(f"{prefix}:{index}",), name=f"jobs-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        # Une tâche en cours est terminée ; sinon son bail expirera et
+        # un autre worker la reprendra
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _run(self, worker_id: str) -> None:
+        while not self._stop.is_set():
+            try:
+                worked = run_next(self.session_factory, worker_id)
+            except Exception:
+                logger.exception("Réclamation des tâches impossible")
+                worked = False
+            if not worked:
+                self._stop.wait(self.poll_interval)
@@ -0,0 +1,103 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import distinct, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.utils import dialect_insert
+from app.models.daily_stats import DailyStats
+from app.models.item import Item
+from app.models.item_counter import ItemCounter
+from app.models.user import User
+
+
+def _as_date(value) -> date:
+    # func.date() retourne une chaîne sous SQLite
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def refresh_daily_stats(
+    db: Session, days: Optional[int] = None, now: Optional[datetime] = None
+) -> int:
+    """
+    Recalcule les agrégats des `days` derniers jours (STATS_REFRESH_DAYS par
+    défaut), aujourd'hui compris : seules les lignes récentes sont lues, et
+    les partitions plus anciennes de item sont écartées par le planner.
+    Les jours sans activité sont écrits à zéro. Retourne le nombre de jours.
+    """
+    now = now or datetime.utcnow()
+    days = days or settings.STATS_REFRESH_DAYS
+    first = now.date() - timedelta(days=days - 1)
+    since = datetime.combine(first, datetime.min.time())
+
+    # En mode réparti, chaque shard retourne ses propres lignes par jour :
+    # elles sont additionnées (un utilisateur n'est que sur un shard)
+    item_day = func.date(Item.created_at)
+    items: Dict[date, Tuple[int, int]] = {}
+    for day, created, active in db.execute(
+        select(item_day, func.count(), func.count(distinct(Item.owner_id)))
+        .where(Item.created_at >= since)
+        .group_by(item_day)
+    ):
+        previous_created, previous_active = items.get(_as_date(day), (0, 0))
+        items[_as_date(day)] = (previous_created + created, previous_active + active)
+    user_day = func.date(User.created_at)
+    users: Dict[date, int] = defaultdict(int)
+    for day, created in db.execute(
+        select(user_day, func.count()).where(User.created_at >= since).group_by(user_day)
+    ):
+        users[_as_date(day)] += created
+
+    rows = []
+    for offset in range(days):
+        day = first + timedelta(days=offset)
+        created, active = items.get(day, (0, 0))
+        rows.append(
+            {
+                "day": day,
+                "items_created": created,
+                "active_users": active,
+                "users_created": users.get(day, 0),
+                "refreshed_at": now,
+            }
+        )
+    stmt = dialect_insert(db, DailyStats).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyStats.day],
+        set_={
+            "items_created": stmt.excluded.items_created,
+            "active_users": stmt.excluded.active_users,
+            "users_created": stmt.excluded.users_created,
+            "refreshed_at": stmt.excluded.refreshed_at,
+        },
+    )
+    db.execute(stmt)
+    db.commit()
+    return days
+
+
+def get_daily_stats(db: Session, days: int, now: Optional[datetime] = None) -> List[DailyStats]:
+    first = (now or datetime.utcnow()).date() - timedelta(days=days - 1)
+    return (
+        db.query(DailyStats).filter(DailyStats.day >= first).order_by(DailyStats.day).all()
+    )
+
+
+def last_refresh(db: Session) -> Optional[datetime]:
+    return db.query(func.max(DailyStats.refreshed_at)).scalar()
+
+
+def top_owners(db: Session, limit: int = 20) -> List[Tuple[int, str, int]]:
+    """
+    Utilisateurs ayant le plus d'items, d'après les compteurs par propriétaire.
+    """
+    rows = db.execute(
+        select(ItemCounter.owner_id, User.email, ItemCounter.count)
+        .join(User, User.id == ItemCounter.owner_id)
+        .order_by(ItemCounter.count.desc(), ItemCounter.owner_id)
+        .limit(limit)
+    ).all()
+    # Réparti : jusqu'à `limit` lignes par shard, à reclasser ensemble
+    return sorted(rows, key=lambda row: (-row.count, row.owner_id))[:limit]
@@ -1,10 +1,33 @@
-from typing import List, Optional
+from collections import defaultdict, namedtuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+from sqlalchemy import delete, select, update
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 
-from app.core.security import get_password_hash, verify_password
+from app.core.changefeed import emit, reset_event
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.security import (
+    dummy_verify,
+    get_password_hash,
+    hash_passwords,
+    password_needs_rehash,
+    verify_password,
+)
+from app.db.session import fork_session, release
+from app.db.sharding import new_user_shard, on_shard, paginate, per_shard, reserve_ids
+from app.db.utils import check_version, dialect_insert, estimate_count
+from app.models.item import Item
+from app.models.item_counter import ItemCounter
 from app.models.user import User
-from app.schemas.user import UserCreate, UserUpdate
+from app.schemas.user import UserBulkReport, UserBulkResult, UserCreate, UserUpdate
+
+# Résultat d'une ligne de create_users
+CREATED = "created"
+EXISTS = "exists"
+DUPLICATE = "duplicate"
+BulkResult = namedtuple("BulkResult", ["email", "status", "id"])
 
 
 def get_by_id(db: Session, user_id: int) -> Optional[User]:
@@ -16,7 +39,12 @@ def get_by_email(db: Session, email: str) -> Optional[User]:
 
 
 def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
-    return db.query(User).offset(skip).limit(limit).all()
+    query = db.query(User).order_by(User.id)
+    return paginate(per_shard(db, query), key=lambda user: user.id, skip=skip, limit=limit)
+
+
+def count_users(db: Session) -> Tuple[int, bool]:
+    return estimate_count(db, User.__table__)
 
 
 def create_user(db: Session, user_in: UserCreate) -> User:
@@ -34,8 +62,106 @@ def create_user(db: Session, user_in: UserCreate) -> User:
     return db_user
 
 
+def create_users(
+    db: Session, users_in: List[UserCreate], batch_size: Optional[int] = None
+) -> List[BulkResult]:
+    """
+    Crée plusieurs utilisateurs. Les emails déjà pris sont cherchés par une
+    requête par lot, seuls les autres mots de passe sont hachés (en parallèle,
+    hash_passwords), puis les lignes sont insérées par lots de `batch_size`
+    (INSERT ... ON CONFLICT DO NOTHING, un commit par lot). Retourne le
+    résultat de chaque entrée, dans l'ordre ; un email répété n'est créé
+    qu'une fois.
+    """
+    batch_size = batch_size or settings.USER_BULK_BATCH_SIZE
+    results: List[Optional[BulkResult]] = [None] * len(users_in)
+    first: Dict[str, int] = {}
+    for position, user_in in enumerate(users_in):
+        if user_in.email in first:
+            results[position] = BulkResult(user_in.email, DUPLICATE, None)
+        else:
+            first[user_in.email] = position
+
+    emails = list(first)
+    existing: Dict[str, int] = {}
+    for start in range(0, len(emails), batch_size):
+        chunk = emails[start : start + batch_size]
+        existing.update(db.execute(select(User.email, User.id).where(User.email.in_(chunk))).all())
+    # Rendre la connexion avant bcrypt : le hachage ne doit pas occuper le pool
+    release(db)
+    for email, user_id in existing.items():
+        results[first[email]] = BulkResult(email, EXISTS, user_id)
+
+    pending = [first[email] for email in emails if email not in existing]
+    hashes = hash_passwords([users_in[position].password for position in pending])
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start : start + batch_size]
+        batch_hashes = hashes[start : start + batch_size]
+        created = _insert_users(db, [(users_in[p], h) for p, h in zip(batch, batch_hashes)])
+        db.commit()
+        for position in batch:
+            email = users_in[position].email
+            # Absent de RETURNING : créé entre-temps par une autre requête
+            status = CREATED if email in created else EXISTS
+            results[position] = BulkResult(email, status, created.get(email))
+    metrics.inc("users_bulk", CREATED, value=sum(result.status == CREATED for result in results))
+    return results
+
+
+def bulk_report(results: List[BulkResult], seconds: float) -> UserBulkReport:
+    """
+    Bilan de create_users : décompte par résultat et débit (entrées par seconde).
+    """
+    statuses = [result.status for result in results]
+    return UserBulkReport(
+        created=statuses.count(CREATED),
+        existing=statuses.count(EXISTS),
+        duplicates=statuses.count(DUPLICATE),
+        seconds=round(seconds, 3),
+        users_per_second=round(len(results) / seconds, 1) if seconds > 0 else 0.0,
+        results=[
+            UserBulkResult(index=index, email=result.email, status=result.status, id=result.id)
+            for index, result in enumerate(results)
+        ],
+    )
+
+
+def _insert_users(db: Session, entries: List[Tuple[UserCreate, str]]) -> Dict[str, int]:
+    # Un INSERT par shard ; retourne l'identifiant de chaque email créé
+    rows = defaultdict(list)
+    for user_in, hashed_password in entries:
+        rows[new_user_shard(db)].append(
+            {
+                "email": user_in.email,
+                "hashed_password": hashed_password,
+                "full_name": user_in.full_name,
+                "is_active": user_in.is_active,
+                "is_superuser": user_in.is_superuser,
+            }
+        )
+    created: Dict[str, int] = {}
+    for shard_id, shard_rows in rows.items():
+        ids = reserve_ids(db, User.__table__, shard_id, len(shard_rows))
+        if ids is not None:
+            for row, user_id in zip(shard_rows, ids):
+                row["id"] = user_id
+        stmt = (
+            dialect_insert(db, User.__table__)
+            .values(shard_rows)
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.email, User.id)
+        )
+        created.update(db.execute(stmt, bind_arguments=on_shard(shard_id)).all())
+    return created
+
+
 def update_user(db: Session, db_user: User, user_in: UserUpdate) -> User:
+    """
+    Lève StaleDataError si l'utilisateur a été modifié depuis la version
+    fournie par le client, ou depuis sa lecture ici.
+    """
     update_data = user_in.model_dump(exclude_unset=True)
+    check_version(db_user, update_data.pop("version", None))
     
     if "password" in update_data and update_data["password"]:
         update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
@@ -44,7 +170,11 @@ def update_user(db: Session, db_user: User, user_in: UserUpdate) -> User:
         setattr(db_user, field, value)
         
     db.add(db_user)
-    db.commit()
+    try:
+        db.commit()
+    except StaleDataError:
+        db.rollback()
+        raise
     db.refresh(db_user)
     return db_user
 
@@ -54,14 +184,81 @@ def delete_user(db: Session, user_id: int) -> bool:
     if not user:
         return False
     db.delete(user)
+    # Items supprimés en cascade par la base : un reset plutôt qu'un
+    # événement par item
+    emit(db, reset_event(user_id))
     db.commit()
     return True
 
 
-def authenticate(db: Session, email: str, password: str) -> Optional[User]:
+def delete_user_in_chunks(
+    db: Session,
+    user_id: int,
+    chunk_size: int = 5000,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> bool:
+    """
+    Supprime les items d'un utilisateur par lots (une transaction par lot,
+    mémoire constante), puis l'utilisateur lui-même.
+    """
+    while True:
+        chunk = (
+            select(Item.id).where(Item.owner_id == user_id).limit(chunk_size).scalar_subquery()
+        )
+        deleted = db.execute(
+            delete(Item).where(Item.id.in_(chunk)),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        if deleted:
+            db.query(ItemCounter).filter(ItemCounter.owner_id == user_id).update(
+                {ItemCounter.count: ItemCounter.count - deleted},
+                synchronize_session=False,
+            )
+        db.commit()
+        if on_progress:
+            on_progress(deleted)
+        if deleted < chunk_size:
+            break
+    return delete_user(db, user_id=user_id)
+
+
+def authenticate(
+    db: Session,
+    email: str,
+    password: str,
+    defer: Optional[Callable[..., Any]] = None,
+) -> Optional[User]:
+    """
+    Vérifie les identifiants. Si le hash stocké ne suit plus la politique
+    bcrypt courante, son remplacement est confié à `defer` (par exemple
+    BackgroundTasks.add_task) pour rester hors du chemin de la réponse.
+    """
     user = get_by_email(db, email=email)
+    # Rendre la connexion avant bcrypt : le hachage ne doit pas occuper le pool
+    release(db)
     if not user:
+        dummy_verify(password)
         return None
     if not verify_password(password, user.hashed_password):
         return None
-    return user 
\ No newline at end of file
+    if defer is not None and password_needs_rehash(user.hashed_password):
+        defer(rehash_password, fork_session(db), user.id, password, user.hashed_password)
+    return user
+
+
+def rehash_password(db: Session, user_id: int, password: str, old_hash: str) -> bool:
+    """
+    Remplace le hash d'un utilisateur s'il n'a pas changé entre-temps ;
+    `db` est une session dédiée, fermée ici.
+    """
+    try:
+        result = db.execute(
+            update(User)
+            .where(User.id == user_id, User.hashed_password == old_hash)
+            .values(hashed_password=get_password_hash(password)),
+            execution_options={"synchronize_session": False},
+        )
+        db.commit()
+        return result.rowcount == 1
+    finally:
+        db.close() 
\ No newline at end of file
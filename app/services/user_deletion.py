@@ -0,0 +1,46 @@
+from typing import Any, Dict
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.job import Job
+from app.models.user import User
+from app.services import job as job_service
+from app.services import user as user_service
+
+KIND = "user.delete"
+
+
+def enqueue(db: Session, user: User, total_items: int, created_by: int) -> Job:
+    """
+    Désactive le compte (plus de connexion ni d'écriture) et met sa
+    suppression par lots en file, dans la même transaction.
+    """
+    user.is_active = False
+    return job_service.enqueue(
+        db,
+        KIND,
+        {"user_id": user.id, "chunk_size": settings.USER_DELETE_CHUNK_SIZE},
+        created_by=created_by,
+        total=total_items,
+    )
+
+
+@job_service.handler(KIND)
+def run(ctx: job_service.JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    # Reprise possible : chaque lot est validé, une nouvelle tentative
+    # repart des items restants et poursuit le décompte
+    deleted = ctx.progress_done
+
+    def progress(count: int) -> None:
+        nonlocal deleted
+        deleted += count
+        ctx.progress(deleted)
+
+    found = user_service.delete_user_in_chunks(
+        ctx.db,
+        user_id=payload["user_id"],
+        chunk_size=payload["chunk_size"],
+        on_progress=progress,
+    )
+    return {"user_deleted": found, "deleted_items": deleted}
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Archivage des items plus anciens que ITEM_ARCHIVE_AFTER_DAYS, par lots
+espacés. À planifier chaque jour (cron), en heures creuses de préférence.
+Usage: python scripts/archive_items.py [--max-batches N]
+"""
+import sys
+import os
+import argparse
+
+# Ajouter le répertoire parent au chemin de recherche pour les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db.session import SessionLocal
+from app.services import item_archive
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+    archived = item_archive.archive_old_items(SessionLocal, max_batches=args.max_batches)
+    print(f"{archived} item(s) archivé(s)")
+
+
+if __name__ == "__main__":
+    main()
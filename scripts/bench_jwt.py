@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark du coût de vérification d'un jeton par requête.
+Usage: python scripts/bench_jwt.py [itérations]
+"""
+import os
+import sys
+import timeit
+
+# Ajouter le répertoire parent au chemin de recherche pour les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.core.tokens import JWT_BACKENDS, TokenCache, get_jwt_backend
+from app.schemas.token import TokenPayload
+
+
+def bench(label, fn, number):
+    seconds = min(timeit.repeat(fn, number=number, repeat=5))
+    print(f"{label:<32} {seconds / number * 1e6:>10.2f} µs/op")
+
+
+def main(number: int) -> None:
+    token = create_access_token(42)
+    key, algorithm = settings.SECRET_KEY, settings.ALGORITHM
+
+    for name in JWT_BACKENDS:
+        try:
+            backend = get_jwt_backend(name)
+        except ImportError:
+            print(f"{name:<32} {'non installé':>13}")
+            continue
+        bench(
+            f"{name} decode + TokenPayload",
+            lambda: TokenPayload(**backend.decode(token, key, algorithm)),
+            number,
+        )
+
+    cache = TokenCache(10000)
+    cache.set(token, TokenPayload(sub=42), float("inf"))
+    bench("cache hit", lambda: cache.get(token), number)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
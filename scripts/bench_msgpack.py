@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark JSON / MessagePack d'une page de GET /items/ : taille du
+corps, coût d'encodage côté serveur et de décodage côté client.
+Usage: python scripts/bench_msgpack.py [items par page] [itérations]
+"""
+import os
+import sys
+import json
+import timeit
+from datetime import datetime, timedelta
+from typing import List
+
+# Ajouter le répertoire parent au chemin de recherche pour les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pydantic import TypeAdapter
+
+from app.api.v1.negotiation import msgpack, packb, unpackb
+from app.schemas.item import Item
+
+adapter = TypeAdapter(List[Item])
+
+
+def bench(label, fn, number):
+    seconds = min(timeit.repeat(fn, number=number, repeat=5))
+    print(f"{label:<36} {seconds / number * 1e6:>10.2f} µs/op")
+
+
+def page(size: int) -> List[Item]:
+    now = datetime.utcnow()
+    return [
+        Item(
+            id=index,
+            title=f"Item {index}",
+            description="Description d'exemple " * 4,
+            owner_id=index % 50 + 1,
+            created_at=now - timedelta(minutes=index),
+            updated_at=now,
+            version=1,
+        )
+        for index in range(1, size + 1)
+    ]
+
+
+def json_response(items: List[Item]) -> bytes:
+    # Chemin par défaut de FastAPI : sérialisation "json" puis JSONResponse
+    return json.dumps(
+        adapter.dump_python(items, mode="json"),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def json_client(body: bytes) -> list:
+    # Même résultat que MessagePack côté client : dates converties en datetime
+    items = json.loads(body)
+    for item in items:
+        item["created_at"] = datetime.fromisoformat(item["created_at"])
+        item["updated_at"] = datetime.fromisoformat(item["updated_at"])
+    return items
+
+
+def main(size: int, number: int) -> None:
+    items = page(size)
+    body = json_response(items)
+    print(f"{'JSON':<36} {len(body):>10} octets")
+    bench("JSON encode (FastAPI)", lambda: json_response(items), number)
+    bench("JSON encode (dump_json, cache)", lambda: adapter.dump_json(items), number)
+    bench("JSON decode + dates", lambda: json_client(body), number)
+
+    if msgpack is None:
+        print(f"{'MessagePack':<36} {'non installé':>13}")
+        return
+    packed = bytes(packb(adapter.dump_python(items)))
+    print(f"{'MessagePack':<36} {len(packed):>10} octets")
+    bench("MessagePack encode", lambda: packb(adapter.dump_python(items)), number)
+    bench("MessagePack decode", lambda: unpackb(packed), number)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 1000,
+    )
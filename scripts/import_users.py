@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Création d'utilisateurs en masse depuis un fichier CSV (colonnes email,
+password, et facultativement full_name, is_superuser) ou JSON Lines (un
+objet par ligne, mêmes champs). Les emails déjà pris sont ignorés ; chaque
+entrée non créée est listée, suivie du bilan et du débit.
+Usage: python scripts/import_users.py FICHIER [--batch-size N] [--verbose]
+  --batch-size N  lignes par INSERT (défaut : USER_BULK_BATCH_SIZE)
+  --verbose       lister aussi les utilisateurs créés
+"""
+import sys
+import os
+import argparse
+import csv
+import json
+import time
+
+# Ajouter le répertoire parent au chemin de recherche pour les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pydantic import ValidationError
+
+from app.core.security import shutdown_hash_pool
+from app.db.session import SessionLocal
+from app.schemas.user import UserCreate
+from app.services import user as user_service
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as source:
+        if path.endswith((".jsonl", ".ndjson", ".json")):
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            for row in csv.DictReader(source):
+                # Colonnes vides : valeurs par défaut du schéma
+                yield {key: value for key, value in row.items() if value not in (None, "")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    users_in, lines = [], []
+    invalid = 0
+    for line, row in enumerate(read_rows(args.path), start=1):
+        try:
+            users_in.append(UserCreate.model_validate(row))
+        except ValidationError as exc:
+            invalid += 1
+            errors = "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors())
+            print(f"ligne {line} : invalide ({errors})")
+            continue
+        lines.append(line)
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        results = user_service.create_users(db, users_in, batch_size=args.batch_size)
+    finally:
+        db.close()
+        shutdown_hash_pool()
+    report = user_service.bulk_report(results, time.perf_counter() - started)
+
+    for line, result in zip(lines, report.results):
+        if args.verbose or result.status != user_service.CREATED:
+            print(f"ligne {line} : {result.email} {result.status}")
+    print(
+        f"{report.created} créé(s), {report.existing} existant(s), "
+        f"{report.duplicates} en double, {invalid} invalide(s) "
+        f"en {report.seconds:.1f} s ({report.users_per_second:.0f} utilisateurs/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Préparation des shards (DATABASE_URI et DATABASE_SHARD_URIS), une fois leur
+schéma migré (alembic upgrade head, POSTGRES_* pointant sur chaque base) :
+les séquences des utilisateurs et des items de chaque shard n'allouent plus
+que des identifiants de son reste (INCREMENT BY N), et la clé étrangère
+job.created_by du shard0 est supprimée (les utilisateurs sont répartis).
+
+Refuse de continuer si un shard contient des lignes dont l'identifiant
+désigne un autre shard (base existante : les données doivent d'abord être
+redistribuées). À relancer après tout ajout de shard sur des bases vides.
+Usage: python scripts/init_shards.py
+"""
+import sys
+import os
+
+# Ajouter le répertoire parent au chemin de recherche pour les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import text
+
+from app.db.session import engines
+from app.db.sharding import DEFAULT_SHARD
+
+TABLES = ['"user"', "item"]
+
+
+def main():
+    if len(engines) < 2:
+        print("DATABASE_SHARD_URIS est vide : une seule base, rien à faire")
+        return
+    step = len(engines)
+    for index, (shard_id, engine) in enumerate(engines.items()):
+        if engine.dialect.name != "postgresql":
+            print(f"{shard_id} : identifiants alloués par l'application (hors PostgreSQL)")
+            continue
+        with engine.begin() as connection:
+            for table in TABLES:
+                misplaced = connection.execute(
+                    text(f"SELECT count(*) FROM {table} WHERE (id - 1) % :step <> :index"),
+                    {"step": step, "index": index},
+                ).scalar()
+                if misplaced:
+                    print(f"{shard_id} : {misplaced} ligne(s) de {table} d'un autre shard")
+                    sys.exit(1)
+        with engine.begin() as connection:
+            for table in TABLES:
+                last = connection.execute(text(f"SELECT coalesce(max(id), 0) FROM {table}")).scalar()
+                # Plus petit identifiant > last tel que (id - 1) % step == index
+                start = last + 1 + (index - last) % step
+                sequence = connection.execute(
+                    text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table}
+                ).scalar()
+                connection.execute(text(f"ALTER SEQUENCE {sequence} INCREMENT BY {step}"))
+                connection.execute(
+                    text("SELECT setval(:sequence, :start, false)"),
+                    {"sequence": sequence, "start": start},
+                )
+                print(f"{shard_id} : {sequence} à partir de {start}, pas de {step}")
+            if shard_id == DEFAULT_SHARD:
+                connection.execute(text("ALTER TABLE job DROP CONSTRAINT IF EXISTS job_created_by_fkey"))
+
+
+if __name__ == "__main__":
+    main()
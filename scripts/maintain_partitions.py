@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Maintenance des partitions de la table item : création des mois à venir
+et suppression des partitions hors rétention (ITEM_RETENTION_MONTHS).
+À planifier chaque jour (cron).
+Usage: python scripts/maintain_partitions.py
+"""
+import sys
+import os
+
+# Ajouter le répertoire parent au chemin de recherche pour les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy.orm import Session
+
+from app.db.session import engines
+from app.services import item_partitions
+
+
+def main():
+    # Chaque shard a sa propre table item partitionnée
+    for shard_id, engine in engines.items():
+        with Session(engine) as db:
+            for name in item_partitions.ensure_partitions(db):
+                print(f"Partition créée ({shard_id}) : {name}")
+        for name in item_partitions.apply_retention(engine):
+            print(f"Partition supprimée ({shard_id}) : {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Rapport des verrous pris par les révisions Alembic, sans base de données :
+le SQL de chaque révision est généré hors ligne (alembic upgrade --sql) puis
+chaque instruction est classée (app/db/online.py). Les instructions
+risquées pour le trafic en cours sont marquées « ! ».
+Usage: python scripts/migration_locks.py [--from REV] [--to REV] [--strict]
+  --from REV  dernière révision déjà appliquée (défaut : aucune)
+  --to REV    dernière révision à analyser (défaut : head)
+  --strict    code de sortie 1 si une instruction est risquée (CI)
+"""
+import sys
+import os
+import argparse
+import io
+
+# Ajouter le répertoire parent au chemin de recherche pour les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+
+from app.db.online import BLOCKS, analyze
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def revision_sql(script) -> str:
+    """
+    SQL hors ligne d'une seule révision.
+    """
+    buffer = io.StringIO()
+    config = Config(os.path.join(ROOT, "alembic.ini"), output_buffer=buffer)
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+    target = script.revision
+    if script.down_revision:
+        target = f"{script.down_revision}:{script.revision}"
+    command.upgrade(config, target, sql=True)
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--from", dest="start", default=None)
+    parser.add_argument("--to", dest="end", default="heads")
+    parser.add_argument("--strict", action="store_true")
+    args = parser.parse_args()
+
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+    scripts = ScriptDirectory.from_config(config)
+    # walk_revisions va de la fin vers le début
+    revisions = list(scripts.walk_revisions(base=args.start or "base", head=args.end))
+    revisions = [script for script in reversed(revisions) if script.revision != args.start]
+
+    risky = 0
+    for script in revisions:
+        print(f"{script.revision} : {script.doc}")
+        for finding in analyze(revision_sql(script)):
+            report = finding.report
+            marker = "!" if finding.risky else " "
+            lock = report.lock or "aucun verrou"
+            print(f"  {marker} {lock:<22} {report.table or '-':<14} {report.statement[:90]}")
+            if report.lock:
+                print(f"      bloque : {BLOCKS[report.lock]} ({report.duration})")
+            if finding.reason:
+                print(f"      {finding.reason}")
+            if finding.risky and report.advice and report.advice != finding.reason:
+                print(f"      conseil : {report.advice}")
+            risky += finding.risky
+    print(f"{risky} instruction(s) risquée(s) sur {len(revisions)} révision(s)")
+    if args.strict and risky:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Suppression des clés Idempotency-Key expirées (IDEMPOTENCY_TTL_SECONDS).
+À planifier régulièrement (cron, toutes les heures par exemple).
+Usage: python scripts/purge_idempotency_keys.py
+"""
+import sys
+import os
+
+# Ajouter le répertoire parent au chemin de recherche pour les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db.session import SessionLocal
+from app.services import idempotency
+
+
+def main():
+    db = SessionLocal()
+    try:
+        purged = idempotency.purge_expired(db)
+        print(f"{purged} clé(s) expirée(s) supprimée(s)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
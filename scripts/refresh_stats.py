@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Recalcul des agrégats des statistiques d'administration sur les derniers
+jours (STATS_REFRESH_DAYS). À planifier régulièrement (cron, toutes les
+quelques minutes) ; --days permet un recalcul plus large.
+Usage: python scripts/refresh_stats.py [--days N]
+"""
+import sys
+import os
+import argparse
+
+# Ajouter le répertoire parent au chemin de recherche pour les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db.session import SessionLocal
+from app.services import stats as stats_service
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=None)
+    args = parser.parse_args()
+    db = SessionLocal()
+    try:
+        days = stats_service.refresh_daily_stats(db, days=args.days)
+        print(f"Statistiques recalculées sur {days} jour(s)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
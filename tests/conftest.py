@@ -2,11 +2,19 @@ import os
 import pytest
 from typing import Dict, Generator
 
+# bcrypt au coût minimal pour des tests rapides (avant l'import de la config)
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# Pas de connexion au Postgres de l'application pendant les tests
+os.environ.setdefault("DB_WARMUP_CONNECTIONS", "0")
+os.environ.setdefault("ITEM_STREAM_LISTEN", "false")
+os.environ.setdefault("JOB_WORKERS", "0")
+
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.core.throttle import login_throttle
 from app.db.base import Base
 from app.db.session import get_db
 from app.main import app
@@ -51,6 +59,7 @@ def client(db) -> Generator:
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    login_throttle.reset()
     with TestClient(app) as c:
         yield c
 
@@ -73,4 +73,111 @@ def test_access_with_invalid_token(client: TestClient) -> None:
     """
     headers = {"Authorization": "Bearer invalid_token"}
     response = client.post("/api/v1/auth/test-token", headers=headers)
-    assert response.status_code == 403  # Forbidden 
\ No newline at end of file
+    assert response.status_code == 403  # Forbidden 
+
+def test_login_rehashes_outdated_password(
+    client: TestClient, db: Session, normal_user: Dict[str, str]
+) -> None:
+    """
+    Test that a hash not matching the current bcrypt policy is replaced on login.
+    """
+    from app.core.security import bcrypt_rounds, password_needs_rehash, pwd_context
+
+    rounds = bcrypt_rounds()
+    user = user_service.get_by_email(db, email=normal_user["email"])
+    user.hashed_password = pwd_context.handler("bcrypt").using(rounds=rounds + 2).hash("password")
+    db.commit()
+    assert password_needs_rehash(user.hashed_password)
+
+    login_data = {"username": normal_user["email"], "password": "password"}
+    response = client.post("/api/v1/auth/login", data=login_data)
+    assert response.status_code == 200
+
+    db.expire_all()
+    user = user_service.get_by_email(db, email=normal_user["email"])
+    assert not password_needs_rehash(user.hashed_password)
+    assert f"${rounds:02d}$" in user.hashed_password
+
+
+def test_login_throttled_per_account(
+    client: TestClient, normal_user: Dict[str, str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Test that repeated attempts on one account are rejected before hashing.
+    """
+    from app.core import security
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "LOGIN_THROTTLE_ACCOUNT_CAPACITY", 2)
+    login_data = {"username": normal_user["email"], "password": "wrong_password"}
+    for _ in range(2):
+        assert client.post("/api/v1/auth/login", data=login_data).status_code == 401
+
+    def fail_verify(*args, **kwargs):
+        raise AssertionError("password hashed despite throttling")
+
+    monkeypatch.setattr(security.pwd_context, "verify", fail_verify)
+    response = client.post("/api/v1/auth/login", data=login_data)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+
+
+def test_login_throttled_per_ip(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Test that one IP cannot spray many accounts.
+    """
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "LOGIN_THROTTLE_IP_CAPACITY", 3)
+    statuses = [
+        client.post(
+            "/api/v1/auth/login",
+            data={"username": f"user{i}@example.com", "password": "password"},
+        ).status_code
+        for i in range(4)
+    ]
+    assert statuses == [401, 401, 401, 429]
+
+
+def test_account_rejection_does_not_use_ip_tokens(
+    client: TestClient, normal_user: Dict[str, str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Test that attempts rejected by the account limit leave the IP bucket untouched.
+    """
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "LOGIN_THROTTLE_IP_CAPACITY", 3)
+    monkeypatch.setattr(settings, "LOGIN_THROTTLE_ACCOUNT_CAPACITY", 1)
+    wrong = {"username": normal_user["email"], "password": "wrong_password"}
+    statuses = [client.post("/api/v1/auth/login", data=wrong).status_code for _ in range(4)]
+    assert statuses == [401, 429, 429, 429]
+    # Two IP tokens left for other accounts
+    statuses = [
+        client.post(
+            "/api/v1/auth/login",
+            data={"username": f"user{i}@example.com", "password": "password"},
+        ).status_code
+        for i in range(3)
+    ]
+    assert statuses == [401, 401, 429]
+
+
+def test_successful_logins_do_not_use_tokens(
+    client: TestClient, normal_user: Dict[str, str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Test that only failed attempts count against the IP and account limits.
+    """
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "LOGIN_THROTTLE_IP_CAPACITY", 2)
+    monkeypatch.setattr(settings, "LOGIN_THROTTLE_ACCOUNT_CAPACITY", 2)
+    login_data = {"username": normal_user["email"], "password": "password"}
+    for _ in range(5):
+        assert client.post("/api/v1/auth/login", data=login_data).status_code == 200
+    wrong = {**login_data, "password": "wrong_password"}
+    statuses = [client.post("/api/v1/auth/login", data=wrong).status_code for _ in range(3)]
+    assert statuses == [401, 401, 429]
@@ -0,0 +1,170 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.changefeed import ChangeFeed, event_stream, feed, format_sse
+from app.schemas.item import ItemCreate
+from app.schemas.user import UserCreate
+from app.services import item as item_service
+from app.services import item_archive
+from app.services import user as user_service
+
+
+def _marker() -> str:
+    """
+    Publish a marker event and return its id, to replay what follows it.
+    """
+    marker_id = f"marker-{uuid.uuid4()}"
+    feed.publish({"id": marker_id, "op": "marker"})
+    return marker_id
+
+
+def _replay_after(marker_id: str) -> List[Dict]:
+    async def run():
+        subscription, replay = feed.subscribe(marker_id)
+        feed.unsubscribe(subscription)
+        return replay
+
+    return asyncio.run(run())
+
+
+def subscription_count(changes: ChangeFeed) -> int:
+    return len(changes._subscribers)
+
+
+def test_replay_and_reset() -> None:
+    """
+    Test that subscribers resume after Last-Event-ID or get a reset when it is gone.
+    """
+    changes = ChangeFeed(buffer_size=3, queue_size=10)
+
+    async def run():
+        for event_id in range(1, 6):
+            changes.publish({"id": event_id, "op": "create", "owner_id": 1})
+        subscription, replay = changes.subscribe("3")
+        assert [e["id"] for e in replay] == [4, 5]
+        changes.unsubscribe(subscription)
+
+        subscription, replay = changes.subscribe("1")
+        assert replay is None
+        changes.publish({"id": 6, "op": "delete", "owner_id": 1})
+        assert (await asyncio.wait_for(subscription.queue.get(), 1))["id"] == 6
+        changes.unsubscribe(subscription)
+
+    asyncio.run(run())
+
+
+def test_stream_filters_by_owner_and_stops_when_lagging() -> None:
+    """
+    Test that a subscriber only sees its own items and is dropped when it falls behind.
+    """
+    changes = ChangeFeed(buffer_size=10, queue_size=2)
+
+    async def run():
+        subscription, replay = changes.subscribe()
+        for event_id in range(1, 4):
+            changes.publish({"id": event_id, "op": "create", "owner_id": event_id % 2})
+        await asyncio.sleep(0)
+        chunks = [chunk async for chunk in event_stream(subscription, replay, 1, 1)]
+        return chunks
+
+    chunks = asyncio.run(run())
+    assert chunks[0].startswith("retry:")
+    assert [c.split("\n")[0] for c in chunks[1:]] == ["id: 1"]
+    assert subscription_count(changes) == 0
+
+
+def test_item_mutations_emit_events(
+    client: TestClient, normal_user_token_headers: Dict[str, str], normal_user: Dict[str, str]
+) -> None:
+    """
+    Test that create, update and delete publish events once committed.
+    """
+    marker_id = _marker()
+    item = client.post(
+        "/api/v1/items/", headers=normal_user_token_headers, json={"title": "Watched"}
+    ).json()
+    client.put(
+        f"/api/v1/items/{item['id']}", headers=normal_user_token_headers, json={"title": "Edited"}
+    )
+    client.delete(f"/api/v1/items/{item['id']}", headers=normal_user_token_headers)
+
+    events = _replay_after(marker_id)
+    assert [(e["op"], e["item_id"], e["owner_id"]) for e in events] == [
+        ("create", item["id"], normal_user["id"]),
+        ("update", item["id"], normal_user["id"]),
+        ("delete", item["id"], normal_user["id"]),
+    ]
+
+
+def test_bulk_removals_emit_events(db: Session, normal_user: Dict[str, str]) -> None:
+    """
+    Test that archived items emit deletes and deleted users emit an owner-scoped reset.
+    """
+    old = item_service.create_item(db, ItemCreate(title="Old"), owner_id=normal_user["id"])
+    old.created_at = datetime.utcnow() - timedelta(days=400)
+    db.commit()
+    old_id = old.id
+    user = user_service.create_user(db, UserCreate(email="gone@example.com", password="password"))
+    user_id = user.id
+    item_service.create_item(db, ItemCreate(title="Cascaded"), owner_id=user_id)
+
+    marker_id = _marker()
+    now = datetime.utcnow()
+    assert item_archive.archive_batch(db, now - timedelta(days=200), 10, now) == 1
+    assert user_service.delete_user(db, user_id)
+
+    events = _replay_after(marker_id)
+    assert [(e["op"], e.get("item_id"), e["owner_id"]) for e in events] == [
+        ("delete", old_id, normal_user["id"]),
+        ("reset", None, user_id),
+    ]
+
+    async def stream(owner_id: int) -> List[str]:
+        subscription, _ = ChangeFeed(10, 10).subscribe()
+        subscription.lagged = True
+        return [chunk async for chunk in event_stream(subscription, events, owner_id, 1)]
+
+    # The owner-scoped reset reaches only that owner (and superusers)
+    reset = format_sse(events[1])
+    assert reset.startswith(f"id: {events[1]['id']}\nevent: reset\n")
+    assert reset in asyncio.run(stream(user_id))
+    assert reset not in asyncio.run(stream(normal_user["id"]))
+
+
+def test_stream_endpoint_replays_visible_events(
+    client: TestClient,
+    normal_user_token_headers: Dict[str, str],
+    superuser_token_headers: Dict[str, str],
+) -> None:
+    """
+    Test the SSE endpoint resumes from Last-Event-ID and hides other users' items.
+    """
+    marker_id = _marker()
+    mine = client.post(
+        "/api/v1/items/", headers=normal_user_token_headers, json={"title": "Mine"}
+    ).json()
+    client.post("/api/v1/items/", headers=superuser_token_headers, json={"title": "Admin's"})
+
+    # The request deadline ends the stream, so the body holds the replay
+    response = client.get(
+        "/api/v1/items/stream",
+        headers={
+            **normal_user_token_headers,
+            "Last-Event-ID": marker_id,
+            "X-Request-Timeout": "0.3",
+        },
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [
+        json.loads(line[len("data: "):])
+        for line in response.text.splitlines()
+        if line.startswith("data: ")
+    ]
+    assert [(e["op"], e["item_id"]) for e in events] == [("create", mine["id"])]
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+from fastapi import BackgroundTasks, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import deadline
+from app.core.config import settings
+from app.core.deadline import DeadlineExceeded, DeadlineMiddleware, statement_timeout_ms
+from app.core.metrics import metrics
+
+
+def _make_app(events=None) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(DeadlineMiddleware)
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.sleep(2)
+        return {"done": True}
+
+    @app.get("/background")
+    async def background(background_tasks: BackgroundTasks):
+        async def task():
+            await asyncio.sleep(0.2)
+            if events is not None:
+                events.append(statement_timeout_ms())
+
+        background_tasks.add_task(task)
+        return {"done": True}
+
+    @app.get("/budget")
+    def budget():
+        return {"timeout_ms": statement_timeout_ms()}
+
+    return app
+
+
+def test_request_cancelled_at_deadline() -> None:
+    """
+    Test that a request past its X-Request-Timeout is cancelled with a 504.
+    """
+    before = metrics.get("deadline_exceeded", "/slow")
+    with TestClient(_make_app()) as client:
+        response = client.get("/slow", headers={"X-Request-Timeout": "0.05"})
+    assert response.status_code == 504
+    assert metrics.get("deadline_exceeded", "/slow") == before + 1
+
+
+def test_deadline_visible_to_sync_endpoints(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test that the remaining budget reaches threadpool endpoints, capped by the maximum.
+    """
+    monkeypatch.setattr(settings, "REQUEST_TIMEOUT_MAX_SECONDS", 5)
+    with TestClient(_make_app()) as client:
+        timeout_ms = client.get("/budget", headers={"X-Request-Timeout": "2"}).json()["timeout_ms"]
+        assert 1000 < timeout_ms <= 2000
+        timeout_ms = client.get("/budget", headers={"X-Request-Timeout": "600"}).json()["timeout_ms"]
+        assert 4000 < timeout_ms <= 5000
+
+
+def test_route_default_timeouts(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test that the longest matching route prefix sets the default deadline.
+    """
+    monkeypatch.setattr(settings, "REQUEST_TIMEOUT_ROUTES", "/=20,/budget=3")
+    with TestClient(_make_app()) as client:
+        timeout_ms = client.get("/budget").json()["timeout_ms"]
+    assert 2000 < timeout_ms <= 3000
+
+
+def test_expired_deadline_refuses_new_transactions() -> None:
+    """
+    Test that no statement is started once the deadline has passed.
+    """
+    token = deadline.set_deadline(-1)
+    try:
+        with pytest.raises(DeadlineExceeded):
+            statement_timeout_ms()
+    finally:
+        deadline._deadline.reset(token)
+    assert statement_timeout_ms() is None
+
+
+def test_background_task_past_deadline() -> None:
+    """
+    Test that post-response tasks outlive the deadline, without a statement timeout.
+    """
+    events = []
+    with TestClient(_make_app(events)) as client:
+        response = client.get("/background", headers={"X-Request-Timeout": "0.05"})
+    assert response.status_code == 200
+    assert response.json() == {"done": True}
+    assert events == [None]
@@ -0,0 +1,139 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict
+
+import pytest
+from fastapi import Request
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.api.v1.idempotency import idempotent
+from app.models.idempotency_key import IdempotencyKey
+from app.models.item import Item
+from app.services import idempotency
+
+
+def _post_item(client: TestClient, headers: Dict[str, str], key: str, title: str = "Once"):
+    return client.post(
+        "/api/v1/items/", headers={**headers, "Idempotency-Key": key}, json={"title": title}
+    )
+
+
+def test_retry_replays_the_first_response(
+    client: TestClient, db: Session, normal_user_token_headers: Dict[str, str]
+) -> None:
+    """
+    Test that retrying with the same key returns the stored response without a second write.
+    """
+    first = _post_item(client, normal_user_token_headers, "retry-1")
+    assert first.status_code == 200
+    assert "Idempotent-Replayed" not in first.headers
+
+    retry = _post_item(client, normal_user_token_headers, "retry-1")
+    assert retry.status_code == 200
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    assert db.query(Item).count() == 1
+
+    # A new key is a new request
+    other = _post_item(client, normal_user_token_headers, "retry-2")
+    assert other.json()["id"] != first.json()["id"]
+
+
+def test_key_reused_for_another_request(
+    client: TestClient, normal_user_token_headers: Dict[str, str]
+) -> None:
+    """
+    Test that a key reused with a different body is rejected with 422.
+    """
+    _post_item(client, normal_user_token_headers, "reused", title="A")
+    response = _post_item(client, normal_user_token_headers, "reused", title="B")
+    assert response.status_code == 422
+
+
+def test_concurrent_duplicate_is_not_executed(
+    client: TestClient,
+    db: Session,
+    normal_user: Dict[str, str],
+    normal_user_token_headers: Dict[str, str],
+) -> None:
+    """
+    Test that a duplicate arriving while the first request runs gets 409.
+    """
+    body = b'{"title":"Once"}'
+    # The first request holds the key but has not finished yet
+    idempotency.begin(
+        db,
+        f"user:{normal_user['id']}",
+        "in-flight",
+        idempotency.fingerprint("POST", "/api/v1/items/", body),
+    )
+    response = client.post(
+        "/api/v1/items/",
+        headers={**normal_user_token_headers, "Idempotency-Key": "in-flight"},
+        content=body,
+    )
+    assert response.status_code == 409
+    assert response.headers["Retry-After"] == "1"
+    assert db.query(Item).count() == 0
+
+
+def test_failed_request_releases_key(
+    client: TestClient,
+    superuser_token_headers: Dict[str, str],
+    normal_user: Dict[str, str],
+) -> None:
+    """
+    Test that an error is not stored, so a corrected retry can run.
+    """
+    headers = {**superuser_token_headers, "Idempotency-Key": "signup"}
+    data = {"email": normal_user["email"], "password": "password"}
+    assert client.post("/api/v1/users/", headers=headers, json=data).status_code == 400
+    assert client.post("/api/v1/users/", headers=headers, json=data).status_code == 400
+
+
+def test_unknown_outcome_keeps_key_in_progress(
+    client: TestClient,
+    db: Session,
+    normal_user: Dict[str, str],
+    normal_user_token_headers: Dict[str, str],
+) -> None:
+    """
+    Test that a cancelled request, whose write may have happened, keeps its key.
+    """
+    body = b'{"title":"Once"}'
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def cancelled() -> bytes:
+        raise asyncio.CancelledError()
+
+    request = Request(
+        {"type": "http", "method": "POST", "path": "/api/v1/items/", "headers": []}, receive
+    )
+    scope = f"user:{normal_user['id']}"
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(idempotent(request, db, "timed-out", scope, cancelled))
+
+    assert db.query(IdempotencyKey).filter_by(key="timed-out").one().status == "in_progress"
+    retry = client.post(
+        "/api/v1/items/",
+        headers={**normal_user_token_headers, "Idempotency-Key": "timed-out"},
+        content=body,
+    )
+    assert retry.status_code == 409
+
+
+def test_expired_keys_are_reusable_and_purged(db: Session) -> None:
+    """
+    Test that keys past their TTL can be taken again and are purged.
+    """
+    past = datetime.utcnow() - timedelta(days=2)
+    assert idempotency.begin(db, "user:1", "old", "a" * 64, now=past) is None
+    idempotency.finish(db, "user:1", "old", 200, b"{}")
+    with pytest.raises(idempotency.IdempotencyMismatch):
+        idempotency.begin(db, "user:1", "old", "b" * 64, now=past)
+
+    assert idempotency.purge_expired(db) == 1
+    assert idempotency.begin(db, "user:1", "old", "b" * 64) is None
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+from typing import Dict
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import fork_session
+from app.models.item import Item
+from app.schemas.item import ItemCreate
+from app.services import item as item_service
+from app.services import item_archive
+
+
+@pytest.fixture
+def aged_items(db: Session, normal_user: Dict[str, str]) -> Dict[str, int]:
+    """
+    Three items created 400, 300 and 0 days ago.
+    """
+    now = datetime.utcnow()
+    ids = {}
+    for title, age in (("Ancient", 400), ("Old", 300), ("Fresh", 0)):
+        item = item_service.create_item(db, ItemCreate(title=title), owner_id=normal_user["id"])
+        item.created_at = now - timedelta(days=age)
+        ids[title] = item.id
+    db.commit()
+    return ids
+
+
+def test_archive_moves_old_items_in_batches(
+    db: Session,
+    normal_user: Dict[str, str],
+    aged_items: Dict[str, int],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Test that items past the age limit move to the archive, one batch at a time.
+    """
+    monkeypatch.setattr(settings, "ITEM_ARCHIVE_AFTER_DAYS", 200)
+    monkeypatch.setattr(settings, "ITEM_ARCHIVE_BATCH_SIZE", 1)
+    monkeypatch.setattr(settings, "ITEM_ARCHIVE_PAUSE_SECONDS", 0)
+
+    session_factory = lambda: fork_session(db)
+    assert item_archive.archive_old_items(session_factory, max_batches=1) == 1
+    assert item_service.get_by_id(db, aged_items["Ancient"]) is None
+    assert item_archive.archive_old_items(session_factory) == 1
+
+    db.expire_all()
+    assert [item.title for item in db.query(Item)] == ["Fresh"]
+    archived = item_service.get_archived_by_id(db, aged_items["Old"])
+    assert archived.title == "Old" and archived.archived_at is not None
+    # Counters only track items in the hot table
+    assert item_service.count_by_owner(db, normal_user["id"]) == 1
+
+
+def test_archived_items_stay_readable(
+    client: TestClient,
+    db: Session,
+    normal_user_token_headers: Dict[str, str],
+    aged_items: Dict[str, int],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Test that GET falls back to the archive and listings can include it.
+    """
+    monkeypatch.setattr(settings, "ITEM_ARCHIVE_AFTER_DAYS", 200)
+    item_archive.archive_old_items(lambda: fork_session(db))
+
+    response = client.get(
+        f"/api/v1/items/{aged_items['Ancient']}", headers=normal_user_token_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["archived_at"] is not None
+
+    response = client.get("/api/v1/items/", headers=normal_user_token_headers)
+    assert [item["title"] for item in response.json()] == ["Fresh"]
+
+    response = client.get(
+        "/api/v1/items/?include_archived=true&sort=-created_at&skip=1&limit=2&with_total=true",
+        headers=normal_user_token_headers,
+    )
+    assert [item["title"] for item in response.json()] == ["Old", "Ancient"]
+    assert response.headers["X-Total-Count"] == "3"
+
+    # Archived items are read-only
+    response = client.put(
+        f"/api/v1/items/{aged_items['Old']}",
+        headers=normal_user_token_headers,
+        json={"title": "Edited"},
+    )
+    assert response.status_code == 404
@@ -1,9 +1,13 @@
+import asyncio
 from typing import Dict
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.metrics import metrics
 from app.main import app
 from app.services import item as item_service
 from app.schemas.item import ItemCreate
@@ -116,4 +120,326 @@ def test_read_other_user_item(
     
     # Normal user should not be able to read superuser's item
     response = client.get(f"/api/v1/items/{superuser_item['id']}", headers=normal_user_token_headers)
-    assert response.status_code == 403  # Forbidden 
\ No newline at end of file
+    assert response.status_code == 403  # Forbidden 
+
+def test_search_items(
+    client: TestClient,
+    normal_user_token_headers: Dict[str, str],
+    superuser_token_headers: Dict[str, str],
+) -> None:
+    """
+    Test searching items, ranking, owner scoping and keyset pagination.
+    """
+    for title, description in [
+        ("Garden hose", "Green rubber"),
+        ("Blue bucket", "Useful in the garden"),
+        ("Gardening gloves", "Leather"),
+        ("Hammer", "Steel"),
+    ]:
+        client.post(
+            "/api/v1/items/",
+            headers=normal_user_token_headers,
+            json={"title": title, "description": description},
+        )
+    client.post(
+        "/api/v1/items/",
+        headers=superuser_token_headers,
+        json={"title": "Garden chair", "description": "Admin only"},
+    )
+
+    response = client.get(
+        "/api/v1/items/search", headers=normal_user_token_headers, params={"q": "garden"}
+    )
+    assert response.status_code == 200
+    titles = [i["title"] for i in response.json()]
+    assert set(titles) == {"Garden hose", "Blue bucket", "Gardening gloves"}
+    # Title prefix matches rank above description-only matches
+    assert titles[-1] == "Blue bucket"
+
+    # Keyset pagination
+    first = client.get(
+        "/api/v1/items/search",
+        headers=normal_user_token_headers,
+        params={"q": "garden", "limit": 2},
+    )
+    assert len(first.json()) == 2
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get(
+        "/api/v1/items/search",
+        headers=normal_user_token_headers,
+        params={"q": "garden", "limit": 2, "cursor": cursor},
+    )
+    seen = [i["id"] for i in first.json()] + [i["id"] for i in second.json()]
+    assert len(seen) == len(set(seen)) == 3
+
+    # Superusers search across all owners
+    response = client.get(
+        "/api/v1/items/search", headers=superuser_token_headers, params={"q": "garden"}
+    )
+    assert len(response.json()) == 4
+
+    response = client.get(
+        "/api/v1/items/search",
+        headers=normal_user_token_headers,
+        params={"q": "garden", "cursor": "not-a-cursor"},
+    )
+    assert response.status_code == 400
+
+
+def test_search_pagination_across_tied_ranks(
+    client: TestClient, normal_user_token_headers: Dict[str, str]
+) -> None:
+    """
+    Test that items sharing one rank are neither lost nor repeated across pages.
+    """
+    created = [
+        client.post(
+            "/api/v1/items/", headers=normal_user_token_headers, json={"title": f"Tied {n}"}
+        ).json()["id"]
+        for n in range(5)
+    ]
+    seen, cursor = [], None
+    while True:
+        params = {"q": "tied", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(
+            "/api/v1/items/search", headers=normal_user_token_headers, params=params
+        )
+        seen += [i["id"] for i in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == sorted(created, reverse=True)
+
+    # The cursor carries the rank bit for bit
+    rank = 0.1 + 0.2
+    assert item_service.decode_search_cursor(
+        item_service.encode_search_cursor(rank, 7)
+    ) == (rank, 7)
+
+
+def test_read_items_filtered_and_sorted(
+    client: TestClient, normal_user_token_headers: Dict[str, str]
+) -> None:
+    """
+    Test whitelisted filters and sort keys on the item listing.
+    """
+    for title in ["Banana", "Apple", "Apricot", "Cherry"]:
+        client.post("/api/v1/items/", headers=normal_user_token_headers, json={"title": title})
+
+    response = client.get(
+        "/api/v1/items/", headers=normal_user_token_headers, params={"sort": "-title"}
+    )
+    assert response.status_code == 200
+    assert [i["title"] for i in response.json()] == ["Cherry", "Banana", "Apricot", "Apple"]
+
+    response = client.get(
+        "/api/v1/items/", headers=normal_user_token_headers, params={"title_prefix": "Ap"}
+    )
+    assert [i["title"] for i in response.json()] == ["Apple", "Apricot"]
+
+    # The next code point after U+D7FF skips the surrogate range
+    assert item_service._prefix_upper_bound("a\ud7ff") == "a\ue000"
+    response = client.get(
+        "/api/v1/items/", headers=normal_user_token_headers, params={"title_prefix": "\ud7ff"}
+    )
+    assert response.status_code == 200
+    assert response.json() == []
+
+    items = client.get(
+        "/api/v1/items/", headers=normal_user_token_headers, params={"sort": "created_at"}
+    ).json()
+    response = client.get(
+        "/api/v1/items/",
+        headers=normal_user_token_headers,
+        params={"created_after": items[2]["created_at"]},
+    )
+    assert [i["id"] for i in response.json()] == [items[2]["id"], items[3]["id"]]
+
+
+def test_read_items_rejects_unindexed_combinations(
+    client: TestClient, normal_user_token_headers: Dict[str, str]
+) -> None:
+    """
+    Test that filter/sort combinations no index can serve are rejected.
+    """
+    response = client.get(
+        "/api/v1/items/",
+        headers=normal_user_token_headers,
+        params={"title_prefix": "A", "created_after": "2020-01-01T00:00:00"},
+    )
+    assert response.status_code == 400
+    response = client.get(
+        "/api/v1/items/",
+        headers=normal_user_token_headers,
+        params={"title_prefix": "A", "sort": "created_at"},
+    )
+    assert response.status_code == 400
+    response = client.get(
+        "/api/v1/items/", headers=normal_user_token_headers, params={"sort": "description"}
+    )
+    assert response.status_code == 422
+
+
+def test_read_items_total_count(
+    client: TestClient,
+    normal_user_token_headers: Dict[str, str],
+    superuser_token_headers: Dict[str, str],
+) -> None:
+    """
+    Test X-Total-Count from the per-owner counter and the global estimate.
+    """
+    for title in ["One", "Two", "Three"]:
+        client.post("/api/v1/items/", headers=normal_user_token_headers, json={"title": title})
+    client.post("/api/v1/items/", headers=superuser_token_headers, json={"title": "Admin"})
+
+    response = client.get(
+        "/api/v1/items/",
+        headers=normal_user_token_headers,
+        params={"with_total": True, "limit": 1},
+    )
+    assert response.headers["X-Total-Count"] == "3"
+    assert response.headers["X-Total-Count-Approximate"] == "false"
+
+    items = response.json()
+    client.delete(f"/api/v1/items/{items[0]['id']}", headers=normal_user_token_headers)
+    response = client.get(
+        "/api/v1/items/", headers=normal_user_token_headers, params={"with_total": True}
+    )
+    assert response.headers["X-Total-Count"] == "2"
+
+    response = client.get(
+        "/api/v1/items/",
+        headers=normal_user_token_headers,
+        params={"with_total": True, "title_prefix": "T"},
+    )
+    assert response.headers["X-Total-Count"] == "2"
+
+    response = client.get(
+        "/api/v1/items/", headers=superuser_token_headers, params={"with_total": True}
+    )
+    assert response.headers["X-Total-Count"] == "3"
+
+    response = client.get("/api/v1/items/", headers=normal_user_token_headers)
+    assert "X-Total-Count" not in response.headers
+
+
+def test_concurrent_creates_share_one_commit(db: Session, normal_user: Dict[str, str]) -> None:
+    """
+    Test that concurrent batched creates are flushed together, each caller getting its own row.
+    """
+    owner_id = normal_user["id"]
+    before = metrics.get("group_commit_flushes", "items")
+
+    async def run():
+        return await asyncio.gather(
+            *[
+                item_service.create_item_batched(
+                    db, item_in=ItemCreate(title=f"Batch {i}"), owner_id=owner_id
+                )
+                for i in range(5)
+            ]
+        )
+
+    items = asyncio.run(run())
+    assert [item.title for item in items] == [f"Batch {i}" for i in range(5)]
+    assert len({item.id for item in items}) == 5
+    assert metrics.get("group_commit_flushes", "items") == before + 1
+    assert item_service.count_by_owner(db, owner_id=owner_id) == 5
+
+
+def test_batched_create_isolates_failing_rows(db: Session, normal_user: Dict[str, str]) -> None:
+    """
+    Test that one invalid row fails only its own caller.
+    """
+    owner_id = normal_user["id"]
+    invalid = ItemCreate.model_construct(title=None, description=None)
+
+    async def run():
+        return await asyncio.gather(
+            item_service.create_item_batched(db, item_in=ItemCreate(title="Good"), owner_id=owner_id),
+            item_service.create_item_batched(db, item_in=invalid, owner_id=owner_id),
+            return_exceptions=True,
+        )
+
+    good, bad = asyncio.run(run())
+    assert good.title == "Good"
+    assert isinstance(bad, IntegrityError)
+    assert item_service.count_by_owner(db, owner_id=owner_id) == 1
+
+
+def test_create_item_endpoint_with_batching(
+    client: TestClient,
+    normal_user_token_headers: Dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Test that the batched write path returns the same response as the direct one.
+    """
+    monkeypatch.setattr(settings, "ITEM_WRITE_BATCH_ENABLED", True)
+    data = {"title": "Batched", "description": "Grouped commit"}
+    response = client.post("/api/v1/items/", headers=normal_user_token_headers, json=data)
+    assert response.status_code == 200
+    item = response.json()
+    assert item["title"] == data["title"]
+    assert item["created_at"]
+
+    response = client.get(f"/api/v1/items/{item['id']}", headers=normal_user_token_headers)
+    assert response.json() == item
+
+
+def test_update_item_with_stale_version(
+    client: TestClient, normal_user_token_headers: Dict[str, str]
+) -> None:
+    """
+    Test that an update carrying an outdated version is rejected with 409.
+    """
+    item = client.post(
+        "/api/v1/items/", headers=normal_user_token_headers, json={"title": "Versioned"}
+    ).json()
+    assert item["version"] == 1
+
+    response = client.put(
+        f"/api/v1/items/{item['id']}",
+        headers=normal_user_token_headers,
+        json={"title": "First", "version": 1},
+    )
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+
+    response = client.put(
+        f"/api/v1/items/{item['id']}",
+        headers=normal_user_token_headers,
+        json={"title": "Second", "version": 1},
+    )
+    assert response.status_code == 409
+    response = client.get(f"/api/v1/items/{item['id']}", headers=normal_user_token_headers)
+    assert response.json()["title"] == "First"
+
+
+def test_concurrent_item_updates_do_not_overwrite(
+    db: Session, normal_user: Dict[str, str]
+) -> None:
+    """
+    Test that the losing writer of two concurrent read-modify-writes fails.
+    """
+    from sqlalchemy.orm.exc import StaleDataError
+
+    from app.db.session import fork_session
+    from app.schemas.item import ItemUpdate
+
+    item = item_service.create_item(db, ItemCreate(title="Shared"), owner_id=normal_user["id"])
+    item_id = item.id
+    first, second = fork_session(db), fork_session(db)
+    try:
+        mine = item_service.get_by_id(first, item_id)
+        theirs = item_service.get_by_id(second, item_id)
+        item_service.update_item(first, mine, ItemUpdate(title="Mine"))
+        with pytest.raises(StaleDataError):
+            item_service.update_item(second, theirs, ItemUpdate(title="Theirs"))
+    finally:
+        first.close()
+        second.close()
+    db.expire_all()
+    assert item_service.get_by_id(db, item_id).title == "Mine"
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import fork_session
+from app.services import job as job_service
+
+
+@pytest.fixture
+def flaky_handler(monkeypatch: pytest.MonkeyPatch):
+    calls = {"count": 0}
+
+    def run(ctx: job_service.JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+        calls["count"] += 1
+        ctx.progress(calls["count"], total=3)
+        if calls["count"] < payload["succeed_on"]:
+            raise RuntimeError(f"attempt {calls['count']} failed")
+        return {"attempts": calls["count"]}
+
+    monkeypatch.setitem(job_service.HANDLERS, "test.flaky", run)
+    # No backoff so that retries are immediately claimable
+    monkeypatch.setattr(settings, "JOB_RETRY_BASE_SECONDS", 0)
+    return calls
+
+
+def _drain(db: Session) -> None:
+    while job_service.run_next(lambda: fork_session(db), "test"):
+        pass
+
+
+def test_job_retries_until_success(db: Session, flaky_handler: Dict[str, int]) -> None:
+    """
+    Test that a failing job is retried and keeps its progress.
+    """
+    job = job_service.enqueue(db, "test.flaky", {"succeed_on": 2})
+    _drain(db)
+
+    db.refresh(job)
+    assert job.status == "done"
+    assert job.attempts == 2
+    assert job.result == {"attempts": 2}
+    assert job.error is None
+    assert (job.progress_done, job.progress_total) == (2, 3)
+    assert job.locked_until is None and job.finished_at is not None
+
+
+def test_job_fails_after_max_attempts(db: Session, flaky_handler: Dict[str, int]) -> None:
+    """
+    Test that a job is marked failed once its attempts are exhausted.
+    """
+    job = job_service.enqueue(db, "test.flaky", {"succeed_on": 10}, max_attempts=3)
+    _drain(db)
+
+    db.refresh(job)
+    assert job.status == "failed"
+    assert job.attempts == 3
+    assert job.error == "attempt 3 failed"
+    assert flaky_handler["count"] == 3
+
+
+def test_retry_delay_is_bounded(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test that the retry delay doubles with each attempt up to the maximum.
+    """
+    monkeypatch.setattr(settings, "JOB_RETRY_BASE_SECONDS", 5)
+    monkeypatch.setattr(settings, "JOB_RETRY_MAX_SECONDS", 30)
+    assert [job_service.retry_delay(n) for n in range(1, 6)] == [5, 10, 20, 30, 30]
+
+
+def test_read_job_access(
+    client: TestClient,
+    db: Session,
+    normal_user: Dict[str, str],
+    normal_user_token_headers: Dict[str, str],
+    superuser_token_headers: Dict[str, str],
+) -> None:
+    """
+    Test that only the job's creator or a superuser can follow it.
+    """
+    mine = job_service.enqueue(db, "test.noop", {}, created_by=normal_user["id"])
+    other = job_service.enqueue(db, "test.noop", {})
+
+    response = client.get(f"/api/v1/jobs/{mine.id}", headers=normal_user_token_headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "queued"
+
+    response = client.get(f"/api/v1/jobs/{other.id}", headers=normal_user_token_headers)
+    assert response.status_code == 403
+    response = client.get(f"/api/v1/jobs/{other.id}", headers=superuser_token_headers)
+    assert response.status_code == 200
+
+    response = client.get("/api/v1/jobs/999999", headers=superuser_token_headers)
+    assert response.status_code == 404
+
+
+def test_expired_lease_at_max_attempts_fails(db: Session, flaky_handler: Dict[str, int]) -> None:
+    """
+    Test that a job whose worker died on its last attempt is failed, not reclaimed.
+    """
+    job = job_service.enqueue(db, "test.flaky", {"succeed_on": 1}, max_attempts=2)
+    for worker_id in ("dead-1", "dead-2"):
+        claimed = job_service.claim(db, worker_id)
+        assert claimed.id == job.id
+        # The worker is killed: neither complete() nor fail() runs
+        claimed.locked_until = datetime.utcnow() - timedelta(seconds=1)
+        db.commit()
+
+    assert job_service.claim(db, "test") is None
+    db.refresh(job)
+    assert (job.status, job.attempts) == ("failed", 2)
+    assert job.error == "Bail expiré à la dernière tentative"
+    assert flaky_handler["count"] == 0
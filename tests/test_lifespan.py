@@ -0,0 +1,118 @@
+from typing import Dict
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import settings
+from app.core import lifespan
+from app.core.lifespan import state, warm_pool
+from app.core.metrics import metrics
+
+
+def test_ready_after_warmup(client: TestClient) -> None:
+    """
+    Test that the readiness probe reports the database round-trip once started.
+    """
+    assert state.ready
+    assert "warmup_seconds" in metrics.snapshot()
+    response = client.get("/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready"
+    assert body["db_latency_ms"] >= 0
+
+
+def test_not_ready_when_database_is_slow(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Test that a database slower than the threshold fails readiness but not liveness.
+    """
+    monkeypatch.setattr(settings, "READY_MAX_DB_LATENCY_MS", -1)
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "database_slow"
+    assert client.get("/health").status_code == 200
+
+
+def test_not_ready_before_warmup(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test that readiness is refused until the lifespan warmup has completed.
+    """
+    monkeypatch.setattr(state, "ready", False)
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "starting"
+
+
+def test_warm_pool_keeps_connections_open(tmp_path) -> None:
+    """
+    Test that warmed connections stay in the pool for the first requests.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path}/warm.db", poolclass=QueuePool, pool_size=3)
+    try:
+        assert warm_pool(engine, 3) == 3
+        assert engine.pool.checkedin() == 3
+    finally:
+        engine.dispose()
+
+
+def test_warmup_skips_partitions_outside_reachable_postgresql(
+    tmp_path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Test that partition maintenance skips SQLite and unreachable shards without tracebacks.
+    """
+    sqlite = create_engine(f"sqlite:///{tmp_path}/warm.db")
+    down = create_engine("postgresql://app@127.0.0.1:1/app")
+    unchecked = create_engine("postgresql://app@127.0.0.1:1/app")
+    monkeypatch.setattr(
+        lifespan, "engines", {"shard0": sqlite, "shard1": down, "shard2": unchecked}
+    )
+
+    def warm(engine, connections):
+        if engine is down:
+            raise ConnectionRefusedError
+        # Pool warmup disabled on the other shards
+        return 0
+
+    calls = []
+
+    def ensure_partitions(db):
+        calls.append(db.get_bind())
+        raise OperationalError("SELECT 1", {}, ConnectionRefusedError("refused"))
+
+    monkeypatch.setattr(lifespan, "warm_pool", warm)
+    monkeypatch.setattr(lifespan.item_partitions, "ensure_partitions", ensure_partitions)
+    errors, warnings = [], []
+    monkeypatch.setattr(lifespan.logger, "exception", lambda *args: errors.append(args[-1]))
+    monkeypatch.setattr(lifespan.logger, "warning", lambda *args: warnings.append(args[1]))
+    lifespan.warmup()
+    # Only the failed pool warmup gets a traceback; SQLite is never touched
+    assert calls == [unchecked]
+    assert errors == ["shard1"]
+    assert warnings == ["shard2"]
+
+
+def test_metrics_require_token_or_superuser(
+    client: TestClient,
+    normal_user_token_headers: Dict[str, str],
+    superuser_token_headers: Dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Test that metrics are only served to a scraper token or a superuser.
+    """
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers=normal_user_token_headers).status_code == 400
+    assert client.get("/metrics", headers=superuser_token_headers).status_code == 200
+
+    scraper = {"Authorization": "Bearer scrape-secret"}
+    assert client.get("/metrics", headers=scraper).status_code == 403
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    response = client.get("/metrics", headers=scraper)
+    assert response.status_code == 200
+    assert "warmup_seconds" in response.json()
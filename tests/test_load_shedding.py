@@ -0,0 +1,76 @@
+from typing import Dict
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.load_shedding import AdaptiveLimiter, limiter
+from app.core.metrics import metrics
+
+
+def test_limit_grows_on_fast_responses_and_backs_off_on_slow_ones() -> None:
+    """
+    Test the additive increase / multiplicative decrease of the limit.
+    """
+    aimd = AdaptiveLimiter(initial=10, min_limit=2, max_limit=12, latency_target=0.1, cooldown=0)
+    for _ in range(10):
+        assert aimd.try_acquire()
+        aimd.release(0.01)
+    assert 10.9 < aimd.limit < 11.1
+
+    assert aimd.try_acquire()
+    aimd.release(1.0)
+    assert aimd.limit == pytest.approx(11 * 0.9, rel=0.01)
+
+    for _ in range(100):
+        assert aimd.try_acquire()
+        aimd.release(1.0, ok=False)
+    assert aimd.limit == 2
+    assert aimd.inflight == 0
+
+
+def test_decrease_is_rate_limited() -> None:
+    """
+    Test that a burst of slow responses only backs off once per cooldown.
+    """
+    aimd = AdaptiveLimiter(initial=10, min_limit=1, max_limit=100, latency_target=0.1, cooldown=60)
+    for _ in range(5):
+        aimd.try_acquire()
+    for _ in range(5):
+        aimd.release(1.0)
+    assert aimd.limit == 9
+
+
+def test_requests_beyond_limit_are_shed(
+    client: TestClient,
+    normal_user_token_headers: Dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Test that excess requests get 503 + Retry-After while priority routes pass.
+    """
+    monkeypatch.setattr(limiter, "inflight", int(limiter.limit))
+    before = metrics.get("load_shed_rejected")
+
+    response = client.get("/api/v1/items/", headers=normal_user_token_headers)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert metrics.get("load_shed_rejected") == before + 1
+
+    assert client.get("/health").status_code == 200
+    response = client.post("/api/v1/auth/test-token", headers=normal_user_token_headers)
+    assert response.status_code == 200
+
+
+def test_admitted_requests_release_their_slot(
+    client: TestClient,
+    normal_user_token_headers: Dict[str, str],
+    superuser_token_headers: Dict[str, str],
+) -> None:
+    """
+    Test that the in-flight count returns to zero and the limit is exposed.
+    """
+    response = client.get("/api/v1/items/", headers=normal_user_token_headers)
+    assert response.status_code == 200
+    assert limiter.inflight == 0
+    snapshot = client.get("/metrics", headers=superuser_token_headers).json()
+    assert snapshot["load_shed_limit"]["total"] >= limiter.min_limit
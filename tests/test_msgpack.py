@@ -0,0 +1,105 @@
+from datetime import datetime
+from typing import Dict
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1.negotiation import MSGPACK, wants_msgpack
+
+msgpack = pytest.importorskip("msgpack")
+
+
+def _packed(headers: Dict[str, str], **extra: str) -> Dict[str, str]:
+    return {**headers, "Accept": MSGPACK, **extra}
+
+
+def _unpack(response) -> object:
+    assert response.headers["content-type"] == MSGPACK
+    return msgpack.unpackb(response.content, timestamp=3)
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, False),
+        ("*/*", False),
+        ("application/json", False),
+        ("application/msgpack", True),
+        ("application/x-msgpack", True),
+        ("application/json;q=0.9, application/msgpack", True),
+        ("application/json, application/msgpack;q=0.5", False),
+        ("application/msgpack;q=0", False),
+    ],
+)
+def test_accept_negotiation(accept: str, expected: bool) -> None:
+    """
+    Test that MessagePack is chosen only when Accept prefers it over JSON.
+    """
+    assert wants_msgpack(accept) is expected
+
+
+def test_msgpack_request_and_response(
+    client: TestClient, normal_user_token_headers: Dict[str, str]
+) -> None:
+    """
+    Test that an item posted as MessagePack comes back packed with native datetimes.
+    """
+    response = client.post(
+        "/api/v1/items/",
+        headers=_packed(normal_user_token_headers, **{"Content-Type": MSGPACK}),
+        content=msgpack.packb({"title": "Packed", "description": "binaire"}),
+    )
+    assert response.status_code == 200
+    created = _unpack(response)
+    assert created["title"] == "Packed"
+    assert isinstance(created["created_at"], datetime)
+    assert response.headers["vary"] == "Accept"
+
+    listed = _unpack(client.get("/api/v1/items/", headers=_packed(normal_user_token_headers)))
+    assert [item["id"] for item in listed] == [created["id"]]
+    assert listed[0]["created_at"] == created["created_at"]
+
+    # No preference: JSON
+    plain = client.get("/api/v1/items/", headers=normal_user_token_headers)
+    assert plain.headers["content-type"] == "application/json"
+    assert plain.json()[0]["title"] == "Packed"
+
+
+def test_prebuilt_json_bodies_are_transcoded(
+    client: TestClient,
+    normal_user_token_headers: Dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Test that cached and replayed JSON responses are served packed, with native datetimes.
+    """
+    from app.core.config import settings
+
+    headers = _packed(normal_user_token_headers, **{"Idempotency-Key": "packed"})
+    first = _unpack(client.post("/api/v1/items/", headers=headers, json={"title": "Once"}))
+    replay = client.post("/api/v1/items/", headers=headers, json={"title": "Once"})
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert _unpack(replay) == first
+
+    monkeypatch.setattr(settings, "SINGLE_FLIGHT_ENABLED", True)
+    response = client.get(f"/api/v1/items/{first['id']}", headers=normal_user_token_headers)
+    assert response.headers["content-type"] == "application/json"
+    packed = _unpack(
+        client.get(f"/api/v1/items/{first['id']}", headers=_packed(normal_user_token_headers))
+    )
+    assert packed == first
+
+
+def test_invalid_msgpack_body(
+    client: TestClient, normal_user_token_headers: Dict[str, str]
+) -> None:
+    """
+    Test that an undecodable MessagePack body is rejected with a JSON error.
+    """
+    response = client.post(
+        "/api/v1/items/",
+        headers=_packed(normal_user_token_headers, **{"Content-Type": MSGPACK}),
+        content=b"\xc1",
+    )
+    assert response.status_code == 400
+    assert response.headers["content-type"] == "application/json"
@@ -0,0 +1,117 @@
+import io
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+from app.db import online
+
+
+@pytest.mark.parametrize(
+    "statement, lock, duration",
+    [
+        ("CREATE INDEX ix_item_x ON item (title)", "SHARE", "parcours"),
+        (
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix ON item (id)",
+            "SHARE UPDATE EXCLUSIVE",
+            "parcours",
+        ),
+        ("DROP INDEX ix_item_x", "ACCESS EXCLUSIVE", "bref"),
+        (
+            "ALTER TABLE item ADD CONSTRAINT c CHECK (a IS NOT NULL) NOT VALID",
+            "ACCESS EXCLUSIVE",
+            "bref",
+        ),
+        ("ALTER TABLE item VALIDATE CONSTRAINT c", "SHARE UPDATE EXCLUSIVE", "parcours"),
+        ("ALTER TABLE item ALTER COLUMN title SET NOT NULL", "ACCESS EXCLUSIVE", "parcours"),
+        ("ALTER TABLE item ALTER COLUMN title TYPE TEXT", "ACCESS EXCLUSIVE", "réécriture"),
+        (
+            'ALTER TABLE "user" ADD COLUMN version INTEGER DEFAULT \'1\' NOT NULL',
+            "ACCESS EXCLUSIVE",
+            "bref",
+        ),
+        (
+            "ALTER TABLE item ADD COLUMN seen TIMESTAMP DEFAULT now()",
+            "ACCESS EXCLUSIVE",
+            "réécriture",
+        ),
+        (
+            'ALTER TABLE job ADD CONSTRAINT fk FOREIGN KEY (created_by) REFERENCES "user" (id)',
+            "SHARE ROW EXCLUSIVE",
+            "parcours",
+        ),
+        (
+            "ALTER TABLE item DETACH PARTITION item_p2020_01 CONCURRENTLY",
+            "SHARE UPDATE EXCLUSIVE",
+            "bref",
+        ),
+        ("UPDATE item SET description = ''", "ROW EXCLUSIVE", "parcours"),
+        ("CREATE TABLE audit (id INTEGER)", None, "bref"),
+    ],
+)
+def test_classify_table_locks(statement: str, lock: str, duration: str) -> None:
+    """
+    Test that each DDL statement is mapped to the table lock Postgres takes.
+    """
+    report = online.classify(statement)
+    assert (report.lock, report.duration) == (lock, duration)
+
+
+def test_classify_ignores_session_statements() -> None:
+    """
+    Test that transaction control and settings take no table lock.
+    """
+    assert online.classify("BEGIN") is None
+    assert online.classify("SET LOCAL lock_timeout = '2000ms'") is None
+
+
+def test_analyze_flags_blocking_revision() -> None:
+    """
+    Test that a plain index build and an unguarded lock are reported as risky.
+    """
+    sql = (
+        "BEGIN;\n\n"
+        "CREATE INDEX ix_item_x ON item (title);\n\n"
+        "ALTER TABLE item ADD COLUMN flag BOOLEAN;\n\n"
+        "UPDATE alembic_version SET version_num='x';\n\n"
+        "COMMIT;\n\n"
+    )
+    findings = online.analyze(sql)
+    assert [finding.risky for finding in findings] == [True, True]
+    assert findings[1].reason == "attente du verrou sans lock_timeout"
+
+
+def test_analyze_ignores_tables_created_by_the_revision() -> None:
+    """
+    Test that locks on a table created in the same revision are not risky.
+    """
+    sql = (
+        "BEGIN;\n\n"
+        "CREATE TABLE audit (\n  id INTEGER\n);\n\n"
+        "CREATE INDEX ix_audit_id ON audit (id);\n\n"
+        "COMMIT;\n\n"
+    )
+    assert not any(finding.risky for finding in online.analyze(sql))
+
+
+def test_helpers_emit_non_blocking_sql() -> None:
+    """
+    Test that the online helpers, rendered offline, contain nothing risky.
+    """
+    buffer = io.StringIO()
+    context = MigrationContext.configure(
+        dialect_name="postgresql",
+        opts={"as_sql": True, "output_buffer": buffer, "literal_binds": True},
+    )
+    with Operations.context(context):
+        context.impl.static_output("BEGIN;\n")
+        online.add_not_null("item", "updated_at")
+        online.create_index_concurrently("ix_item_x", "item", "(title, id)")
+        online.backfill("item_description", "item", "description = ''", "description IS NULL")
+        context.impl.static_output("COMMIT;\n")
+
+    findings = online.analyze(buffer.getvalue())
+    statements = [finding.report.statement for finding in findings]
+    assert "ALTER TABLE item ALTER COLUMN updated_at SET NOT NULL" in statements
+    assert any(statement.startswith("WITH batch AS (UPDATE item") for statement in statements)
+    assert not any(finding.risky for finding in findings)
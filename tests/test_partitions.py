@@ -0,0 +1,77 @@
+from datetime import datetime
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from app.db.partitions import (
+    Partition,
+    expired_partitions,
+    missing_partitions,
+    month_start,
+    parse_bound,
+)
+from app.models.item import Item
+from app.services import item_partitions
+
+
+def test_month_start_wraps_years() -> None:
+    """
+    Test month arithmetic across year boundaries.
+    """
+    moment = datetime(2026, 11, 17, 8, 30)
+    assert month_start(moment) == datetime(2026, 11, 1)
+    assert month_start(moment, 2) == datetime(2027, 1, 1)
+    assert month_start(moment, -11) == datetime(2025, 12, 1)
+
+
+def test_parse_partition_bounds() -> None:
+    """
+    Test parsing of pg_get_expr(relpartbound) output.
+    """
+    assert parse_bound(
+        "FOR VALUES FROM ('2026-10-01 00:00:00') TO ('2026-11-01 00:00:00')"
+    ) == (datetime(2026, 10, 1), datetime(2026, 11, 1))
+    assert parse_bound("FOR VALUES FROM (MINVALUE) TO ('2026-11-01 00:00:00')") == (
+        None,
+        datetime(2026, 11, 1),
+    )
+    assert parse_bound("DEFAULT") is None
+
+
+def test_missing_partitions_continue_after_last() -> None:
+    """
+    Test that future partitions start where the last existing one ends.
+    """
+    now = datetime(2026, 10, 19)
+    existing = [Partition("item_legacy", None, datetime(2026, 11, 1))]
+    missing = missing_partitions("item", existing, now, months_ahead=2)
+    assert missing == [
+        Partition("item_p2026_11", datetime(2026, 11, 1), datetime(2026, 12, 1)),
+        Partition("item_p2026_12", datetime(2026, 12, 1), datetime(2027, 1, 1)),
+    ]
+    assert missing_partitions("item", existing + missing, now, months_ahead=2) == []
+
+
+def test_expired_partitions_respect_retention() -> None:
+    """
+    Test that only partitions wholly older than the retention window expire.
+    """
+    existing = [
+        Partition("item_legacy", None, datetime(2026, 2, 1)),
+        Partition("item_p2026_02", datetime(2026, 2, 1), datetime(2026, 3, 1)),
+        Partition("item_p2026_03", datetime(2026, 3, 1), datetime(2026, 4, 1)),
+    ]
+    now = datetime(2026, 10, 19)
+    assert expired_partitions(existing, now, 0) == []
+    assert [p.name for p in expired_partitions(existing, now, 7)] == [
+        "item_legacy",
+        "item_p2026_02",
+    ]
+
+
+def test_item_identity_includes_partition_key(db: Session) -> None:
+    """
+    Test that the ORM addresses items by (id, created_at) outside PostgreSQL too.
+    """
+    assert [c.name for c in inspect(Item).primary_key] == ["id", "created_at"]
+    assert item_partitions.ensure_partitions(db) == []
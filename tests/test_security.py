@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.core.tokens import (
+    HMACBackend,
+    InvalidTokenError,
+    JoseBackend,
+    TokenCache,
+    decode_access_token,
+    token_cache,
+)
+from app.schemas.token import TokenPayload
+
+
+def test_hmac_backend_is_compatible_with_jose() -> None:
+    """
+    Test that tokens issued by one backend verify with the other.
+    """
+    claims = {"exp": int(time.time()) + 60, "sub": "7"}
+    key, algorithm = settings.SECRET_KEY, "HS256"
+    jose_token = JoseBackend().encode(claims, key, algorithm)
+    hmac_token = HMACBackend().encode(claims, key, algorithm)
+    assert HMACBackend().decode(jose_token, key, algorithm) == claims
+    assert JoseBackend().decode(hmac_token, key, algorithm) == claims
+
+
+@pytest.mark.parametrize("backend", [JoseBackend(), HMACBackend()])
+def test_backends_reject_invalid_tokens(backend) -> None:
+    """
+    Test that tampered, expired and wrongly signed tokens are rejected.
+    """
+    key, algorithm = settings.SECRET_KEY, "HS256"
+    token = backend.encode({"exp": int(time.time()) + 60, "sub": "7"}, key, algorithm)
+    header, payload, signature = token.split(".")
+    with pytest.raises(InvalidTokenError):
+        backend.decode(f"{header}.{payload}.{signature[::-1]}", key, algorithm)
+    with pytest.raises(InvalidTokenError):
+        backend.decode(token, "another-secret-key", algorithm)
+    expired = backend.encode({"exp": int(time.time()) - 1, "sub": "7"}, key, algorithm)
+    with pytest.raises(InvalidTokenError):
+        backend.decode(expired, key, algorithm)
+    with pytest.raises(InvalidTokenError):
+        backend.decode("not-a-token", key, algorithm)
+
+
+def test_token_cache_expires_and_evicts() -> None:
+    """
+    Test that cached payloads expire at exp and the cache stays bounded.
+    """
+    cache = TokenCache(maxsize=2)
+    cache.set("a", TokenPayload(sub=1), time.time() + 60)
+    cache.set("b", TokenPayload(sub=2), time.time() - 1)
+    assert cache.get("a").sub == 1
+    assert cache.get("b") is None
+    cache.set("c", TokenPayload(sub=3), time.time() + 60)
+    cache.set("d", TokenPayload(sub=4), time.time() + 60)
+    assert len(cache) == 2
+    assert cache.get("a") is None
+
+
+def test_decode_access_token_uses_cache() -> None:
+    """
+    Test that a verified token is served from the cache afterwards.
+    """
+    token_cache.clear()
+    token = create_access_token(5)
+    assert decode_access_token(token).sub == 5
+    assert len(token_cache) == 1
+    assert decode_access_token(token).sub == 5
+
+
+def test_calibrate_bcrypt_rounds_respects_bounds() -> None:
+    """
+    Test that calibration stays within the configured bounds.
+    """
+    from app.core.security import calibrate_bcrypt_rounds
+
+    assert calibrate_bcrypt_rounds(0.001, min_rounds=4, max_rounds=6) == 4
+    assert calibrate_bcrypt_rounds(10_000_000, min_rounds=4, max_rounds=6) == 6
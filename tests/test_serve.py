@@ -0,0 +1,151 @@
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+import uvicorn
+
+from app.core.config import settings
+from app.serve import (
+    Supervisor,
+    Worker,
+    _cgroup_quota,
+    build_config,
+    pool_sizes,
+    worker_count,
+)
+
+
+def test_cgroup_v2_quota(tmp_path: Path) -> None:
+    """
+    Test that a cgroup v2 cpu.max quota is read as a CPU count.
+    """
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    assert _cgroup_quota(str(tmp_path)) == 1.5
+
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert _cgroup_quota(str(tmp_path)) is None
+
+
+def test_cgroup_v1_quota(tmp_path: Path) -> None:
+    """
+    Test the cgroup v1 fallback, where -1 means no quota.
+    """
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("200000\n")
+    assert _cgroup_quota(str(tmp_path)) == 2.0
+
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("-1\n")
+    assert _cgroup_quota(str(tmp_path)) is None
+
+
+def test_worker_count(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test that fractional CPU quotas round up and WEB_WORKERS overrides them.
+    """
+    monkeypatch.setattr(settings, "WEB_WORKERS", 0)
+    assert worker_count(cpus=1.5) == 2
+    assert worker_count(cpus=0.5) == 1
+    monkeypatch.setattr(settings, "WEB_WORKERS", 6)
+    assert worker_count(cpus=1.5) == 6
+
+
+def test_pool_sizes_fit_connection_budget(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test that per-worker pools never exceed the node's connection budget.
+    """
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 5)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 10)
+    monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", 0)
+    assert pool_sizes(4) == (5, 10)
+
+    monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", 40)
+    size, overflow = pool_sizes(4)
+    assert (size, overflow) == (5, 5)
+    assert (size + overflow) * 4 <= 40
+
+    monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", 6)
+    size, overflow = pool_sizes(4)
+    assert (size, overflow) == (1, 0)
+
+
+def test_trusted_proxies(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test that the trusted proxy list reaches uvicorn's proxy header handling.
+    """
+    monkeypatch.setattr(settings, "WEB_FORWARDED_ALLOW_IPS", "10.0.0.5,10.0.0.6")
+    config = build_config(workers=1)
+    assert config.proxy_headers
+    assert config.forwarded_allow_ips == "10.0.0.5,10.0.0.6"
+
+
+async def _lifespan_app(scope, receive, send) -> None:
+    message = await receive()
+    if message["type"] == "lifespan.startup":
+        await send({"type": "lifespan.startup.complete"})
+        await receive()
+        await send({"type": "lifespan.shutdown.complete"})
+
+
+def test_worker_signals_ready_after_startup() -> None:
+    """
+    Test that a worker reports readiness once its lifespan startup has completed.
+    """
+    config = uvicorn.Config(_lifespan_app, host="127.0.0.1", port=0, lifespan="on")
+    ready = threading.Event()
+    worker = Worker(config, ready)
+    worker.install_signal_handlers = lambda: None
+    sock = config.bind_socket()
+
+    async def run():
+        serving = asyncio.ensure_future(worker.serve(sockets=[sock]))
+        for _ in range(200):
+            if ready.is_set():
+                break
+            await asyncio.sleep(0.01)
+        assert ready.is_set() and worker.started
+        worker.should_exit = True
+        await serving
+
+    try:
+        asyncio.run(run())
+    finally:
+        sock.close()
+
+
+class FakeProcess:
+    def __init__(self, name: str, starts: bool) -> None:
+        self.name, self.starts, self.alive = name, starts, True
+
+    def is_alive(self) -> bool:
+        return self.alive
+
+
+def test_rolling_restart_waits_for_ready_workers(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test that an old worker stops only once its replacement is ready.
+    """
+    monkeypatch.setattr(settings, "APP_PORT", 0)
+    monkeypatch.setattr(settings, "WEB_WORKER_BOOT_SECONDS", 0.3)
+    supervisor = Supervisor(build_config(workers=2))
+    supervisor.processes = [FakeProcess("old-1", True), FakeProcess("old-2", True)]
+    outcomes = iter([True, False])
+    stopped = []
+
+    def spawn(ready):
+        process = FakeProcess(f"new-{len(stopped)}", next(outcomes))
+        if process.starts:
+            ready.set()
+        return process
+
+    monkeypatch.setattr(supervisor, "_spawn", spawn)
+    monkeypatch.setattr(supervisor, "_stop", lambda process: stopped.append(process.name))
+    try:
+        supervisor.rolling_restart()
+    finally:
+        for sock in supervisor.sockets:
+            sock.close()
+    # The second replacement never became ready: it is stopped, old-2 keeps serving
+    assert stopped == ["old-1", "new-1"]
+    assert [p.name for p in supervisor.processes] == ["new-0", "old-2"]
@@ -0,0 +1,181 @@
+from datetime import datetime, timedelta
+from typing import Generator, List
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.db.sharding import ShardRouter, ShardSession, shard_name
+from app.models.item import Item
+from app.models.user import User
+from app.schemas.item import ItemCreate, ItemListParams
+from app.schemas.user import UserCreate
+from app.services import item as item_service
+from app.services import stats as stats_service
+from app.services import user as user_service
+
+SHARDS = 2
+
+
+@pytest.fixture
+def router() -> Generator:
+    """
+    Two in-memory SQLite databases, each with the full schema.
+    """
+    engines = {
+        shard_name(index): create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        for index in range(SHARDS)
+    }
+    for engine in engines.values():
+        Base.metadata.create_all(bind=engine)
+    yield ShardRouter(engines)
+    for engine in engines.values():
+        engine.dispose()
+
+
+@pytest.fixture
+def sdb(router: ShardRouter) -> Generator:
+    db = router.session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _create_users(db: ShardSession, count: int) -> List[User]:
+    return [
+        user_service.create_user(
+            db, UserCreate(email=f"user{index}@example.com", password="password")
+        )
+        for index in range(count)
+    ]
+
+
+def _rows_on(router: ShardRouter, shard_id: str, model) -> List[int]:
+    with Session(router.engines[shard_id]) as db:
+        return sorted(db.scalars(select(model.id)))
+
+
+def test_users_spread_across_shards(router: ShardRouter, sdb: ShardSession) -> None:
+    """
+    Test that new users alternate between shards, with ids that name their shard.
+    """
+    users = _create_users(sdb, 4)
+
+    ids = [user.id for user in users]
+    assert _rows_on(router, "shard0", User) == [ids[0], ids[2]]
+    assert _rows_on(router, "shard1", User) == [ids[1], ids[3]]
+    for user in users:
+        assert router.shard_for(user.id) == shard_name(ids.index(user.id) % SHARDS)
+
+    other = router.session()
+    try:
+        assert user_service.get_by_id(other, ids[3]).email == "user3@example.com"
+        assert user_service.get_by_email(other, "user2@example.com").id == ids[2]
+        assert user_service.count_users(other) == (4, False)
+    finally:
+        other.close()
+
+
+def test_items_live_with_their_owner(router: ShardRouter, sdb: ShardSession) -> None:
+    """
+    Test that items, single or batched, are written to their owner's shard.
+    """
+    first, second = _create_users(sdb, 2)
+    single = item_service.create_item(sdb, ItemCreate(title="Single"), owner_id=second.id)
+    batch = item_service.create_items(
+        sdb,
+        [
+            (ItemCreate(title="A"), first.id),
+            (ItemCreate(title="B"), second.id),
+            (ItemCreate(title="C"), first.id),
+        ],
+    )
+
+    assert [item.title for item in batch] == ["A", "B", "C"]
+    assert _rows_on(router, "shard0", Item) == sorted([batch[0].id, batch[2].id])
+    assert _rows_on(router, "shard1", Item) == sorted([single.id, batch[1].id])
+    assert item_service.count_by_owner(sdb, first.id) == 2
+    assert item_service.count_by_owner(sdb, second.id) == 2
+    assert item_service.get_by_id(sdb, batch[1].id).title == "B"
+
+    assert item_service.delete_item(sdb, single.id)
+    assert item_service.count_by_owner(sdb, second.id) == 1
+
+
+def test_listings_merge_shards_in_order(sdb: ShardSession) -> None:
+    """
+    Test that admin-wide listings interleave both shards in sort order.
+    """
+    users = _create_users(sdb, 3)
+    now = datetime.utcnow()
+    for index in range(6):
+        owner = users[index % 3]
+        item = item_service.create_item(sdb, ItemCreate(title=f"Item {index}"), owner_id=owner.id)
+        item.created_at = now - timedelta(minutes=10 - index)
+    sdb.commit()
+
+    titles = [item.title for item in item_service.get_items(sdb, skip=0, limit=10)]
+    assert titles == [f"Item {index}" for index in range(6)]
+    page = item_service.list_items(sdb, params=ItemListParams(sort="-created_at"), skip=1, limit=3)
+    assert [item.title for item in page] == ["Item 4", "Item 3", "Item 2"]
+    assert item_service.count_items(sdb, params=ItemListParams(title_prefix="Item")) == (6, False)
+
+    assert [user.id for user in user_service.get_users(sdb, skip=1, limit=2)] == sorted(
+        user.id for user in users
+    )[1:3]
+
+
+def test_stats_add_up_across_shards(sdb: ShardSession) -> None:
+    """
+    Test that daily rollups and top owners combine every shard.
+    """
+    first, second = _create_users(sdb, 2)
+    for title in ("A", "B", "C"):
+        item_service.create_item(sdb, ItemCreate(title=title), owner_id=second.id)
+    item_service.create_item(sdb, ItemCreate(title="D"), owner_id=first.id)
+
+    stats_service.refresh_daily_stats(sdb, days=1)
+    (today,) = stats_service.get_daily_stats(sdb, days=1)
+    assert (today.items_created, today.active_users, today.users_created) == (4, 2, 2)
+    assert [row.owner_id for row in stats_service.top_owners(sdb, limit=2)] == [
+        second.id,
+        first.id,
+    ]
+    # Global tables stay on the default shard
+    with Session(sdb.router.engines["shard1"]) as other:
+        assert other.scalar(select(func.count()).select_from(Base.metadata.tables["dailystats"])) == 0
+
+
+def test_insert_spanning_shards_is_refused(sdb: ShardSession) -> None:
+    """
+    Test that a single INSERT with rows for several shards is rejected.
+    """
+    first, second = _create_users(sdb, 2)
+    with pytest.raises(ValueError):
+        sdb.execute(
+            Item.__table__.insert(),
+            [{"title": "A", "owner_id": first.id}, {"title": "B", "owner_id": second.id}],
+        )
+
+
+def test_bulk_users_spread_across_shards(router: ShardRouter, sdb: ShardSession) -> None:
+    """
+    Test that bulk-created users are inserted per shard and existing emails are found on any.
+    """
+    existing = _create_users(sdb, 2)
+    users_in = [
+        UserCreate(email=f"bulk{index}@example.com", password="password") for index in range(4)
+    ]
+    users_in.append(UserCreate(email=existing[1].email, password="password"))
+    results = user_service.create_users(sdb, users_in)
+
+    assert [result.status for result in results] == ["created"] * 4 + ["exists"]
+    assert results[4].id == existing[1].id
+    for result in results[:4]:
+        assert result.id in _rows_on(router, router.shard_for(result.id), User)
+    assert user_service.count_users(sdb) == (6, False)
@@ -0,0 +1,85 @@
+import asyncio
+import threading
+from typing import Dict
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.singleflight import SingleFlight
+
+
+def test_concurrent_calls_are_coalesced() -> None:
+    """
+    Test that concurrent identical calls share one execution.
+    """
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow_query():
+        calls.append(1)
+        release.wait(5)
+        return b"result"
+
+    async def run():
+        tasks = [
+            asyncio.ensure_future(flight.do(("route", 1, "superuser"), slow_query))
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    before = metrics.get("singleflight_coalesced", "route")
+    results = asyncio.run(run())
+    assert results == [b"result"] * 5
+    assert len(calls) == 1
+    assert metrics.get("singleflight_coalesced", "route") - before == 4
+    assert flight.inflight() == 0
+
+
+def test_errors_are_shared_and_not_cached() -> None:
+    """
+    Test that a failing call propagates to every waiter and is retried afterwards.
+    """
+    flight = SingleFlight()
+
+    def failing():
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(
+            flight.do(("route", 2), failing),
+            flight.do(("route", 2), failing),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert asyncio.run(flight.do(("route", 2), lambda: "ok")) == "ok"
+
+
+def test_read_item_with_single_flight(
+    client: TestClient,
+    normal_user_token_headers: Dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Test that read endpoints behave identically when single-flight is enabled.
+    """
+    monkeypatch.setattr(settings, "SINGLE_FLIGHT_ENABLED", True)
+    data = {"title": "Hot Item", "description": "Popular"}
+    item = client.post("/api/v1/items/", headers=normal_user_token_headers, json=data).json()
+
+    response = client.get(f"/api/v1/items/{item['id']}", headers=normal_user_token_headers)
+    assert response.status_code == 200
+    assert response.json() == item
+
+    response = client.get("/api/v1/items/", headers=normal_user_token_headers)
+    assert response.status_code == 200
+    assert [i["id"] for i in response.json()] == [item["id"]]
+
+    response = client.get("/api/v1/items/999999", headers=normal_user_token_headers)
+    assert response.status_code == 404
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+from typing import Dict
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.schemas.item import ItemCreate
+from app.services import item as item_service
+from app.services import stats as stats_service
+
+
+def test_refresh_only_recomputes_recent_days(db: Session, normal_user: Dict[str, str]) -> None:
+    """
+    Test that a refresh rewrites the recent buckets and leaves older ones alone.
+    """
+    now = datetime.utcnow()
+    old = item_service.create_item(db, ItemCreate(title="Old"), owner_id=normal_user["id"])
+    old.created_at = now - timedelta(days=5)
+    db.commit()
+    stats_service.refresh_daily_stats(db, days=7, now=now)
+
+    for i in range(2):
+        item_service.create_item(db, ItemCreate(title=f"New {i}"), owner_id=normal_user["id"])
+    # The old item disappears, but its day is outside the refresh window
+    item_service.delete_item(db, old.id)
+    stats_service.refresh_daily_stats(db, days=2, now=now)
+
+    buckets = {b.day: b for b in stats_service.get_daily_stats(db, days=7, now=now)}
+    assert len(buckets) == 7
+    today = buckets[now.date()]
+    assert (today.items_created, today.active_users, today.users_created) == (2, 1, 1)
+    assert buckets[(now - timedelta(days=5)).date()].items_created == 1
+    assert buckets[(now - timedelta(days=1)).date()].items_created == 0
+
+
+def test_stats_endpoints_are_admin_only(
+    client: TestClient,
+    db: Session,
+    normal_user: Dict[str, str],
+    normal_user_token_headers: Dict[str, str],
+    superuser_token_headers: Dict[str, str],
+) -> None:
+    """
+    Test that the stats endpoints serve rollups with freshness timestamps to admins only.
+    """
+    response = client.get("/api/v1/stats/daily", headers=normal_user_token_headers)
+    assert response.status_code == 400
+
+    response = client.get("/api/v1/stats/daily", headers=superuser_token_headers)
+    assert response.json() == {"refreshed_at": None, "buckets": []}
+
+    item_service.create_item(db, ItemCreate(title="Counted"), owner_id=normal_user["id"])
+    stats_service.refresh_daily_stats(db)
+    report = client.get("/api/v1/stats/daily?days=2", headers=superuser_token_headers).json()
+    assert report["refreshed_at"] is not None
+    assert [b["items_created"] for b in report["buckets"]] == [0, 1]
+
+    report = client.get("/api/v1/stats/owners", headers=superuser_token_headers).json()
+    assert "as_of" in report
+    assert report["owners"] == [
+        {"owner_id": normal_user["id"], "email": normal_user["email"], "items": 1}
+    ]
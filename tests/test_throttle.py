@@ -0,0 +1,101 @@
+import time
+
+import pytest
+
+from app.core.throttle import (
+    KeyValueClient,
+    LocalKeyValueClient,
+    MemoryThrottleStore,
+    SharedThrottleStore,
+    ThrottleStore,
+)
+
+
+@pytest.mark.parametrize(
+    "store",
+    [MemoryThrottleStore(), SharedThrottleStore(LocalKeyValueClient())],
+    ids=["memory", "shared"],
+)
+def test_token_bucket(store) -> None:
+    """
+    Test capacity, rejection delay and refill of a token bucket.
+    """
+    store.clear()
+    assert store.consume("k", capacity=2, refill_per_second=20) == 0
+    assert store.consume("k", capacity=2, refill_per_second=20) == 0
+    wait = store.consume("k", capacity=2, refill_per_second=20)
+    assert 0 < wait <= 0.05
+    # Other keys are independent
+    assert store.consume("other", capacity=2, refill_per_second=20) == 0
+    time.sleep(wait + 0.01)
+    assert store.consume("k", capacity=2, refill_per_second=20) == 0
+
+
+@pytest.mark.parametrize(
+    "store",
+    [MemoryThrottleStore(), SharedThrottleStore(LocalKeyValueClient())],
+    ids=["memory", "shared"],
+)
+def test_refund_is_capped(store) -> None:
+    """
+    Test that refunded tokens are usable again but never exceed the capacity.
+    """
+    store.clear()
+    assert store.consume("k", capacity=1, refill_per_second=0.001) == 0
+    store.refund("k", capacity=1, refill_per_second=0.001)
+    store.refund("k", capacity=1, refill_per_second=0.001)
+    assert store.consume("k", capacity=1, refill_per_second=0.001) == 0
+    assert store.consume("k", capacity=1, refill_per_second=0.001) > 0
+
+
+def test_incomplete_store_cannot_be_created() -> None:
+    """
+    Test that a store or client missing a method fails when instantiated.
+    """
+
+    class PartialStore(ThrottleStore):
+        def clear(self) -> None:
+            pass
+
+    class PartialClient(KeyValueClient):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        PartialStore()
+    with pytest.raises(TypeError):
+        PartialClient()
+
+
+def test_memory_store_is_bounded() -> None:
+    """
+    Test that the in-process store forgets least recently used buckets.
+    """
+    store = MemoryThrottleStore(max_keys=2)
+    for key in ("a", "b", "c"):
+        store.consume(key, capacity=1, refill_per_second=0.001)
+    # "a" was evicted, so its bucket is full again
+    assert store.consume("a", capacity=1, refill_per_second=0.001) == 0
+    assert store.consume("c", capacity=1, refill_per_second=0.001) > 0
+
+
+def test_shared_store_compare_and_set_conflict() -> None:
+    """
+    Test that a lost compare-and-set race is retried against fresh state.
+    """
+    client = LocalKeyValueClient()
+    store = SharedThrottleStore(client)
+    store.consume("k", capacity=5, refill_per_second=1)
+    original = client.compare_and_set
+    calls = []
+
+    def racing_cas(key, expected, value, ttl):
+        if not calls:
+            calls.append(1)
+            # Another node consumed a token in between
+            original(key, expected, b"0.0:%f" % time.time(), ttl)
+            return False
+        return original(key, expected, value, ttl)
+
+    client.compare_and_set = racing_cas
+    assert store.consume("k", capacity=5, refill_per_second=0.001) > 0
@@ -82,6 +82,27 @@ def test_update_user_me(client: TestClient, normal_user_token_headers: Dict[str,
     assert user["full_name"] == data["full_name"]
 
 
+def test_update_user_me_with_stale_version(
+    client: TestClient, normal_user_token_headers: Dict[str, str]
+) -> None:
+    """
+    Test that updating with an outdated version fails with 409.
+    """
+    version = client.get("/api/v1/users/me", headers=normal_user_token_headers).json()["version"]
+    response = client.put(
+        "/api/v1/users/me",
+        headers=normal_user_token_headers,
+        json={"full_name": "First", "version": version},
+    )
+    assert response.json()["version"] == version + 1
+    response = client.put(
+        "/api/v1/users/me",
+        headers=normal_user_token_headers,
+        json={"full_name": "Second", "version": version},
+    )
+    assert response.status_code == 409
+
+
 def test_read_user_by_id_superuser(
     client: TestClient, superuser_token_headers: Dict[str, str], normal_user: Dict[str, str]
 ) -> None:
@@ -130,4 +151,163 @@ def test_delete_user_superuser(
     
     # Check that the user is really deleted
     response = client.get(f"/api/v1/users/{user.id}", headers=superuser_token_headers)
-    assert response.status_code == 404  # Not found 
\ No newline at end of file
+    assert response.status_code == 404  # Not found 
+
+def test_read_users_total_count(
+    client: TestClient, superuser_token_headers: Dict[str, str], normal_user: Dict[str, str]
+) -> None:
+    """
+    Test that the user listing can return a total count.
+    """
+    response = client.get(
+        "/api/v1/users/", headers=superuser_token_headers, params={"with_total": True}
+    )
+    assert response.status_code == 200
+    assert response.headers["X-Total-Count"] == "2"
+    assert response.headers["X-Total-Count-Approximate"] in ("true", "false")
+
+
+def test_delete_heavy_user_in_background(
+    client: TestClient,
+    superuser_token_headers: Dict[str, str],
+    db: Session,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Test that users above the threshold are deleted in chunks in the background.
+    """
+    from app.core.config import settings
+    from app.schemas.item import ItemCreate
+    from app.db.session import fork_session
+    from app.services import item as item_service
+    from app.services import job as job_service
+
+    monkeypatch.setattr(settings, "USER_DELETE_ASYNC_THRESHOLD", 3)
+    monkeypatch.setattr(settings, "USER_DELETE_CHUNK_SIZE", 2)
+    user = user_service.create_user(
+        db, UserCreate(email="heavy@example.com", password="password")
+    )
+    user_id = user.id
+    for i in range(5):
+        item_service.create_item(db, ItemCreate(title=f"Item {i}"), owner_id=user_id)
+
+    response = client.delete(f"/api/v1/users/{user_id}", headers=superuser_token_headers)
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    # Job runners are disabled in tests: drain the queue by hand
+    while job_service.run_next(lambda: fork_session(db), "test"):
+        pass
+    response = client.get(f"/api/v1/jobs/{job_id}", headers=superuser_token_headers)
+    assert response.status_code == 200
+    job = response.json()
+    assert job["status"] == "done"
+    assert job["progress_total"] == job["progress_done"] == 5
+    assert job["result"] == {"user_deleted": True, "deleted_items": 5}
+
+    response = client.get(f"/api/v1/users/{user_id}", headers=superuser_token_headers)
+    assert response.status_code == 404
+
+
+def test_requests_return_connection_before_responding(
+    client: TestClient,
+    normal_user_token_headers: Dict[str, str],
+    normal_user: Dict[str, str],
+    db: Session,
+) -> None:
+    """
+    Test that no pooled connection is held once the endpoint has loaded its data.
+    """
+    pool = db.get_bind().pool
+
+    response = client.get("/api/v1/users/me", headers=normal_user_token_headers)
+    assert response.status_code == 200
+    assert pool.checkedout() == 0
+
+    response = client.get(
+        f"/api/v1/users/{normal_user['id']}", headers=normal_user_token_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["email"] == normal_user["email"]
+    assert pool.checkedout() == 0
+
+    response = client.put(
+        "/api/v1/users/me", headers=normal_user_token_headers, json={"full_name": "Renamed"}
+    )
+    assert response.status_code == 200
+    assert response.json()["full_name"] == "Renamed"
+    assert pool.checkedout() == 0
+
+
+def test_create_users_bulk(
+    client: TestClient, superuser_token_headers: Dict[str, str], normal_user: Dict[str, str]
+) -> None:
+    """
+    Test that a bulk creation reports created, existing and repeated emails.
+    """
+    users = [{"email": f"bulk{index}@example.com", "password": "password"} for index in range(3)]
+    users += [
+        {"email": normal_user["email"], "password": "password"},
+        {"email": "bulk0@example.com", "password": "other"},
+    ]
+    response = client.post(
+        "/api/v1/users/bulk", headers=superuser_token_headers, json={"users": users}
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["created"], report["existing"], report["duplicates"]) == (3, 1, 1)
+    assert [result["status"] for result in report["results"]] == [
+        "created", "created", "created", "exists", "duplicate"
+    ]
+    assert report["results"][3]["id"] == normal_user["id"]
+
+    login = client.post(
+        "/api/v1/auth/login",
+        data={"username": "bulk2@example.com", "password": "password"},
+    )
+    assert login.status_code == 200
+
+
+def test_create_users_bulk_limits(
+    client: TestClient,
+    superuser_token_headers: Dict[str, str],
+    normal_user_token_headers: Dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Test that bulk creation is admin-only and capped per request.
+    """
+    from app.core.config import settings
+
+    body = {"users": [{"email": f"cap{index}@example.com", "password": "p"} for index in range(3)]}
+    response = client.post("/api/v1/users/bulk", headers=normal_user_token_headers, json=body)
+    assert response.status_code == 400
+    monkeypatch.setattr(settings, "USER_BULK_MAX_USERS", 2)
+    response = client.post("/api/v1/users/bulk", headers=superuser_token_headers, json=body)
+    assert response.status_code == 413
+
+
+def test_create_users_hashes_in_parallel(db: Session, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test that a large batch is hashed by the process pool and inserted in batches.
+    """
+    from app.core import security
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 2)
+    monkeypatch.setattr(settings, "PASSWORD_HASH_PARALLEL_MIN", 4)
+    users_in = [
+        UserCreate(email=f"pool{index}@example.com", password=f"secret{index}")
+        for index in range(6)
+    ]
+    try:
+        results = user_service.create_users(db, users_in, batch_size=4)
+        assert security._hash_pool is not None
+    finally:
+        security.shutdown_hash_pool()
+
+    assert [result.status for result in results] == [user_service.CREATED] * 6
+    user = user_service.get_by_id(db, results[5].id)
+    assert user.email == "pool5@example.com"
+    assert security.verify_password("secret5", user.hashed_password)
+    assert not security.password_needs_rehash(user.hashed_password)